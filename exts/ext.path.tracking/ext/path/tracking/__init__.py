@@ -1,8 +1,24 @@
+from .scripts.attachments import *
+from .scripts.batch import *
 from .scripts.debug_draw import *
-from .scripts.extension import *
-from .scripts.model import *
+from .scripts.fleet import *
+from .scripts.headless import *
+from .scripts.lod import *
 from .scripts.path_tracker import *
 from .scripts.path_tracker import *
-from .scripts.ui import *
-from .scripts.utils import *
-from .scripts.vehicle import *
\ No newline at end of file
+from .scripts.profiling import *
+from .scripts.telemetry import *
+from .scripts.trail import *
+from .scripts.trajectory import *
+from .scripts.vehicle import *
+
+try:
+    import omni.ext
+except ImportError:
+    # Running headless: only the Kit independent modules are available.
+    pass
+else:
+    from .scripts.extension import *
+    from .scripts.model import *
+    from .scripts.ui import *
+    from .scripts.utils import *
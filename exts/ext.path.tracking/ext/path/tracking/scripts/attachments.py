@@ -0,0 +1,87 @@
+import csv
+import json
+import os
+
+"""
+    Note: vehicle-to-curve attachments of a whole fleet can be loaded from a
+    file instead of being selected pair by pair. JSON files hold either an
+    object mapping WizardVehicle paths to BasisCurves paths, or a list of
+    {"WizardVehicle": ..., "BasisCurve": ...} entries (as in preset metadata).
+    CSV files hold one "vehicle,curve" pair per row, with an optional header:
+
+        WizardVehicle,BasisCurve
+        /World/Fleet/WizardVehicle_000,/World/BasisCurves/BasisCurves
+
+"""
+
+# ======================================================================================================================
+#
+# read_attachments
+#
+# ======================================================================================================================
+
+
+def read_attachments(path):
+    """
+    Reads (vehicle path, curve path) pairs from a JSON or CSV file, in file
+    order. Raises ValueError listing all malformed entries of the file.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="") as f:
+        if extension == ".json":
+            return _parse_json(f.read())
+        if extension == ".csv":
+            return _parse_csv(f)
+    raise ValueError(f"[read_attachments] Unsupported attachment file format: {path}")
+
+
+def _parse_json(text):
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"[read_attachments] Invalid JSON: {e}")
+    if isinstance(data, dict):
+        entries = [{"WizardVehicle": vehicle, "BasisCurve": curve} for vehicle, curve in data.items()]
+    elif isinstance(data, list):
+        entries = data
+    else:
+        raise ValueError("[read_attachments] Expected a JSON object or list of attachments")
+
+    pairs = []
+    errors = []
+    for i, entry in enumerate(entries):
+        vehicle = entry.get("WizardVehicle") if isinstance(entry, dict) else None
+        curve = entry.get("BasisCurve") if isinstance(entry, dict) else None
+        if not isinstance(vehicle, str) or not isinstance(curve, str) or not vehicle or not curve:
+            errors.append(f"entry {i}: expected WizardVehicle and BasisCurve paths, got {entry!r}")
+            continue
+        pairs.append((vehicle, curve))
+    _raise_errors(errors)
+    return pairs
+
+
+def _parse_csv(lines):
+    pairs = []
+    errors = []
+    first_row = True
+    reader = csv.reader(lines)
+    for row in reader:
+        row = [cell.strip() for cell in row]
+        if not any(row) or row[0].startswith("#"):
+            continue
+        if first_row and not row[0].startswith("/"):
+            # Header row.
+            first_row = False
+            continue
+        first_row = False
+        if len(row) != 2 or not row[0] or not row[1]:
+            errors.append(f"line {reader.line_num}: expected vehicle,curve, got {','.join(row)!r}")
+            continue
+        pairs.append((row[0], row[1]))
+    _raise_errors(errors)
+    return pairs
+
+
+def _raise_errors(errors):
+    if errors:
+        raise ValueError("[read_attachments] Invalid attachments:\n" + "\n".join(errors))
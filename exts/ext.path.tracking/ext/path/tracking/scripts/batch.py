@@ -0,0 +1,221 @@
+try:
+    import omni.physx
+    from pxr import Gf, UsdGeom
+except ImportError:
+    # Kit and USD modules are not available when running headless (see headless.py).
+    pass
+
+import math
+import time
+import numpy as np
+
+from .headless import KinematicVehicle
+from .vehicle import ControlInput, _CONTROL_INPUT_ATTRIBUTES
+
+"""
+    Note: batch runs step physics directly in a tight loop instead of waiting
+    for timeline updates, so no frames are rendered while they run. Physics
+    is advanced by a stepper: PhysxStepper steps PhysX, KinematicUsdStepper
+    is a stand-in which moves vehicle prims with a kinematic bicycle model
+    (e.g. for tests on machines without a GPU).
+
+"""
+
+# ======================================================================================================================
+#
+# PhysxStepper
+#
+# ======================================================================================================================
+
+
+class PhysxStepper():
+    """
+    Steps PhysX simulation of the current stage and writes results back to USD.
+    """
+
+    def __init__(self):
+        self._physx = None
+
+    def start(self, stage, vehicles):
+        self._physx = omni.physx.get_physx_interface()
+        self._physx.start_simulation()
+
+    def step(self, dt, current_time):
+        self._physx.update_simulation(dt, current_time)
+        # Velocities are written back too, vehicles read their speed from USD.
+        self._physx.update_transformations(updateToFastCache=False, updateToUsd=True, updateVelocitiesToUsd=True)
+
+    def stop(self):
+        # Restores the state of the stage from before the simulation, as stopping the timeline does.
+        self._physx.reset_simulation()
+        self._physx = None
+
+# ======================================================================================================================
+#
+# KinematicUsdStepper
+#
+# ======================================================================================================================
+
+
+class KinematicUsdStepper():
+    """
+    PhysxStepper stand-in: reads vehicle controller inputs from USD, moves
+    each vehicle with a KinematicVehicle and writes its translate, rotation
+    and velocity back to the vehicle prim. Vehicle prims must have a
+    translate and either an orient or a rotateXYZ op. Original values are
+    restored on stop().
+    """
+
+    def __init__(self, **vehicle_args):
+        # Extra KinematicVehicle arguments, e.g. max_speed.
+        self._vehicle_args = vehicle_args
+        self._entries = []
+
+    def start(self, stage, vehicles):
+        self._entries = []
+        xform_cache = UsdGeom.XformCache()
+        for vehicle in vehicles:
+            prim = stage.GetPrimAtPath(vehicle.prim_path)
+            translate = prim.GetAttribute("xformOp:translate")
+            rotation = prim.GetAttribute("xformOp:orient")
+            if not rotation:
+                rotation = prim.GetAttribute("xformOp:rotateXYZ")
+            if not translate or not rotation:
+                raise ValueError(f"[KinematicUsdStepper] {vehicle.prim_path} has no translate/rotation xform ops")
+
+            forward = xform_cache.GetLocalToWorldTransform(prim).TransformDir(Gf.Vec3d(0.0, 0.0, 1.0))
+            position = translate.Get()
+            kinematic_vehicle = KinematicVehicle(
+                position=(position[0], position[1], position[2]),
+                heading=math.atan2(forward[0], forward[2]),
+                wheelbase=vehicle.get_wheelbase(),
+                **self._vehicle_args
+            )
+            velocity = prim.GetAttribute("physics:velocity")
+            controls = [prim.GetAttribute(_CONTROL_INPUT_ATTRIBUTES[i]) for i in ControlInput]
+            original_values = [(attribute, attribute.Get()) for attribute in (translate, rotation, velocity)]
+            self._entries.append((kinematic_vehicle, translate, rotation, velocity, controls, original_values))
+
+    def step(self, dt, current_time):
+        for kinematic_vehicle, translate, rotation, velocity, controls, _ in self._entries:
+            for control_input in ControlInput:
+                value = controls[control_input].Get()
+                kinematic_vehicle.get_controls()[control_input] = value if value is not None else 0.0
+            kinematic_vehicle.step(dt)
+
+            position = kinematic_vehicle.curr_position()
+            heading = kinematic_vehicle.get_heading()
+            translate.Set(type(translate.Get())(position[0], position[1], position[2]))
+            if rotation.GetName() == "xformOp:orient":
+                quat_type = type(rotation.Get())
+                half = 0.5 * heading
+                rotation.Set(quat_type(math.cos(half), 0.0, math.sin(half), 0.0))
+            else:
+                rotation.Set(type(rotation.Get())(0.0, math.degrees(heading), 0.0))
+            v = kinematic_vehicle.get_velocity()
+            velocity.Set(Gf.Vec3f(v[0], v[1], v[2]))
+
+    def stop(self):
+        for entry in self._entries:
+            for attribute, value in entry[-1]:
+                if value is not None:
+                    attribute.Set(value)
+        self._entries = []
+
+# ======================================================================================================================
+#
+# BatchMetrics
+#
+# ======================================================================================================================
+
+
+class BatchMetrics():
+    """
+    Accumulates per-vehicle metrics of a batch run from completed FleetTelemetry steps.
+    """
+
+    def __init__(self, vehicle_names):
+        num_vehicles = len(vehicle_names)
+        self._vehicle_names = list(vehicle_names)
+        self._distance = np.zeros(num_vehicles)
+        self._controlled_time = np.zeros(num_vehicles)
+        self._sum_sq_cross_track_error = np.zeros(num_vehicles)
+        self._max_cross_track_error = np.zeros(num_vehicles)
+        self._controlled_steps = np.zeros(num_vehicles, dtype=np.int64)
+        # Simulation time the vehicle stopped being controlled, i.e. reached its destination.
+        self._finish_time = np.full(num_vehicles, np.nan)
+
+    def update(self, step, dt, current_time):
+        controlled = step["controlled"]
+        self._distance += np.where(controlled, step["speed"], 0.0) * dt
+        self._controlled_time += np.where(controlled, dt, 0.0)
+        cross_track_error = np.where(controlled, np.abs(step["cross_track_error"]), 0.0)
+        self._sum_sq_cross_track_error += cross_track_error * cross_track_error
+        np.maximum(self._max_cross_track_error, cross_track_error, out=self._max_cross_track_error)
+        self._controlled_steps += controlled
+        finished = step["updated"] & ~controlled & np.isnan(self._finish_time)
+        self._finish_time[finished] = current_time
+
+    def all_finished(self):
+        return not np.isnan(self._finish_time).any()
+
+    def result(self):
+        vehicles = {}
+        for i, name in enumerate(self._vehicle_names):
+            steps = max(1, self._controlled_steps[i])
+            controlled_time = self._controlled_time[i]
+            vehicles[str(name)] = {
+                "finished": not np.isnan(self._finish_time[i]),
+                "finish_time": None if np.isnan(self._finish_time[i]) else float(self._finish_time[i]),
+                "distance": float(self._distance[i]),
+                "mean_speed": float(self._distance[i] / controlled_time) if controlled_time > 0.0 else 0.0,
+                "rms_cross_track_error": float(math.sqrt(self._sum_sq_cross_track_error[i] / steps)),
+                "max_cross_track_error": float(self._max_cross_track_error[i]),
+            }
+        return vehicles
+
+# ======================================================================================================================
+#
+# run_batch
+#
+# ======================================================================================================================
+
+
+def run_batch(dispatcher, stepper, stage, vehicles, telemetry, vehicle_names, duration, time_step,
+              until_finished=True):
+    """
+    Steps scenarios registered in a SimStepDispatcher and physics alternately
+    until `duration` seconds of simulation time passed, or all the vehicles
+    reached their destinations if `until_finished` is set. Scenarios must
+    record into `telemetry`, which is completed by one of dispatcher's post-step callbacks.
+    Returns a dictionary of run and per-vehicle metrics (in seconds and meters).
+    """
+    metrics = BatchMetrics(vehicle_names)
+    num_steps = int(math.ceil(duration / time_step))
+    current_time = 0.0
+    step = 0
+    start = time.perf_counter()
+    stepper.start(stage, vehicles)
+    dispatcher.start_manual_stepping()
+    try:
+        while step < num_steps:
+            dispatcher.step(time_step)
+            stepper.step(time_step, current_time)
+            current_time += time_step
+            step += 1
+            metrics.update(telemetry.last_step(), time_step, current_time)
+            if until_finished and metrics.all_finished():
+                break
+    finally:
+        dispatcher.stop_manual_stepping()
+        stepper.stop()
+    wall_time = time.perf_counter() - start
+
+    return {
+        "steps": step,
+        "sim_time": current_time,
+        "wall_time": wall_time,
+        "realtime_factor": current_time / wall_time if wall_time > 0.0 else float("inf"),
+        "finished": metrics.all_finished(),
+        "vehicles": metrics.result(),
+    }
@@ -0,0 +1,413 @@
+import argparse
+import datetime
+import gc
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from .headless import HeadlessSimulation, KinematicVehicle, NullDebugRenderer
+from .path_tracker import (
+    BatchPurePursuitPathTracker, PurePursuitFleetScenario, PurePursuitPathTracker, PurePursuitScenario
+)
+from .trajectory import Trajectory, TrajectoryGeometry
+
+"""
+    Control loop benchmarks, run outside of Kit with headless stand-ins for
+    USD prims and PhysX vehicles (see headless.py):
+
+        cd exts/ext.path.tracking
+        python -m ext.path.tracking.scripts.benchmark --preset full --output bench.json
+        python -m ext.path.tracking.scripts.benchmark --compare bench.json
+
+    Each result reports steps/sec, per-step latency percentiles and memory
+    allocations per step. Results are written as JSON and can be compared
+    across commits with --compare.
+
+"""
+
+BENCHMARK_FORMAT_VERSION = 1
+
+PRESETS = {
+    "quick": {
+        "fleet_sizes": [1, 10, 100],
+        "trajectory_points": [100, 10000],
+        "lookahead_distances": [550.0],
+        "num_steps": 200,
+    },
+    "full": {
+        "fleet_sizes": [1, 10, 100, 1000],
+        "trajectory_points": [100, 10000, 1000000],
+        "lookahead_distances": [200.0, 550.0, 2000.0],
+        "num_steps": 500,
+    },
+}
+
+# Spacing of generated trajectory points, in stage units (cm).
+POINT_SPACING = 50.0
+MIN_TRACK_RADIUS = 3000.0
+
+# ======================================================================================================================
+#
+# Measurements
+#
+# ======================================================================================================================
+
+
+def measure(step, num_steps, warmup_steps=10, alloc_steps=20, max_seconds=10.0):
+    """
+    Calls `step()` repeatedly and collects per-step timings and allocations.
+    Timing stops early after `max_seconds`, but not before 10 timed steps.
+    """
+    for _ in range(warmup_steps):
+        step()
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        timings = np.empty(num_steps, dtype=np.int64)
+        deadline = time.perf_counter() + max_seconds
+        count = 0
+        while count < num_steps:
+            start = time.perf_counter_ns()
+            step()
+            timings[count] = time.perf_counter_ns() - start
+            count += 1
+            if count >= 10 and time.perf_counter() > deadline:
+                break
+        timings = timings[:count]
+
+        # Allocations are measured separately, tracemalloc slows down the timed steps.
+        peak_bytes = 0
+        net_blocks = 0
+        tracemalloc.start()
+        for _ in range(alloc_steps):
+            current_bytes, _ = tracemalloc.get_traced_memory()
+            _reset_peak()
+            blocks = sys.getallocatedblocks()
+            step()
+            net_blocks += sys.getallocatedblocks() - blocks
+            peak_bytes += tracemalloc.get_traced_memory()[1] - current_bytes
+        tracemalloc.stop()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    latency_us = timings / 1000.0
+    total_seconds = timings.sum() / 1e9
+    return {
+        "num_steps": int(count),
+        "steps_per_sec": count / total_seconds if total_seconds > 0.0 else float("inf"),
+        "latency_us": {
+            "mean": float(latency_us.mean()),
+            "p50": float(np.percentile(latency_us, 50)),
+            "p90": float(np.percentile(latency_us, 90)),
+            "p99": float(np.percentile(latency_us, 99)),
+            "max": float(latency_us.max()),
+        },
+        "alloc_per_step": {
+            "peak_bytes": peak_bytes / max(1, alloc_steps),
+            "net_blocks": net_blocks / max(1, alloc_steps),
+        },
+    }
+
+
+def _reset_peak():
+    # tracemalloc.reset_peak() is only available since Python 3.9.
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    else:
+        tracemalloc.clear_traces()
+
+# ======================================================================================================================
+#
+# Fixtures
+#
+# ======================================================================================================================
+
+
+def make_loop_points(num_points, spacing=POINT_SPACING):
+    """
+    Closed, slightly wavy loop of `num_points` world space points about
+    `spacing` apart, on the XZ plane.
+    """
+    radius = max(MIN_TRACK_RADIUS, num_points * spacing / (2.0 * math.pi))
+    angles = np.linspace(0.0, 2.0 * math.pi, num_points, endpoint=False)
+    r = radius * (1.0 + 0.05 * np.sin(5.0 * angles))
+    return np.stack([r * np.cos(angles), np.zeros(num_points), r * np.sin(angles)], axis=1)
+
+
+def make_fleet(geometry, fleet_size, lookahead_distance, close_loop=True):
+    """
+    PurePursuitScenario-s with KinematicVehicle-s spread evenly along the trajectory.
+    """
+    points = geometry.points
+    num_points = len(points)
+    scenarios = []
+    for i in range(fleet_size):
+        index = (i * num_points) // fleet_size
+        direction = points[(index + 1) % num_points] - points[index]
+        vehicle = KinematicVehicle(position=points[index], heading=math.atan2(direction[0], direction[2]))
+        scenarios.append(PurePursuitScenario(
+            lookahead_distance,
+            None,
+            geometry.prim_path,
+            0.01,
+            close_loop,
+            False,
+            vehicle=vehicle,
+            trajectory_geometry=geometry,
+            debug_renderer=NullDebugRenderer()
+        ))
+    return scenarios
+
+# ======================================================================================================================
+#
+# Benchmarks
+#
+# ======================================================================================================================
+
+
+def bench_path_tracker(fleet_size, num_steps, **kwargs):
+    """
+    Steering computation only: PurePursuitPathTracker.on_step for each vehicle.
+    """
+    rng = np.random.default_rng(0)
+    rear, front, dest = _random_tracking_input(rng, fleet_size)
+    forward = np.array([0.0, 0.0, 1.0])
+    tracker = PurePursuitPathTracker(math.pi / 4)
+
+    def step():
+        for i in range(fleet_size):
+            tracker.on_step(front[i], rear[i], forward, dest[i], rear[i])
+
+    return measure(step, num_steps, **kwargs)
+
+
+def bench_batch_path_tracker(fleet_size, num_steps, **kwargs):
+    """
+    Steering computation only: one BatchPurePursuitPathTracker.on_step for the fleet.
+    """
+    rng = np.random.default_rng(0)
+    rear, front, dest = _random_tracking_input(rng, fleet_size)
+    tracker = BatchPurePursuitPathTracker(math.pi / 4)
+
+    def step():
+        tracker.on_step(front, rear, dest)
+
+    return measure(step, num_steps, **kwargs)
+
+
+def _random_tracking_input(rng, fleet_size):
+    rear = rng.uniform(-1000.0, 1000.0, (fleet_size, 3))
+    heading = rng.uniform(-math.pi, math.pi, fleet_size)
+    front = rear + 300.0 * np.stack([np.sin(heading), np.zeros(fleet_size), np.cos(heading)], axis=1)
+    dest = rear + rng.uniform(-2000.0, 2000.0, (fleet_size, 3))
+    for positions in (rear, front, dest):
+        positions[:, 1] = 0.0
+    return rear, front, dest
+
+
+def bench_trajectory_load(trajectory_points, num_steps, **kwargs):
+    """
+    Building TrajectoryGeometry (arc length) and a Trajectory from world space points.
+    """
+    points = make_loop_points(trajectory_points)
+
+    def step():
+        geometry = TrajectoryGeometry("/Benchmark/Trajectory", points)
+        Trajectory(geometry.prim_path, True, geometry)
+
+    return measure(step, num_steps, **kwargs)
+
+
+def bench_trajectory_advance(trajectory_points, lookahead_distance, num_steps, speed=1000.0, **kwargs):
+    """
+    Lookahead point search of a point moving along the trajectory at `speed` units/sec, 60 steps/sec.
+    """
+    geometry = TrajectoryGeometry("/Benchmark/Trajectory", make_loop_points(trajectory_points))
+    trajectory = Trajectory(geometry.prim_path, True, geometry)
+    ds = speed / 60.0
+    state = {"s": 0.0}
+
+    def step():
+        state["s"] += ds
+        position = geometry.point_at(state["s"], True)
+        trajectory.find_lookahead_point(position, lookahead_distance)
+
+    return measure(step, num_steps, **kwargs)
+
+
+def bench_scenario_step(fleet_size, trajectory_points, lookahead_distance, num_steps, batched=False, **kwargs):
+    """
+    Full control loop step: pose update, lookahead search, steering, control
+    and vehicle dynamics, for a fleet sharing one trajectory.
+    """
+    geometry = TrajectoryGeometry("/Benchmark/Trajectory", make_loop_points(trajectory_points))
+    scenarios = make_fleet(geometry, fleet_size, lookahead_distance)
+    if batched:
+        scenarios = [PurePursuitFleetScenario(scenarios)]
+    simulation = HeadlessSimulation(scenarios)
+    simulation.start()
+    return measure(simulation.step, num_steps, **kwargs)
+
+# ======================================================================================================================
+#
+# Suite
+#
+# ======================================================================================================================
+
+
+def benchmark_cases(fleet_sizes, trajectory_points, lookahead_distances):
+    """
+    Yields `(name, benchmark, params)` of the suite. Full scenario steps are
+    run for every fleet size/trajectory length pair at the default (middle)
+    lookahead distance, and for every lookahead distance on the largest
+    fleet/trajectory.
+    """
+    default_lookahead = lookahead_distances[len(lookahead_distances) // 2]
+    for fleet_size in fleet_sizes:
+        yield "path_tracker.on_step", bench_path_tracker, {"fleet_size": fleet_size}
+        yield "batch_path_tracker.on_step", bench_batch_path_tracker, {"fleet_size": fleet_size}
+    for num_points in trajectory_points:
+        yield "trajectory.load", bench_trajectory_load, {"trajectory_points": num_points}
+        for lookahead_distance in lookahead_distances:
+            yield "trajectory.find_lookahead_point", bench_trajectory_advance, {
+                "trajectory_points": num_points, "lookahead_distance": lookahead_distance
+            }
+    for name, batched in (("scenario.step", False), ("fleet_scenario.step", True)):
+        for fleet_size in fleet_sizes:
+            for num_points in trajectory_points:
+                yield name, bench_scenario_step, {
+                    "fleet_size": fleet_size,
+                    "trajectory_points": num_points,
+                    "lookahead_distance": default_lookahead,
+                    "batched": batched,
+                }
+        for lookahead_distance in lookahead_distances:
+            if lookahead_distance != default_lookahead:
+                yield name, bench_scenario_step, {
+                    "fleet_size": fleet_sizes[-1],
+                    "trajectory_points": trajectory_points[-1],
+                    "lookahead_distance": lookahead_distance,
+                    "batched": batched,
+                }
+
+
+def run_suite(fleet_sizes, trajectory_points, lookahead_distances, num_steps, cases=None,
+              max_seconds=10.0, log=None):
+    """
+    Runs the benchmark suite and returns JSON serializable results.
+    `cases` optionally limits the run to benchmark names starting with any of the given prefixes.
+    """
+    results = []
+    for name, benchmark, params in benchmark_cases(fleet_sizes, trajectory_points, lookahead_distances):
+        if cases and not any(name.startswith(prefix) for prefix in cases):
+            continue
+        # Trajectory loading of long curves is slow, fewer repetitions keep the suite time bounded.
+        steps = num_steps if name != "trajectory.load" else max(10, num_steps // 10)
+        result = benchmark(num_steps=steps, max_seconds=max_seconds, **params)
+        record = {"name": name, "params": params}
+        record.update(result)
+        results.append(record)
+        if log is not None:
+            log(format_result(record))
+    return {
+        "format_version": BENCHMARK_FORMAT_VERSION,
+        "metadata": _metadata(),
+        "results": results,
+    }
+
+
+def _metadata():
+    metadata = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        metadata["commit"] = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        metadata["commit"] = None
+    return metadata
+
+
+def result_key(record):
+    return record["name"] + "(" + ", ".join(f"{k}={v}" for k, v in sorted(record["params"].items())) + ")"
+
+
+def format_result(record):
+    latency = record["latency_us"]
+    alloc = record["alloc_per_step"]
+    return (
+        f"{result_key(record):<100} {record['steps_per_sec']:>12.1f} steps/s"
+        f"  p50 {latency['p50']:>10.1f}us  p99 {latency['p99']:>10.1f}us"
+        f"  {alloc['peak_bytes']:>10.0f} B/step  {alloc['net_blocks']:>6.1f} blocks/step"
+    )
+
+
+def compare_results(baseline, current):
+    """
+    Returns `(key, baseline steps/sec, current steps/sec, speedup)` for benchmarks present in both runs.
+    """
+    baseline_results = {result_key(record): record for record in baseline["results"]}
+    comparison = []
+    for record in current["results"]:
+        key = result_key(record)
+        if key in baseline_results:
+            before = baseline_results[key]["steps_per_sec"]
+            after = record["steps_per_sec"]
+            comparison.append((key, before, after, after / before if before > 0.0 else float("inf")))
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Path tracking control loop benchmarks")
+    parser.add_argument("--preset", choices=sorted(PRESETS.keys()), default="quick")
+    parser.add_argument("--fleet-sizes", type=int, nargs="+", help="Overrides preset fleet sizes")
+    parser.add_argument("--trajectory-points", type=int, nargs="+", help="Overrides preset trajectory lengths")
+    parser.add_argument("--lookahead-distances", type=float, nargs="+", help="Overrides preset lookahead distances")
+    parser.add_argument("--steps", type=int, help="Overrides preset number of timed steps per benchmark")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="Time limit of timed steps per benchmark")
+    parser.add_argument("--cases", nargs="+", help="Only run benchmarks with names starting with these prefixes")
+    parser.add_argument("--output", help="Path of JSON file to write results to")
+    parser.add_argument("--compare", help="Path of JSON results of a previous run to compare against")
+    args = parser.parse_args(argv)
+
+    preset = PRESETS[args.preset]
+    results = run_suite(
+        args.fleet_sizes or preset["fleet_sizes"],
+        args.trajectory_points or preset["trajectory_points"],
+        args.lookahead_distances or preset["lookahead_distances"],
+        args.steps or preset["num_steps"],
+        cases=args.cases,
+        max_seconds=args.max_seconds,
+        log=print
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared to {baseline['metadata'].get('commit')}:")
+        for key, before, after, speedup in compare_results(baseline, results):
+            print(f"{key:<100} {before:>12.1f} -> {after:>12.1f} steps/s  x{speedup:.2f}")
+
+
+if __name__ == "__main__":
+    main()
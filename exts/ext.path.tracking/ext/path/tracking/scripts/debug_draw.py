@@ -1,49 +1,462 @@
-import carb
-from omni.debugdraw import get_debug_draw_interface
+try:
+    import omni.kit.app
+    import omni.usd
+    from pxr import Sdf, Usd, UsdGeom, Vt
+except ImportError:
+    # Kit and USD modules are not available when running headless (see headless.py).
+    pass
+
+import math
+import numpy as np
 
 """
-    Note: DebugRenderer relies on `omni.debugdraw` utility to optionally provide
-    a debug overlay with additional info regarding current state of vehicle,
-    path tracking destination etc.
-    Using omni.ui.scene would be more future proof as it will break
-    dependency on `omni.debugdraw` which may change or not guaranteed to be
-    kept in the future in Kit-based apps.
+    Note: DebugRenderer-s provide an optional debug overlay with additional
+    info regarding current state of vehicle, path tracking destination etc.
+
+    Scenarios only hand the latest vehicle state to their DebugRenderer-s
+    during physics steps. A shared DebugOverlay draws all of them on app
+    updates instead: line segments are rebuilt from the latest pose
+    snapshots at the overlay's refresh rate and written in bulk to a single
+    BasisCurves prim in the session layer (see DebugCurvesPrim), which
+    persists between frames and is rewritten only when the segments changed.
+    Per-line debug draw calls would cost a Python call per segment per frame.
 
 """
 
+# ======================================================================================================================
+#
+# DebugLineBatch
+#
+# ======================================================================================================================
+
+
+class DebugLineBatch():
+    """
+    Line segments collected into preallocated arrays, grown when full.
+    """
+
+    def __init__(self, capacity=1024):
+        self._count = 0
+        self._allocate(max(1, int(capacity)))
+
+    def _allocate(self, capacity):
+        starts = np.zeros((capacity, 3), dtype=np.float32)
+        ends = np.zeros((capacity, 3), dtype=np.float32)
+        colors = np.zeros(capacity, dtype=np.uint32)
+        widths = np.zeros(capacity, dtype=np.float32)
+        if self._count:
+            starts[:self._count] = self._starts[:self._count]
+            ends[:self._count] = self._ends[:self._count]
+            colors[:self._count] = self._colors[:self._count]
+            widths[:self._count] = self._widths[:self._count]
+        self._starts = starts
+        self._ends = ends
+        self._colors = colors
+        self._widths = widths
+
+    def _reserve(self, num_lines):
+        required = self._count + num_lines
+        capacity = len(self._starts)
+        if required > capacity:
+            while capacity < required:
+                capacity *= 2
+            self._allocate(capacity)
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def capacity(self):
+        return len(self._starts)
+
+    def add_line(self, start, end, color, width):
+        if self._count == len(self._starts):
+            self._allocate(2 * len(self._starts))
+        i = self._count
+        self._starts[i] = start
+        self._ends[i] = end
+        self._colors[i] = color
+        self._widths[i] = width
+        self._count = i + 1
+
+    def add_lines(self, starts, ends, color, width):
+        """
+        Adds (N,3) arrays of segment start and end points, with either the
+        same color and width or (N,) arrays of them.
+        """
+        num_lines = len(starts)
+        self._reserve(num_lines)
+        i = self._count
+        self._starts[i:i + num_lines] = starts
+        self._ends[i:i + num_lines] = ends
+        self._colors[i:i + num_lines] = color
+        self._widths[i:i + num_lines] = width
+        self._count = i + num_lines
+
+    def lines(self):
+        """
+        Views of `(starts, ends, colors, widths)` of the collected segments, valid until clear().
+        """
+        count = self._count
+        return self._starts[:count], self._ends[:count], self._colors[:count], self._widths[:count]
+
+    def clear(self):
+        self._count = 0
+
+# ======================================================================================================================
+#
+# TrackPolyline
+#
+# ======================================================================================================================
+
+
+class TrackPolyline():
+    """
+    Segments of a trajectory overlay, built once per TrajectoryGeometry.
+    Long curves are decimated to at most `max_segments` segments.
+    """
+
+    def __init__(self, geometry, close_loop, max_segments):
+        self.geometry = geometry
+        self.close_loop = close_loop
+        self.max_segments = max_segments
+        points = geometry.points
+        stride = max(1, int(math.ceil(len(points) / max(1, max_segments))))
+        indices = np.arange(0, len(points), stride)
+        if len(points) and indices[-1] != len(points) - 1:
+            indices = np.append(indices, len(points) - 1)
+        if close_loop and len(points) > 2:
+            indices = np.append(indices, 0)
+        vertices = points[indices].astype(np.float32)
+        self.starts = vertices[:-1]
+        self.ends = vertices[1:]
+
+    @property
+    def num_segments(self):
+        return len(self.starts)
+
+# ======================================================================================================================
+#
+# DebugCurvesPrim
+#
+# ======================================================================================================================
+
+
+class DebugCurvesPrim():
+    """
+    Linear BasisCurves prim in the session layer of the current stage, with
+    one two-point curve per overlay segment. Points, colors and widths are
+    written as whole arrays, and not at all if the segments did not change.
+    Colors are 0xAARRGGBB, widths are scaled to stage units by `width_scale`.
+    """
+
+    def __init__(self, prim_path="/DebugOverlay", width_scale=2.0):
+        self._prim_path = prim_path
+        self.width_scale = width_scale
+        self._stage = None
+        self._curves = None
+        # Segments written last, compared against to skip unchanged writes.
+        self._lines = DebugLineBatch()
+        self._num_curves = -1
+        self._points = np.zeros((0, 3), dtype=np.float32)
+
+    def _get_curves(self, stage):
+        if stage != self._stage or not self._is_valid():
+            with Usd.EditContext(stage, stage.GetSessionLayer()):
+                curves = UsdGeom.BasisCurves.Define(stage, self._prim_path)
+                curves.CreateTypeAttr(UsdGeom.Tokens.linear)
+                curves.CreateDisplayColorPrimvar(UsdGeom.Tokens.vertex)
+                curves.CreateDisplayOpacityPrimvar(UsdGeom.Tokens.vertex)
+                curves.SetWidthsInterpolation(UsdGeom.Tokens.vertex)
+            self._stage = stage
+            self._curves = curves
+            self._lines.clear()
+            self._num_curves = -1
+        return self._curves
+
+    def _is_valid(self):
+        return self._curves is not None and self._curves.GetPrim().IsValid()
+
+    def set_lines(self, starts, ends, colors, widths):
+        """
+        Shows the given segments (see DebugLineBatch.lines()) until the next call.
+        """
+        lines = self._lines
+        count = len(starts)
+        if count == 0 and self._curves is None:
+            # Nothing was shown yet.
+            return
+        if (self._num_curves == count and count == lines.count and self._is_valid()
+                and all(np.array_equal(a, b) for a, b in zip(lines.lines(), (starts, ends, colors, widths)))):
+            return
+        stage = omni.usd.get_context().get_stage()
+        if stage is None:
+            return
+        curves = self._get_curves(stage)
+        lines.clear()
+        lines.add_lines(starts, ends, colors, widths)
+
+        if len(self._points) < 2 * count:
+            self._points = np.zeros((2 * lines.capacity, 3), dtype=np.float32)
+        points = self._points[:2 * count]
+        points[0::2] = starts
+        points[1::2] = ends
+        argb = np.repeat(colors, 2)
+        channels = np.stack([(argb >> 16) & 0xFF, (argb >> 8) & 0xFF, argb & 0xFF], axis=1)
+
+        with Usd.EditContext(stage, stage.GetSessionLayer()), Sdf.ChangeBlock():
+            if self._num_curves != count:
+                curves.GetCurveVertexCountsAttr().Set(Vt.IntArray.FromNumpy(np.full(count, 2, dtype=np.int32)))
+                self._num_curves = count
+            curves.GetPointsAttr().Set(Vt.Vec3fArray.FromNumpy(points))
+            curves.GetWidthsAttr().Set(Vt.FloatArray.FromNumpy(np.repeat(widths * self.width_scale, 2)))
+            curves.GetDisplayColorPrimvar().Set(
+                Vt.Vec3fArray.FromNumpy(channels.astype(np.float32) * np.float32(1.0 / 255.0))
+            )
+            curves.GetDisplayOpacityPrimvar().Set(
+                Vt.FloatArray.FromNumpy(((argb >> 24) & 0xFF).astype(np.float32) * np.float32(1.0 / 255.0))
+            )
+
+    def clear(self):
+        empty = np.zeros((0, 3), dtype=np.float32)
+        self.set_lines(empty, empty, np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.float32))
+
+    def remove(self):
+        """
+        Removes the prim from the session layer of the stage it was created in.
+        """
+        if self._stage is not None and self._is_valid():
+            with Usd.EditContext(self._stage, self._stage.GetSessionLayer()):
+                self._stage.RemovePrim(self._prim_path)
+        self._stage = None
+        self._curves = None
+        self._lines.clear()
+        self._num_curves = -1
+
+# ======================================================================================================================
+#
+# DebugOverlay
+#
+# ======================================================================================================================
+
+
+class DebugOverlay():
+    """
+    Debug overlay of a fleet, drawn on app updates (see subscribe()) rather
+    than on physics steps. Segments of registered DebugRenderer-s are rebuilt
+    at most `refresh_rate` times per second and handed at once to the target
+    (a DebugCurvesPrim by default) by submit(), at most `max_segments` of them.
+    Trajectory overlays are cached per curve and rebuilt only when the curve geometry changes.
+    """
+
+    def __init__(self, max_track_segments=2000, target=None, refresh_rate=30.0, max_segments=65536):
+        self._lines = DebugLineBatch()
+        self._max_track_segments = max_track_segments
+        # TrackPolyline-s keyed by curve prim path.
+        self._tracks = {}
+        # Curves already added to the current frame, e.g. by another vehicle tracking the same curve.
+        self._frame_tracks = set()
+        self._target = target
+        self.max_segments = max_segments
+        # Segments were rebuilt since the last submit().
+        self._changed = False
+        self.track_color = 0xFFFFA500
+        self.track_width = 2.0
+        self._renderers = []
+        self._refresh_period = 0.0
+        self.set_refresh_rate(refresh_rate)
+        # Time since the last refresh, the first update always refreshes.
+        self._since_refresh = math.inf
+        self._update_sub = None
+
+    @property
+    def lines(self):
+        return self._lines
+
+    def set_max_track_segments(self, max_segments):
+        self._max_track_segments = max(1, int(max_segments))
+
+    def set_refresh_rate(self, rate):
+        """
+        Max number of overlay rebuilds per second, every app update if not positive.
+        """
+        self._refresh_period = 1.0 / rate if rate > 0.0 else 0.0
+
+    def add_renderer(self, renderer):
+        self._renderers.append(renderer)
+
+    def remove_renderer(self, renderer):
+        if renderer in self._renderers:
+            self._renderers.remove(renderer)
+
+    def clear_renderers(self):
+        self._renderers.clear()
+        self.clear()
+
+    def add_line(self, start, end, color, width):
+        self._lines.add_line(start, end, color, width)
+        self._changed = True
+
+    def add_lines(self, starts, ends, color, width):
+        self._lines.add_lines(starts, ends, color, width)
+        self._changed = True
+
+    def add_track(self, geometry, close_loop):
+        prim_path = geometry.prim_path
+        if prim_path in self._frame_tracks:
+            return
+        polyline = self._tracks.get(prim_path)
+        if (polyline is None or polyline.geometry is not geometry or polyline.close_loop != close_loop
+                or polyline.max_segments != self._max_track_segments):
+            polyline = TrackPolyline(geometry, close_loop, self._max_track_segments)
+            self._tracks[prim_path] = polyline
+        self._lines.add_lines(polyline.starts, polyline.ends, self.track_color, self.track_width)
+        self._frame_tracks.add(prim_path)
+        self._changed = True
+
+    def clear_tracks(self):
+        """
+        Drops cached trajectory overlays, e.g. when the tracked curves are no longer attached.
+        """
+        self._tracks.clear()
+
+    def refresh(self):
+        """
+        Rebuilds segments of all the registered renderers.
+        """
+        self.clear()
+        for renderer in self._renderers:
+            renderer.draw(self)
+        self._since_refresh = 0.0
+        self._changed = True
+
+    def submit(self):
+        """
+        Hands the segments built by the last refresh() to the target, if not handed over yet.
+        """
+        if not self._changed:
+            return
+        if self._target is None:
+            self._target = DebugCurvesPrim()
+        count = min(self._lines.count, self.max_segments)
+        starts, ends, colors, widths = self._lines.lines()
+        self._target.set_lines(starts[:count], ends[:count], colors[:count], widths[:count])
+        self._changed = False
+
+    def on_update(self, dt):
+        self._since_refresh += dt
+        if self._since_refresh >= self._refresh_period:
+            self.refresh()
+        self.submit()
+
+    def subscribe(self):
+        """
+        Draws the overlay on every app update until unsubscribe().
+        """
+        if self._update_sub is None:
+            update_stream = omni.kit.app.get_app().get_update_event_stream()
+            self._update_sub = update_stream.create_subscription_to_pop(
+                self._on_update_event, name="ext.path.tracking debug overlay"
+            )
+
+    def unsubscribe(self):
+        """
+        Stops drawing on app updates and removes the overlay prim.
+        """
+        self._update_sub = None
+        if self._target is not None:
+            self._target.remove()
+
+    def _on_update_event(self, event):
+        self.on_update(event.payload["dt"])
+
+    def clear(self):
+        self._lines.clear()
+        self._frame_tracks.clear()
+        self._changed = True
+
+
+_debug_overlay = DebugOverlay()
+
+
+def get_debug_overlay():
+    """
+    Returns the process-wide DebugOverlay used by the extension.
+    """
+    return _debug_overlay
+
+# ======================================================================================================================
+#
+# DebugRenderer
+#
+# ======================================================================================================================
+
 
 class DebugRenderer():
+    """
+    Debug overlay of a single vehicle. Keeps the latest vehicle state handed
+    over by its scenario and draws it into a DebugOverlay it is registered to.
+    """
+
     def __init__(self, vehicle_bbox_size):
-        self._debug_draw = get_debug_draw_interface()
         self._curr_time = 0.0
         self._color = 0x60FF0000
         self._line_thickness = 2.0
         self._size = max(vehicle_bbox_size)
         self._enabled = True
-        # update_stream = omni.kit.app.get_app().get_update_event_stream()
-        # self._update_sub = update_stream.create_subscription_to_pop(self._on_update, name="omni.physx update")
-
-    def _draw_segment(self, start, end, color, thickness):
-        self._debug_draw.draw_line(
-            carb.Float3(start[0], start[1], start[2]),
-            color, thickness,
-            carb.Float3(end[0], end[1], end[2]),
-            color, thickness
-        )
+        # Latest state, None until handed over by the scenario.
+        self._vehicle = None
+        self._dest_pos = None
+        self._path_tracking = None
+        self._trajectory = None
+        self._close_loop = False
 
     def update_path_tracking(self, front_axle_pos, rear_axle_pos, forward, dest_pos):
-        if not self._enabled:
-            return
-        color = 0xFF222222
-        thickness = 10.0
-        self._draw_segment(rear_axle_pos, dest_pos, color, thickness)
-        color = 0xFF00FA9A
-        self._draw_segment(rear_axle_pos, front_axle_pos, color, thickness)
+        self._path_tracking = (front_axle_pos, rear_axle_pos, dest_pos)
 
     def update_vehicle(self, vehicle):
-        if not self._enabled:
+        """
+        Draws the vehicle from its latest pose snapshot (see Vehicle.update_pose()).
+        """
+        self._vehicle = vehicle
+
+    def update_path_to_dest(self, vehicle_pos, dest_pos):
+        self._dest_pos = dest_pos
+
+    def update_track(self, trajectory, close_loop):
+        """
+        Draws the tracked trajectory, or stops drawing it if None.
+        """
+        self._trajectory = trajectory
+        self._close_loop = close_loop
+
+    def clear(self):
+        """
+        Forgets the vehicle state, e.g. when its scenario stops.
+        """
+        self._vehicle = None
+        self._dest_pos = None
+        self._path_tracking = None
+        self._trajectory = None
+
+    def enable(self, value):
+        self._enabled = value
+
+    def draw(self, overlay):
+        if not self._enabled or self._vehicle is None:
             return
+        if self._trajectory is not None:
+            overlay.add_track(self._trajectory.geometry, self._close_loop)
+        self._draw_vehicle(overlay, self._vehicle)
+        if self._dest_pos is not None:
+            overlay.add_line(self._vehicle.curr_position(), self._dest_pos, self._color, self._line_thickness)
+        if self._path_tracking is not None:
+            front_axle_pos, rear_axle_pos, dest_pos = self._path_tracking
+            overlay.add_line(rear_axle_pos, dest_pos, 0xFF222222, 10.0)
+            overlay.add_line(rear_axle_pos, front_axle_pos, 0xFF00FA9A, 10.0)
 
+    def _draw_vehicle(self, overlay, vehicle):
         curr_vehicle_pos = vehicle.curr_position()
         forward = vehicle.forward()
         up = vehicle.up()
@@ -56,17 +469,15 @@ class DebugRenderer():
         s = self._size / 2
 
         # Draw forward
-        self._debug_draw.draw_line(
-            carb.Float3(x, y, z),
-            0xFF0000FF, t,
-            carb.Float3(x + s * forward[0], y + s * forward[1], z + s * forward[2]),
+        overlay.add_line(
+            (x, y, z),
+            (x + s * forward[0], y + s * forward[1], z + s * forward[2]),
             0xFF0000FF, t
         )
         # Draw up
-        self._debug_draw.draw_line(
-            carb.Float3(x, y, z),
-            0xFF00FF00, t,
-            carb.Float3(x + s * up[0], y + s * up[1], z + s * up[2]),
+        overlay.add_line(
+            (x, y, z),
+            (x + s * up[0], y + s * up[1], z + s * up[2]),
             0xFF00FF00, t
         )
 
@@ -76,44 +487,16 @@ class DebugRenderer():
         # af = vehicle.axle_front()
         # ar = vehicle.axle_rear()
         # axle_color = 0xFF8A2BE2
-        # self._debug_draw.draw_line(
-        #     carb.Float3(af[0], af[1], af[2]),
-        #     axle_color, t*4,
-        #     carb.Float3(ar[0], ar[1], ar[2]),
-        #     axle_color, t*4
-        # )
+        # overlay.add_line(af, ar, axle_color, t*4)
 
         # Draw front axle
         # fl = vehicle.wheel_pos_front_left()
         # fr = vehicle.wheel_pos_front_right()
         # front_axle_color = 0xFFFF0000
-        # self._debug_draw.draw_line(
-        #     carb.Float3(fl[0], fl[1], fl[2]),
-        #     front_axle_color, t*2,
-        #     carb.Float3(fr[0], fr[1], fr[2]),
-        #     front_axle_color, t*2
-        # )
+        # overlay.add_line(fl, fr, front_axle_color, t*2)
 
         # Draw rear axle
         # rl = vehicle.wheel_pos_rear_left()
         # rr = vehicle.wheel_pos_rear_right()
         # rear_axle_color = 0xFFAAAAAA
-
-        # self._debug_draw.draw_line(
-        #     carb.Float3(rl[0], rl[1], rl[2]),
-        #     rear_axle_color, t*2,
-        #     carb.Float3(rr[0], rr[1], rr[2]),
-        #     rear_axle_color, t*2
-        # )
-
-    def update_path_to_dest(self, vehicle_pos, dest_pos):
-        if not self._enabled:
-            return
-        if dest_pos:
-            self._debug_draw.draw_line(
-                carb.Float3(vehicle_pos[0], vehicle_pos[1], vehicle_pos[2]), self._color, self._line_thickness,
-                carb.Float3(dest_pos[0], dest_pos[1], dest_pos[2]), self._color, self._line_thickness
-            )
-
-    def enable(self, value):
-        self._enabled = value
+        # overlay.add_line(rl, rr, rear_axle_color, t*2)
@@ -2,6 +2,8 @@ import omni.ext
 import omni.kit
 import omni.usd
 import carb
+import carb.settings
+from pxr import Tf, Usd
 
 import asyncio
 
@@ -17,6 +19,9 @@ from .ui import ExtensionUI
 
 class PathTrackingExtension(omni.ext.IExt):
 
+    SETTING_PROFILING_ENABLED = "/exts/ext.path.tracking/profiling/enabled"
+    SETTING_DEBUG_REFRESH_RATE = "/exts/ext.path.tracking/debug/refreshRate"
+
     def __init__(self):
         self._DEFAULT_LOOKAHEAD = 550.0
         # Any user-defined changes to the lookahead parameter will be clamped:
@@ -28,10 +33,6 @@ class PathTrackingExtension(omni.ext.IExt):
             # Workaround for running within test environment.
             omni.usd.get_context().new_stage()
 
-        # Usd listener could be used in the future if we could be interested
-        # in recomputing changes in the vehicle planned trajectory "on the fly".
-        # self._usd_listener = Tf.Notice.Register(Usd.Notice.ObjectsChanged, self._on_usd_change, None)
-
         self._stage_event_sub = omni.usd.get_context().get_stage_event_stream().create_subscription_to_pop(
             self._on_stage_event, name="Stage Open/Closing Listening"
         )
@@ -45,6 +46,21 @@ class PathTrackingExtension(omni.ext.IExt):
         self._ui = ExtensionUI(self)
         self._ui.build_ui(self._model.get_lookahead_distance(), attachments=[])
 
+        # Usd listener keeps USD data cached by running scenarios (e.g. vehicle wheel offsets) up to date.
+        self._usd_listener = None
+        self._register_usd_listener()
+
+        # Step timings instrumentation is switched on/off through a carb setting.
+        self._settings = carb.settings.get_settings()
+        self._model.set_enable_profiling(self._settings.get_as_bool(self.SETTING_PROFILING_ENABLED))
+        self._profiling_setting_sub = self._settings.subscribe_to_node_change_events(
+            self.SETTING_PROFILING_ENABLED, self._on_profiling_setting_changed
+        )
+        self._model.set_debug_refresh_rate(self._settings.get_as_float(self.SETTING_DEBUG_REFRESH_RATE))
+        self._debug_refresh_rate_setting_sub = self._settings.subscribe_to_node_change_events(
+            self.SETTING_DEBUG_REFRESH_RATE, self._on_debug_refresh_rate_setting_changed
+        )
+
     def on_shutdown(self):
         timeline = omni.timeline.get_timeline_interface()
         if timeline.is_playing():
@@ -52,14 +68,28 @@ class PathTrackingExtension(omni.ext.IExt):
 
         self._clear_attachments()
 
+        if self._usd_listener is not None:
+            self._usd_listener.Revoke()
         self._usd_listener = None
         self._stage_event_sub = None
 
+        self._settings.unsubscribe_to_change_events(self._profiling_setting_sub)
+        self._profiling_setting_sub = None
+        self._settings.unsubscribe_to_change_events(self._debug_refresh_rate_setting_sub)
+        self._debug_refresh_rate_setting_sub = None
+        self._settings = None
+
         self._ui.teardown()
         self._ui = None
         self._model.teardown()
         self._model = None
 
+    def _register_usd_listener(self):
+        if self._usd_listener is not None:
+            self._usd_listener.Revoke()
+        stage = omni.usd.get_context().get_stage()
+        self._usd_listener = Tf.Notice.Register(Usd.Notice.ObjectsChanged, self._on_usd_change, stage)
+
     def _update_ui(self):
         self._ui.update_attachment_info(self._model._vehicle_to_curve_attachments.keys())
 
@@ -104,7 +134,17 @@ class PathTrackingExtension(omni.ext.IExt):
 
     def _on_click_attach_selected(self):
         selected_prim_paths = omni.usd.get_context().get_selection().get_selected_prim_paths()
-        self._model.attach_selected_prims(selected_prim_paths)
+        try:
+            self._model.attach_selected_prims(selected_prim_paths)
+        except ValueError as e:
+            carb.log_error(str(e))
+        self._update_ui()
+
+    def _on_click_attach_from_file(self):
+        try:
+            self._model.attach_from_file(self._ui.get_attachments_file_path())
+        except (OSError, ValueError) as e:
+            carb.log_error(str(e))
         self._update_ui()
 
     def _clear_attachments(self):
@@ -132,15 +172,24 @@ class PathTrackingExtension(omni.ext.IExt):
         if event.type == int(omni.usd.StageEventType.CLOSING):
             self._model.clear_attachments()
             self._update_ui()
+        elif event.type == int(omni.usd.StageEventType.OPENED):
+            self._register_usd_listener()
 
     def _on_usd_change(self, objects_changed, stage):
-        carb.log_info("_on_usd_change")
-        for resync_path in objects_changed.GetResyncedPaths():
-            carb.log_info(resync_path)
+        self._model.on_usd_objects_changed(objects_changed)
+
+    def _on_profiling_setting_changed(self, item, event_type):
+        self._model.set_enable_profiling(self._settings.get_as_bool(self.SETTING_PROFILING_ENABLED))
+
+    def _on_debug_refresh_rate_setting_changed(self, item, event_type):
+        self._model.set_debug_refresh_rate(self._settings.get_as_float(self.SETTING_DEBUG_REFRESH_RATE))
 
     def _changed_enable_debug(self, model):
         self._model.set_enable_debug(model.as_bool)
 
+    def _changed_draw_tracks(self, model):
+        self._model.set_draw_tracks(model.as_bool)
+
     def _on_lookahead_distance_changed(self, distance):
         # self._clear_attachments()
         clamped_lookahead_distance = self._model.update_lookahead_distance(distance)
@@ -0,0 +1,150 @@
+try:
+    from pxr import Sdf, Usd
+except ImportError:
+    # Kit and USD modules are not available when running headless (see headless.py).
+    pass
+
+import math
+import numpy as np
+
+"""
+    Note: a fleet is spawned from a single vehicle template. Every vehicle
+    is an Xform referencing the template, with an override of its vehicle
+    prim's translate and rotation, so only a few specs per vehicle are
+    authored no matter how complex the template is. All of them are written
+    in one Sdf.ChangeBlock, hence the stage recomposes once per fleet.
+    The template is expected to be under a class prim (not simulated), and
+    relationships of shared vehicle data to template prims (e.g. collision
+    group includes) are extended to every spawned vehicle.
+
+"""
+
+# Name of the vehicle prim under a WizardVehicle Xform.
+_VEHICLE_PRIM_NAME = "Vehicle"
+
+# ======================================================================================================================
+#
+# curve_placements
+#
+# ======================================================================================================================
+
+
+def curve_placements(geometry, count, spacing=None, start_distance=0.0, close_loop=False):
+    """
+    Positions (count, 3) and headings (count,) of vehicles placed along a
+    TrajectoryGeometry every `spacing` stage units, starting at
+    `start_distance`, facing along the curve. Vehicles are evenly
+    distributed over the whole curve if `spacing` is None.
+    """
+    positions = np.zeros((count, 3))
+    headings = np.zeros(count)
+    if count == 0 or geometry.num_points == 0:
+        return positions, headings
+    length = geometry.loop_length if close_loop else geometry.length
+    if spacing is None:
+        spacing = length / count
+    # Tangent is estimated from points slightly behind and ahead of the placement.
+    delta = max(length, 1.0) * 1e-3
+    for i in range(count):
+        s = start_distance + i * spacing
+        positions[i] = geometry.point_at(s, close_loop)
+        direction = geometry.point_at(s + delta, close_loop) - geometry.point_at(s - delta, close_loop)
+        # Y-up, vehicles face +Z at zero heading.
+        headings[i] = math.atan2(direction[0], direction[2])
+    return positions, headings
+
+# ======================================================================================================================
+#
+# spawn_fleet
+#
+# ======================================================================================================================
+
+
+def spawn_fleet(stage, template_path, positions, headings, fleet_path, shared_path=None, name="WizardVehicle"):
+    """
+    Authors one vehicle referencing the WizardVehicle Xform at `template_path`
+    for every position/heading, as children of `fleet_path`. Heights of the
+    positions are offsets from the height of the template vehicle.
+    Returns prim paths of the spawned WizardVehicle Xforms.
+    """
+    template_path = Sdf.Path(template_path)
+    fleet_path = Sdf.Path(fleet_path)
+    template_vehicle_path = template_path.AppendChild(_VEHICLE_PRIM_NAME)
+    template_vehicle = stage.GetPrimAtPath(template_vehicle_path)
+    translate = template_vehicle.GetAttribute("xformOp:translate") if template_vehicle else None
+    rotation = template_vehicle.GetAttribute("xformOp:orient") if template_vehicle else None
+    if template_vehicle and not rotation:
+        rotation = template_vehicle.GetAttribute("xformOp:rotateXYZ")
+    if not translate or not rotation:
+        raise ValueError(f"[spawn_fleet] {template_vehicle_path} has no translate/rotation xform ops")
+
+    translate_type = translate.GetTypeName()
+    rotation_type = rotation.GetTypeName()
+    template_position = translate.Get()
+    template_rotation = rotation.Get()
+    vehicle_paths = [fleet_path.AppendChild(f"{name}_{i:03d}") for i in range(len(positions))]
+    remapped_targets = _remap_shared_targets(stage, shared_path, template_path, vehicle_paths)
+
+    layer = stage.GetEditTarget().GetLayer()
+    with Sdf.ChangeBlock():
+        fleet_spec = Sdf.CreatePrimInLayer(layer, fleet_path)
+        fleet_spec.specifier = Sdf.SpecifierDef
+        if not fleet_spec.typeName:
+            fleet_spec.typeName = "Xform"
+
+        for vehicle_path, position, heading in zip(vehicle_paths, positions, headings):
+            vehicle_spec = Sdf.CreatePrimInLayer(layer, vehicle_path)
+            vehicle_spec.specifier = Sdf.SpecifierDef
+            vehicle_spec.typeName = "Xform"
+            vehicle_spec.referenceList.Prepend(Sdf.Reference("", template_path))
+
+            # The vehicle prim itself is moved, as physics and steppers read its local translate as world position.
+            override_spec = Sdf.CreatePrimInLayer(layer, vehicle_path.AppendChild(_VEHICLE_PRIM_NAME))
+            translate_spec = Sdf.AttributeSpec(override_spec, "xformOp:translate", translate_type)
+            translate_spec.default = translate_type.type.pythonClass(
+                position[0], template_position[1] + position[1], position[2]
+            )
+            rotation_spec = Sdf.AttributeSpec(override_spec, rotation.GetName(), rotation_type)
+            if rotation.GetName() == "xformOp:orient":
+                quat_type = rotation_type.type.pythonClass
+                half = 0.5 * heading
+                rotation_spec.default = quat_type(math.cos(half), 0.0, math.sin(half), 0.0) * template_rotation
+            else:
+                rotation_spec.default = rotation_type.type.pythonClass(
+                    template_rotation[0], template_rotation[1] + math.degrees(heading), template_rotation[2]
+                )
+
+        for relationship_path, targets in remapped_targets:
+            relationship_spec = layer.GetRelationshipAtPath(relationship_path)
+            if relationship_spec is None:
+                prim_spec = Sdf.CreatePrimInLayer(layer, relationship_path.GetPrimPath())
+                relationship_spec = Sdf.RelationshipSpec(prim_spec, relationship_path.name, False)
+            for target in targets:
+                relationship_spec.targetPathList.Append(target)
+
+    return [str(path) for path in vehicle_paths]
+
+
+def _remap_shared_targets(stage, shared_path, template_path, vehicle_paths):
+    """
+    Relationships of prims under `shared_path` targeting the template, with
+    the targets of every vehicle to add to them.
+    """
+    if shared_path is None:
+        return []
+    shared_prim = stage.GetPrimAtPath(shared_path)
+    if not shared_prim:
+        return []
+    remapped = []
+    for prim in Usd.PrimRange(shared_prim):
+        for relationship in prim.GetRelationships():
+            template_targets = [target for target in relationship.GetTargets() if target.HasPrefix(template_path)]
+            if not template_targets:
+                continue
+            targets = [
+                target.ReplacePrefix(template_path, vehicle_path)
+                for vehicle_path in vehicle_paths
+                for target in template_targets
+            ]
+            remapped.append((relationship.GetPath(), targets))
+    return remapped
@@ -0,0 +1,341 @@
+import math
+import numpy as np
+
+from .path_tracker import PurePursuitFleetScenario, PurePursuitScenario
+from .stepper import ControlScheduler
+from .trajectory import TrajectoryGeometry
+from .vehicle import Axle, ControlInput, VehiclePose
+
+"""
+    Note: modules in this file allow running PurePursuitScenario and
+    PurePursuitPathTracker outside of Kit (e.g. for tuning and regression runs),
+    with a kinematic bicycle model in place of a PhysX vehicle driving USD prims.
+    Only NumPy is required.
+
+"""
+
+# ======================================================================================================================
+#
+# KinematicVehicle
+#
+# ======================================================================================================================
+
+
+class KinematicVehicle():
+    """
+    Kinematic bicycle model of a vehicle with the same interface as Vehicle.
+    Y-axis is up and the vehicle moves along its local Z-axis, as the PhysX
+    vehicles used by the extension do. Lengths are in stage units per second.
+    """
+
+    def __init__(self, position=(0.0, 0.0, 0.0), heading=0.0, wheelbase=300.0,
+                 max_steer_angle_radians=math.pi / 3, max_acceleration=500.0, max_deceleration=1500.0,
+                 max_speed=2000.0, drag=0.1, bbox_size=(200.0, 200.0, 450.0)):
+        self._position = np.array(position, dtype=np.float64)
+        # Rotation around Y-axis, zero heading faces +Z.
+        self._heading = float(heading)
+        self._speed = 0.0
+        self._wheelbase = wheelbase
+        self._max_steer_angle_radians = max_steer_angle_radians
+        self._max_acceleration = max_acceleration
+        self._max_deceleration = max_deceleration
+        self._max_speed = max_speed
+        self._drag = drag
+        self._bbox_size = np.array(bbox_size, dtype=np.float64)
+        self._controls = np.zeros(len(ControlInput))
+        self._control_writes_issued = 0
+        self._pose = None
+        self._transform_evaluations = 0
+
+    # Control inputs
+
+    def steer_left(self, value):
+        self._set_control(ControlInput.STEER_LEFT, value)
+        self._set_control(ControlInput.STEER_RIGHT, 0.0)
+
+    def steer_right(self, value):
+        self._set_control(ControlInput.STEER_LEFT, 0.0)
+        self._set_control(ControlInput.STEER_RIGHT, value)
+
+    def accelerate(self, value):
+        self._set_control(ControlInput.ACCELERATOR, value)
+
+    def brake(self, value):
+        self._set_control(ControlInput.BRAKE, value)
+
+    def _set_control(self, control_input, value):
+        self._controls[control_input] = value
+        self._control_writes_issued += 1
+
+    def get_controls(self):
+        """
+        Current control inputs indexed by ControlInput.
+        """
+        return self._controls
+
+    def reset_control_cache(self):
+        pass
+
+    def set_control_committer(self, committer):
+        pass
+
+    def get_control_write_stats(self):
+        return self._control_writes_issued, 0
+
+    # Dynamics
+
+    def step(self, dt):
+        """
+        Integrates vehicle state over a time step with the current control inputs.
+        """
+        steer = self._controls[ControlInput.STEER_LEFT] - self._controls[ControlInput.STEER_RIGHT]
+        steer_angle = steer * self._max_steer_angle_radians
+        acceleration = (
+            self._controls[ControlInput.ACCELERATOR] * self._max_acceleration
+            - self._controls[ControlInput.BRAKE] * self._max_deceleration
+            - self._drag * self._speed
+        )
+        self._speed = min(max(self._speed + acceleration * dt, 0.0), self._max_speed)
+
+        # Rear axle is the reference point of the bicycle model.
+        half_wheelbase = 0.5 * self._wheelbase
+        sin_heading = math.sin(self._heading)
+        cos_heading = math.cos(self._heading)
+        rear_x = self._position[0] - half_wheelbase * sin_heading
+        rear_z = self._position[2] - half_wheelbase * cos_heading
+        rear_x += self._speed * sin_heading * dt
+        rear_z += self._speed * cos_heading * dt
+        # Positive steering turns left, i.e. towards +X when facing +Z.
+        self._heading += self._speed / self._wheelbase * math.tan(steer_angle) * dt
+        self._position[0] = rear_x + half_wheelbase * math.sin(self._heading)
+        self._position[2] = rear_z + half_wheelbase * math.cos(self._heading)
+        self._pose = None
+
+    def set_state(self, position, heading, speed=0.0):
+        self._position[:] = position
+        self._heading = float(heading)
+        self._speed = float(speed)
+        self._pose = None
+
+    # Pose
+
+    def update_pose(self):
+        self._transform_evaluations = 1
+        sin_heading = math.sin(self._heading)
+        cos_heading = math.cos(self._heading)
+        # Row-vector convention as in Gf: p' = p * T
+        rotation = np.array([
+            [cos_heading, 0.0, -sin_heading, 0.0],
+            [0.0, 1.0, 0.0, 0.0],
+            [sin_heading, 0.0, cos_heading, 0.0],
+            [0.0, 0.0, 0.0, 1.0]
+        ])
+        transform = rotation.copy()
+        transform[3, :3] = self._position
+        forward = rotation[2, :3]
+        half_wheelbase = 0.5 * self._wheelbase
+        axle_positions = np.empty((len(Axle), 3))
+        axle_positions[Axle.FRONT] = self._position + half_wheelbase * forward
+        axle_positions[Axle.REAR] = self._position - half_wheelbase * forward
+        self._pose = VehiclePose(
+            transform=transform,
+            rotation=rotation,
+            position=self._position.copy(),
+            forward=forward.copy(),
+            up=rotation[1, :3].copy(),
+            axle_positions=axle_positions
+        )
+        return self._pose
+
+    def pose(self):
+        if self._pose is None:
+            return self.update_pose()
+        return self._pose
+
+    def get_transform_evaluations(self):
+        return self._transform_evaluations
+
+    def curr_position(self):
+        return self.pose().position.copy()
+
+    def forward(self):
+        return self.pose().forward.copy()
+
+    def up(self):
+        return self.pose().up.copy()
+
+    def axle_position(self, type):
+        if type == Axle.FRONT or type == Axle.REAR:
+            return self.pose().axle_positions[type].copy()
+        return None
+
+    def axle_front(self):
+        return self.axle_position(Axle.FRONT)
+
+    def axle_rear(self):
+        return self.axle_position(Axle.REAR)
+
+    def rotation_matrix(self):
+        return self.pose().rotation.copy()
+
+    def get_velocity(self):
+        return self._speed * np.array([math.sin(self._heading), 0.0, math.cos(self._heading)])
+
+    def get_speed(self):
+        return self._speed
+
+    def get_heading(self):
+        return self._heading
+
+    def get_wheelbase(self):
+        return self._wheelbase
+
+    def get_bbox_size(self):
+        return self._bbox_size
+
+    def wheel_prim_paths(self):
+        return []
+
+    def on_wheel_prims_changed(self):
+        pass
+
+    def is_close_to(self, point, lookahead_distance):
+        if point is None:
+            raise Exception("[Vehicle] Point is None")
+        distance = np.linalg.norm(self.curr_position() - np.asarray(point))
+        return tuple([distance, distance < lookahead_distance])
+
+# ======================================================================================================================
+#
+# NullDebugRenderer
+#
+# ======================================================================================================================
+
+
+class NullDebugRenderer():
+    """
+    DebugRenderer stand-in which draws nothing.
+    """
+
+    def update_path_tracking(self, front_axle_pos, rear_axle_pos, forward, dest_pos):
+        pass
+
+    def update_vehicle(self, vehicle):
+        pass
+
+    def update_path_to_dest(self, vehicle_pos, dest_pos):
+        pass
+
+    def update_track(self, trajectory, close_loop):
+        pass
+
+    def clear(self):
+        pass
+
+    def draw(self, overlay):
+        pass
+
+    def enable(self, value):
+        pass
+
+# ======================================================================================================================
+#
+# HeadlessSimulation
+#
+# ======================================================================================================================
+
+
+def create_headless_scenario(points, lookahead_distance=550.0, close_loop=False, vehicle=None,
+                             meters_per_unit=0.01, trajectory_prim_path="/Headless/Trajectory",
+                             control_period=1.0 / 25.0):
+    """
+    Creates a PurePursuitScenario tracking world space (N,3) `points` with a
+    KinematicVehicle. If no vehicle is given, it is placed at the first point
+    facing the second one.
+    """
+    geometry = points if isinstance(points, TrajectoryGeometry) else TrajectoryGeometry(trajectory_prim_path, points)
+    if vehicle is None:
+        start = geometry.points[0]
+        direction = geometry.points[1] - start if geometry.num_points > 1 else np.array([0.0, 0.0, 1.0])
+        vehicle = KinematicVehicle(position=start, heading=math.atan2(direction[0], direction[2]))
+    return PurePursuitScenario(
+        lookahead_distance,
+        None,
+        geometry.prim_path,
+        meters_per_unit,
+        close_loop,
+        False,
+        vehicle=vehicle,
+        trajectory_geometry=geometry,
+        debug_renderer=NullDebugRenderer(),
+        control_period=control_period
+    )
+
+
+class HeadlessSimulation():
+    """
+    Steps scenarios and their KinematicVehicle-s with a fixed time step, in
+    the same order as in Kit: scenario control first, then vehicle dynamics.
+    Scenarios are evaluated at their control rates, as SimStepTracker does.
+    Scenarios may also be PurePursuitFleetScenario-s.
+    """
+
+    def __init__(self, scenarios, time_step=1.0 / 60.0, telemetry=None):
+        self._scenarios = list(scenarios)
+        self._vehicles = []
+        for scenario in self._scenarios:
+            if isinstance(scenario, PurePursuitFleetScenario):
+                self._vehicles.extend(s.vehicle for s in scenario.scenarios)
+            else:
+                self._vehicles.append(scenario.vehicle)
+        self._control_scheduler = ControlScheduler([scenario.control_period for scenario in self._scenarios])
+        self._time_step = time_step
+        self._total_time = 0.0
+        self._started = False
+        # Optional FleetTelemetry the scenarios record into, completed after every step.
+        self._telemetry = telemetry
+
+    @property
+    def scenarios(self):
+        return self._scenarios
+
+    @property
+    def vehicles(self):
+        return self._vehicles
+
+    @property
+    def total_time(self):
+        return self._total_time
+
+    def start(self):
+        for scenario in self._scenarios:
+            scenario.on_start()
+        self._control_scheduler.reset([scenario.control_period for scenario in self._scenarios])
+        self._total_time = 0.0
+        self._started = True
+
+    def stop(self):
+        for scenario in self._scenarios:
+            scenario.on_end()
+        self._started = False
+
+    def step(self):
+        if not self._started:
+            self.start()
+        dt = self._time_step
+        due, elapsed = self._control_scheduler.step(dt)
+        periods = self._control_scheduler.periods
+        for i, scenario_elapsed in zip(due, elapsed):
+            scenario = self._scenarios[i]
+            scenario.on_step(scenario_elapsed, self._total_time)
+            if scenario.control_period != periods[i]:
+                self._control_scheduler.set_period(i, scenario.control_period)
+        for vehicle in self._vehicles:
+            vehicle.step(dt)
+        self._total_time += dt
+        if self._telemetry is not None:
+            self._telemetry.end_step(self._total_time)
+
+    def run(self, num_steps):
+        for _ in range(num_steps):
+            self.step()
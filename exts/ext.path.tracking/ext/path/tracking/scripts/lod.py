@@ -0,0 +1,140 @@
+import enum
+import math
+
+"""
+    Note: level of detail of vehicle control. A scenario with an LodPolicy
+    (see PurePursuitScenario.set_lod_policy) classifies its vehicle after
+    every evaluation and changes its own control period, which control
+    schedulers pick up for the following evaluations. Vehicles are evaluated
+    at full rate whenever tracking accuracy limits are exceeded.
+
+        policy = LodPolicy(max_cross_track_error=0.2)
+        policy.set_region_of_interest(camera_position, 5000.0)
+        model.set_lod_policy(policy)
+        model.get_lod_stats()
+
+"""
+
+# ======================================================================================================================
+#
+# LodTier
+#
+# ======================================================================================================================
+
+
+class LodTier(enum.IntEnum):
+    # Evaluated at the scenario's own control rate.
+    FULL = 0
+    # Low-curvature segment ahead and close to the trajectory.
+    REDUCED = 1
+    # Reduced tier outside of the region of interest.
+    FAR = 2
+    # Stopped at the end of an open trajectory.
+    SUSPENDED = 3
+
+# ======================================================================================================================
+#
+# LodPolicy
+#
+# ======================================================================================================================
+
+
+class LodPolicy():
+    """
+    Chooses LOD tier and control period of a vehicle. Vehicles within the
+    accuracy limits (cross-track error in meters, curvature of the trajectory
+    ahead in 1/meters) are REDUCED, others FULL. Vehicles outside of the
+    region of interest are one tier coarser (FULL becomes REDUCED).
+    Moving vehicles travel at most `max_travel` lookahead distances between
+    evaluations, as longer intervals make pure pursuit steering oscillate.
+    """
+
+    def __init__(self, reduced_period=0.2, far_period=0.5, suspended_period=1.0,
+                 max_cross_track_error=0.25, max_curvature=0.02, max_travel=0.25):
+        # Control periods in seconds, never shorter than the scenario's own one.
+        self._periods = {
+            LodTier.REDUCED: reduced_period,
+            LodTier.FAR: far_period,
+            LodTier.SUSPENDED: suspended_period,
+        }
+        self.max_cross_track_error = max_cross_track_error
+        self.max_curvature = max_curvature
+        self.max_travel = max_travel
+        # (center, radius) in stage units, None if all vehicles are in the region of interest.
+        self._region_of_interest = None
+
+    def period(self, tier, base_period, speed=0.0, lookahead_distance=0.0):
+        """
+        Control period of a vehicle in the given tier, moving at `speed` (stage units per second).
+        """
+        if tier == LodTier.FULL:
+            return base_period
+        period = self._periods[tier]
+        if tier != LodTier.SUSPENDED and speed > 0.0:
+            period = min(period, self.max_travel * lookahead_distance / speed)
+        return max(period, base_period)
+
+    def preview_distance(self, speed):
+        """
+        Distance ahead of the lookahead target checked for curvature: how far
+        the target may move until the next evaluation in any tier.
+        """
+        return speed * max(self._periods[LodTier.REDUCED], self._periods[LodTier.FAR])
+
+    def set_period(self, tier, period):
+        if tier == LodTier.FULL:
+            raise ValueError("[LodPolicy] FULL tier is evaluated at the scenario's control period")
+        self._periods[tier] = period
+
+    @property
+    def region_of_interest(self):
+        return self._region_of_interest
+
+    def set_region_of_interest(self, center, radius):
+        """
+        Sets a sphere in stage units (e.g. around the camera) outside of which
+        vehicles are updated less often, or clears it if `center` is None.
+        """
+        if center is None:
+            self._region_of_interest = None
+        else:
+            self._region_of_interest = ((float(center[0]), float(center[1]), float(center[2])), float(radius))
+
+    def in_region_of_interest(self, position):
+        if self._region_of_interest is None:
+            return True
+        center, radius = self._region_of_interest
+        dx = position[0] - center[0]
+        dy = position[1] - center[1]
+        dz = position[2] - center[2]
+        return dx * dx + dy * dy + dz * dz <= radius * radius
+
+    def classify(self, position, cross_track_error, curvature):
+        """
+        LOD tier of a controlled vehicle at `position` (stage units), given its
+        cross-track error (meters) and max curvature of the trajectory ahead (1/meters).
+        """
+        accurate = abs(cross_track_error) <= self.max_cross_track_error and curvature <= self.max_curvature
+        tier = LodTier.REDUCED if accurate else LodTier.FULL
+        if not self.in_region_of_interest(position):
+            tier = LodTier(tier + 1)
+        return tier
+
+
+def lod_stats(scenarios):
+    """
+    Number of vehicles in each LOD tier and control evaluations per second
+    of the given scenarios, actual and at their full control rates.
+    """
+    tiers = {tier.name.lower(): 0 for tier in LodTier}
+    evaluations = 0.0
+    full_evaluations = 0.0
+    for scenario in scenarios:
+        tiers[scenario.lod_tier.name.lower()] += 1
+        evaluations += 1.0 / scenario.control_period if scenario.control_period > 0.0 else math.inf
+        full_evaluations += 1.0 / scenario.base_control_period if scenario.base_control_period > 0.0 else math.inf
+    return {
+        "tiers": tiers,
+        "evaluations_per_second": evaluations,
+        "full_evaluations_per_second": full_evaluations,
+    }
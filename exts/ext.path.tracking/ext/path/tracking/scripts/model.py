@@ -1,14 +1,25 @@
 import omni
 from pxr import UsdGeom
 import omni.kit.commands
+import omni.timeline
 from omni.physxvehicle.scripts.wizards import physxVehicleWizard as VehicleWizard
 from omni.physxvehicle.scripts.helpers.UnitScale import UnitScale
 from omni.physxvehicle.scripts.commands import PhysXVehicleWizardCreateCommand
 
-from .stepper import ScenarioManager
-from .path_tracker import PurePursuitScenario
+from .attachments import read_attachments
+from .batch import PhysxStepper, run_batch
+from .debug_draw import get_debug_overlay
+from .fleet import curve_placements, spawn_fleet
+from .lod import lod_stats
+from .profiling import get_step_profiler
+from .stepper import ScenarioManager, SimStepDispatcher
+from .telemetry import FleetTelemetry
+from .trail import FleetTrails
+from .trajectory import TrajectoryCache
+from .path_tracker import PurePursuitFleetScenario, PurePursuitScenario
 from .utils import Utils
-from pxr import UsdPhysics
+from .vehicle import ControlCommitter
+from pxr import Sdf, UsdPhysics
 
 # ======================================================================================================================
 #
@@ -35,16 +46,60 @@ class ExtensionModel:
         self._up_axis = "Y"
         self._vehicle_to_curve_attachments = {}
         self._scenario_managers = []
+        # Per-vehicle path tracking scenarios, regardless of how they are stepped.
+        self._scenarios = []
+        # Maps prim paths of USD data cached by scenarios (e.g. vehicle wheels) to interested vehicles.
+        self._wheel_prim_to_vehicle = {}
+        # Maps prim paths of wheels and of their ancestors to vehicles, for resync lookups.
+        self._wheel_ancestor_to_vehicles = {}
+        # Maps tracked curve prim paths to scenarios of vehicles tracking them.
+        self._curve_to_scenarios = {}
+        # Trajectory geometry shared by vehicles tracking the same curve and across scenario restarts.
+        self._trajectory_cache = TrajectoryCache()
+        # All scenarios receive simulation/physics step events through a single dispatcher.
+        self._step_dispatcher = SimStepDispatcher()
+        # Control inputs of all vehicles are written at once after every scenario was stepped.
+        self._control_committer = ControlCommitter()
+        self._step_dispatcher.register_post_step_callback(self._control_committer.commit)
+        # Debug overlay of all vehicles is drawn at once on app updates, outside of physics steps.
+        self._debug_overlay = get_debug_overlay()
+        self._debug_overlay.subscribe()
+        # Optional per-scenario step timings (see profiling.py).
+        self._profiler = get_step_profiler()
+        # Optional per-step vehicle telemetry, recreated for every loaded fleet (see telemetry.py).
+        self._telemetry_enabled = False
+        self._telemetry_capacity = 4096
+        self._telemetry_path = None
+        self._telemetry = None
+        # Optional trails of vehicle positions drawn in debug overlay, recreated for every loaded fleet (see trail.py).
+        self._trails_enabled = False
+        self._trails_duration = 30.0
+        self._trails_sample_period = 0.1
+        self._trails = None
+        # Optional level of detail of vehicle control (see lod.py).
+        self._lod_policy = None
         self._dirty = False
         # Enables debug overlay with additional info regarding current vehicle state.
         self._enable_debug = False
+        # Draws tracked trajectories as part of debug overlay.
+        self._draw_tracks = False
         # Closed trajectory loop
         self._closed_trajectory_loop = False
         self._rear_steering = False
+        # Steer all attached vehicles with a single vectorized path tracker call per step.
+        self._batched_tracking = True
 
     def teardown(self):
-        self.stop_scenarios()
+        self._close_telemetry()
+        self._close_trails()
+        self._cleanup_scenario_managers()
         self._scenario_managers = None
+        self._step_dispatcher.teardown()
+        self._step_dispatcher = None
+        self._control_committer = None
+        self._debug_overlay.unsubscribe()
+        self._debug_overlay = None
+        self._profiler = None
 
     def attach_vehicle_to_curve(self, wizard_vehicle_path, curve_path):
         """
@@ -73,12 +128,72 @@ class ExtensionModel:
         vehicle and path to be tracked correspondingly.
         The selected prim paths should include a WizardVehicle Xform that
         represents vehicle, and a BasisCurves that represents tracked path.
+        Several WizardVehicles selected with a single BasisCurves are all attached to it.
         """
         if len(selected_prim_paths) == 2:
             self.attach_vehicle_to_curve(
                 wizard_vehicle_path=selected_prim_paths[0],
                 curve_path=selected_prim_paths[1]
             )
+        elif len(selected_prim_paths) > 2:
+            stage = omni.usd.get_context().get_stage()
+            curve_paths = [path for path in selected_prim_paths if stage.GetPrimAtPath(path).IsA(UsdGeom.BasisCurves)]
+            if len(curve_paths) != 1:
+                raise ValueError("[ExtensionModel] Select WizardVehicles and exactly one BasisCurves to attach them to")
+            self.attach_vehicles_to_curves(
+                [(path, curve_paths[0]) for path in selected_prim_paths if path != curve_paths[0]]
+            )
+
+    def validate_attachments(self, attachments):
+        """
+        Checks (WizardVehicle path, BasisCurves path) pairs against the stage
+        in a single pass. Returns a list of all the errors found.
+        """
+        stage = omni.usd.get_context().get_stage()
+        errors = []
+        curves = {}
+        attached = {}
+        for wizard_vehicle_path, curve_path in attachments:
+            prim = stage.GetPrimAtPath(wizard_vehicle_path) if Sdf.Path.IsValidPathString(wizard_vehicle_path) else None
+            if not prim:
+                errors.append(f"{wizard_vehicle_path}: no such vehicle prim")
+            elif not prim.IsA(UsdGeom.Xformable) or not prim.GetChild("Vehicle"):
+                errors.append(f"{wizard_vehicle_path}: not a WizardVehicle Xform with a Vehicle child prim")
+            # Vehicles of a fleet usually share a few curves.
+            if curve_path not in curves:
+                curve = stage.GetPrimAtPath(curve_path) if Sdf.Path.IsValidPathString(curve_path) else None
+                curves[curve_path] = bool(curve) and curve.IsA(UsdGeom.BasisCurves)
+            if not curves[curve_path]:
+                errors.append(f"{wizard_vehicle_path}: {curve_path} is not a BasisCurves prim")
+            previous_curve_path = attached.setdefault(wizard_vehicle_path, curve_path)
+            if previous_curve_path != curve_path:
+                errors.append(f"{wizard_vehicle_path}: attached to both {previous_curve_path} and {curve_path}")
+        return errors
+
+    def attach_vehicles_to_curves(self, attachments):
+        """
+        Attaches vehicles to curves from a dictionary or (WizardVehicle path,
+        BasisCurves path) pairs. Nothing is attached if any of the pairs is
+        invalid, and ValueError listing all the errors is raised instead.
+        Returns the number of attached vehicles.
+        """
+        if isinstance(attachments, dict):
+            attachments = attachments.items()
+        attachments = list(attachments)
+        errors = self.validate_attachments(attachments)
+        if errors:
+            raise ValueError("[ExtensionModel] Invalid attachments:\n" + "\n".join(errors))
+        self._vehicle_to_curve_attachments.update(
+            (wizard_vehicle_path + "/Vehicle", curve_path) for wizard_vehicle_path, curve_path in attachments
+        )
+        self._dirty = True
+        return len(attachments)
+
+    def attach_from_file(self, path):
+        """
+        Attaches vehicles to curves listed in a JSON or CSV file (see attachments.py).
+        """
+        return self.attach_vehicles_to_curves(read_attachments(path))
 
     def attach_preset_metadata(self, metadata):
         """
@@ -95,6 +210,13 @@ class ExtensionModel:
         for manager in self._scenario_managers:
             manager.cleanup()
         self._scenario_managers.clear()
+        self._scenarios.clear()
+        self._wheel_prim_to_vehicle.clear()
+        self._wheel_ancestor_to_vehicles.clear()
+        self._curve_to_scenarios.clear()
+        self._control_committer.clear()
+        self._debug_overlay.clear_renderers()
+        self._debug_overlay.clear_tracks()
         self._dirty = True
 
     def clear_attachments(self):
@@ -103,6 +225,8 @@ class ExtensionModel:
         """
         self._cleanup_scenario_managers()
         self._vehicle_to_curve_attachments.clear()
+        # Attachments are also cleared when the stage is closing, hence cached curves are obsolete.
+        self._trajectory_cache.clear()
 
     def stop_scenarios(self):
         """
@@ -116,9 +240,12 @@ class ExtensionModel:
         Load scenarios with vehicle-to-curve attachments.
         Note that multiple vehicles could run at the same time.
         """
+        # Curves are read once per load, however many vehicles track them.
+        self._trajectory_cache.invalidate()
         if self._dirty:
             self._cleanup_scenario_managers()
 
+            scenarios = []
             for vehicle_path in self._vehicle_to_curve_attachments:
                 scenario = PurePursuitScenario(
                     lookahead_distance,
@@ -126,24 +253,142 @@ class ExtensionModel:
                     self._vehicle_to_curve_attachments[vehicle_path],
                     self.METERS_PER_UNIT,
                     self._closed_trajectory_loop,
-                    self._rear_steering
+                    self._rear_steering,
+                    self._trajectory_cache
                 )
                 scenario.enable_debug(self._enable_debug)
-                scenario_manager = ScenarioManager(scenario)
-                self._scenario_managers.append(scenario_manager)
+                scenario.draw_track = self._draw_tracks
+                scenario.set_lod_policy(self._lod_policy)
+                scenario.vehicle.set_control_committer(self._control_committer)
+                scenarios.append(scenario)
+                for wheel_prim_path in scenario.vehicle.wheel_prim_paths():
+                    self._wheel_prim_to_vehicle[wheel_prim_path] = scenario.vehicle
+                    for ancestor in list(wheel_prim_path.GetAncestorsRange()) + [Sdf.Path.absoluteRootPath]:
+                        self._wheel_ancestor_to_vehicles.setdefault(ancestor, set()).add(scenario.vehicle)
+                curve_path = Sdf.Path(scenario.trajectory_prim_path)
+                self._curve_to_scenarios.setdefault(curve_path, []).append(scenario)
+                self._debug_overlay.add_renderer(scenario.debug_renderer)
+            self._scenarios = scenarios
+
+            if self._batched_tracking and scenarios:
+                fleet_scenario = PurePursuitFleetScenario(scenarios)
+                self._scenario_managers.append(ScenarioManager(fleet_scenario, self._step_dispatcher))
+            else:
+                for scenario in scenarios:
+                    self._scenario_managers.append(ScenarioManager(scenario, self._step_dispatcher))
+            self._apply_profiling()
+            self._apply_telemetry()
+            self._apply_trails()
             self._dirty = False
 
-        self.recompute_trajectories()
+        self._recompute_trajectories()
 
     def recompute_trajectories(self):
         """
         Update tracked trajectories. Often needed when BasisCurve defining a
         trajectory in the scene was updated by a user.
         """
+        self._trajectory_cache.invalidate()
+        self._recompute_trajectories()
+
+    def _recompute_trajectories(self):
         for i in range(len(self._scenario_managers)):
             manager = self._scenario_managers[i]
             manager.scenario.recompute_trajectory()
 
+    def on_usd_objects_changed(self, objects_changed):
+        """
+        Updates USD data cached by the running scenarios which is affected by a
+        Usd.Notice.ObjectsChanged notice. Only the trajectories of changed curves
+        are rebuilt, and tracking vehicles keep their progress along them.
+        """
+        if not self._wheel_prim_to_vehicle and len(self._trajectory_cache) == 0:
+            return
+        # PhysX writes wheel transforms back on every step (suspension travel and steering), while
+        # wheel offsets only change by user edits: those are ignored while the simulation is running.
+        simulating = self._step_dispatcher.is_running
+        # This runs within every PhysX write-back, hence only constant time lookups are done per path.
+        changed_curve_paths = set()
+        for path in objects_changed.GetChangedInfoOnlyPaths():
+            if path.IsPropertyPath() and not (path.name.startswith("xformOp") or path.name == "points"):
+                continue
+            prim_path = path.GetPrimPath()
+            vehicle = self._wheel_prim_to_vehicle.get(prim_path)
+            if vehicle is not None:
+                if not simulating:
+                    vehicle.on_wheel_prims_changed()
+                continue
+            # Transform changes of any ancestor change curve's world space points.
+            changed_curve_paths.update(self._trajectory_cache.curves_under(prim_path))
+        for path in objects_changed.GetResyncedPaths():
+            # Resync of a prim invalidates its whole subtree.
+            prim_path = path.GetPrimPath()
+            for vehicle in self._wheel_ancestor_to_vehicles.get(prim_path, ()):
+                vehicle.on_wheel_prims_changed()
+            changed_curve_paths.update(self._trajectory_cache.curves_under(prim_path))
+
+        for curve_path in changed_curve_paths:
+            self._trajectory_cache.invalidate(curve_path)
+            self._update_trajectory(curve_path)
+
+    def _update_trajectory(self, curve_path):
+        """
+        Rebuilds cached geometry of a changed curve and hands it to the scenarios tracking the curve.
+        """
+        scenarios = self._curve_to_scenarios.get(curve_path)
+        if not scenarios:
+            self._trajectory_cache.evict(curve_path)
+            return
+        geometry = self._trajectory_cache.get(curve_path)
+        for scenario in scenarios:
+            scenario.set_trajectory_geometry(geometry)
+
+    def run_batch(self, duration, time_step=1.0 / 60.0, stepper=None, until_finished=True, lookahead_distance=None):
+        """
+        Runs attached vehicles faster than realtime: loads the scenarios and
+        steps them and physics directly in a loop, without timeline updates
+        and with debug overlay disabled, for `duration` seconds of simulation
+        time or until all the vehicles reached their destinations.
+        Physics is stepped by `stepper` (PhysxStepper by default, see batch.py).
+        The timeline must not be playing, otherwise ValueError is raised, as
+        scenarios would be stepped by both. Returns a dictionary with metrics of the run.
+        """
+        if omni.timeline.get_timeline_interface().is_playing():
+            raise ValueError("[ExtensionModel] Batch runs require the timeline to be stopped")
+        if lookahead_distance is None:
+            lookahead_distance = self._lookahead_distance
+        self.load_simulation(lookahead_distance)
+        if not self._scenarios:
+            return None
+
+        enable_debug = self._enable_debug
+        self.set_enable_debug(False)
+        # Metrics are computed from telemetry, only the last step is needed if it is not recorded otherwise.
+        owns_telemetry = self._telemetry is None
+        if owns_telemetry:
+            self._telemetry = FleetTelemetry(len(self._scenarios), capacity=1)
+            self._step_dispatcher.register_post_step_callback(self._end_telemetry_step)
+            for slot, scenario in enumerate(self._scenarios):
+                scenario.set_telemetry(self._telemetry, slot)
+        try:
+            return run_batch(
+                self._step_dispatcher,
+                stepper if stepper is not None else PhysxStepper(),
+                omni.usd.get_context().get_stage(),
+                [scenario.vehicle for scenario in self._scenarios],
+                self._telemetry,
+                [scenario.vehicle_path for scenario in self._scenarios],
+                duration,
+                time_step,
+                until_finished
+            )
+        finally:
+            if owns_telemetry:
+                self._close_telemetry()
+                for scenario in self._scenarios:
+                    scenario.set_telemetry(None)
+            self.set_enable_debug(enable_debug)
+
     def set_enable_debug(self, flag):
         """
         Enables/disables debug overlay.
@@ -152,6 +397,20 @@ class ExtensionModel:
         for manager in self._scenario_managers:
             manager.scenario.enable_debug(flag)
 
+    def set_debug_refresh_rate(self, rate):
+        """
+        Max number of debug overlay updates per second, independent of the physics step rate.
+        """
+        self._debug_overlay.set_refresh_rate(rate)
+
+    def set_draw_tracks(self, flag):
+        """
+        Enables/disables drawing of tracked trajectories in debug overlay.
+        """
+        self._draw_tracks = flag
+        for scenario in self._scenarios:
+            scenario.draw_track = flag
+
     def set_close_trajectory_loop(self, flag):
         """
         Enables closed loop path tracking.
@@ -168,6 +427,131 @@ class ExtensionModel:
         # Mark simulation config as dirty in order to re-create vehicle object.
         self._dirty = True
 
+    def set_enable_batched_tracking(self, flag):
+        """
+        Enables steering of all attached vehicles with a single batched path
+        tracker (see PurePursuitFleetScenario) instead of one tracker per vehicle.
+        """
+        self._batched_tracking = flag
+        self._dirty = True
+
+    def set_enable_profiling(self, flag):
+        """
+        Enables/disables recording of step timings of the running scenarios.
+        """
+        self._profiler.set_enabled(flag)
+        self._apply_profiling()
+
+    def _apply_profiling(self):
+        """
+        Hands StepTimings of the profiler to instrumented objects, or None when profiling is disabled.
+        """
+        profiler = self._profiler
+        for scenario in self._scenarios:
+            scenario.set_timings(profiler.timings(scenario.vehicle_path))
+        for manager in self._scenario_managers:
+            scenario = manager.scenario
+            if isinstance(scenario, PurePursuitFleetScenario):
+                manager.set_timings(profiler.timings("fleet"))
+            else:
+                manager.set_timings(profiler.timings(scenario.vehicle_path))
+        self._step_dispatcher.set_timings(profiler.timings("dispatcher"))
+
+    def set_enable_telemetry(self, flag, capacity=4096, path=None):
+        """
+        Enables/disables recording of per-step vehicle telemetry, keeping the
+        last `capacity` steps in memory. If `path` is given, older steps are
+        appended to that file (see load_telemetry()). Applied on the next simulation load.
+        """
+        self._telemetry_enabled = flag
+        self._telemetry_capacity = capacity
+        self._telemetry_path = path
+        self._dirty = True
+
+    def get_telemetry(self):
+        """
+        FleetTelemetry of the loaded scenarios, or None if telemetry is disabled.
+        Vehicle slots follow the order of vehicle-to-curve attachments.
+        """
+        return self._telemetry
+
+    def _apply_telemetry(self):
+        self._close_telemetry()
+        if self._telemetry_enabled and self._scenarios:
+            self._telemetry = FleetTelemetry(
+                len(self._scenarios),
+                self._telemetry_capacity,
+                self._telemetry_path,
+                vehicle_names=[scenario.vehicle_path for scenario in self._scenarios]
+            )
+            self._step_dispatcher.register_post_step_callback(self._end_telemetry_step)
+        for slot, scenario in enumerate(self._scenarios):
+            scenario.set_telemetry(self._telemetry, slot)
+
+    def _end_telemetry_step(self):
+        self._telemetry.end_step(self._step_dispatcher.total_time)
+
+    def _close_telemetry(self):
+        if self._telemetry is not None:
+            self._step_dispatcher.unregister_post_step_callback(self._end_telemetry_step)
+            self._telemetry.close()
+            self._telemetry = None
+
+    def set_lod_policy(self, policy):
+        """
+        Updates vehicles at rates chosen by the given LodPolicy, or at the full control rate if None.
+        """
+        self._lod_policy = policy
+        for scenario in self._scenarios:
+            scenario.set_lod_policy(policy)
+
+    def get_lod_stats(self):
+        """
+        Number of vehicles in each LOD tier and control evaluation rates, see lod_stats().
+        """
+        return lod_stats(self._scenarios)
+
+    def set_enable_trails(self, flag, duration=30.0, sample_period=0.1):
+        """
+        Enables/disables drawing of the paths vehicles drove over the last
+        `duration` seconds, sampled every `sample_period` seconds. Applied on the next simulation load.
+        """
+        self._trails_enabled = flag
+        self._trails_duration = duration
+        self._trails_sample_period = sample_period
+        self._dirty = True
+
+    def get_trails(self):
+        """
+        FleetTrails of the loaded scenarios, or None if trails are disabled.
+        Vehicle slots follow the order of vehicle-to-curve attachments.
+        """
+        return self._trails
+
+    def _apply_trails(self):
+        self._close_trails()
+        if self._trails_enabled and self._scenarios:
+            self._trails = FleetTrails(len(self._scenarios), self._trails_duration, self._trails_sample_period)
+            self._step_dispatcher.register_post_step_callback(self._end_trails_step)
+            self._debug_overlay.add_renderer(self._trails)
+        for slot, scenario in enumerate(self._scenarios):
+            scenario.set_trails(self._trails, slot)
+
+    def _end_trails_step(self):
+        self._trails.end_step(self._step_dispatcher.total_time)
+
+    def _close_trails(self):
+        if self._trails is not None:
+            self._step_dispatcher.unregister_post_step_callback(self._end_trails_step)
+            self._debug_overlay.remove_renderer(self._trails)
+            self._trails = None
+
+    def get_profiling_snapshot(self, include_buckets=False):
+        """
+        Step timings recorded so far, see StepProfiler.snapshot().
+        """
+        return self._profiler.snapshot(include_buckets)
+
     def load_ground_plane(self):
         """
         Helper to quickly load a preset ground plane prim.
@@ -189,14 +573,17 @@ class ExtensionModel:
         """
         usd_context = omni.usd.get_context()
         stage = usd_context.get_stage()
-        vehicleData = VehicleWizard.VehicleData(self.get_unit_scale(stage),
-                                                VehicleWizard.VehicleData.AXIS_Y, VehicleWizard.VehicleData.AXIS_Z)
-
         root_vehicle_path = self.ROOT_PATH + VehicleWizard.VEHICLE_ROOT_BASE_PATH
         root_vehicle_path = omni.usd.get_stage_next_free_path(stage, root_vehicle_path, True)
         root_shared_path = self.ROOT_PATH + VehicleWizard.SHARED_DATA_ROOT_BASE_PATH
         root_vehicle_path = omni.usd.get_stage_next_free_path(stage, root_shared_path, True)
 
+        self._create_wizard_vehicle(stage, root_vehicle_path, root_shared_path)
+        return root_vehicle_path
+
+    def _create_wizard_vehicle(self, stage, root_vehicle_path, root_shared_path):
+        vehicleData = VehicleWizard.VehicleData(self.get_unit_scale(stage),
+                                                VehicleWizard.VehicleData.AXIS_Y, VehicleWizard.VehicleData.AXIS_Z)
         vehicleData.rootVehiclePath = root_vehicle_path
         vehicleData.rootSharedPath = root_shared_path
 
@@ -206,7 +593,41 @@ class ExtensionModel:
         assert (not messageList)
         assert (scenePath and scenePath is not None)
 
-        return root_vehicle_path
+    def _load_fleet_template(self, stage):
+        """
+        WizardVehicle referenced by fleet vehicles, created once per stage
+        under a class prim so that the template itself is not simulated.
+        Shared vehicle data is a sibling of the class prim under the template
+        root, as physics must parse it. Returns paths of the template and of
+        its shared vehicle data.
+        """
+        template_root_path = Sdf.Path(self.ROOT_PATH).AppendChild("FleetTemplate")
+        class_path = template_root_path.AppendChild("Template")
+        template_path = str(class_path) + VehicleWizard.VEHICLE_ROOT_BASE_PATH
+        shared_path = str(template_root_path.AppendChild("SharedData"))
+        if not stage.GetPrimAtPath(template_path):
+            UsdGeom.Xform.Define(stage, template_root_path)
+            stage.DefinePrim(class_path).SetSpecifier(Sdf.SpecifierClass)
+            self._create_wizard_vehicle(stage, template_path, shared_path)
+        return template_path, shared_path
+
+    def load_fleet(self, count, curve_path, spacing=None, start_distance=0.0):
+        """
+        Spawns `count` vehicles referencing a single WizardVehicle template,
+        placed along the curve every `spacing` stage units (evenly if None)
+        and attached to it. Returns paths of the spawned WizardVehicle Xforms.
+        """
+        stage = omni.usd.get_context().get_stage()
+        template_path, shared_path = self._load_fleet_template(stage)
+        self._trajectory_cache.invalidate(curve_path)
+        geometry = self._trajectory_cache.get(curve_path, stage)
+        positions, headings = curve_placements(
+            geometry, count, spacing, start_distance, self._closed_trajectory_loop
+        )
+        fleet_path = omni.usd.get_stage_next_free_path(stage, self.ROOT_PATH + "/Fleet", False)
+        vehicle_paths = spawn_fleet(stage, template_path, positions, headings, fleet_path, shared_path)
+        self.attach_vehicles_to_curves([(vehicle_path, curve_path) for vehicle_path in vehicle_paths])
+        return vehicle_paths
 
     def load_sample_track(self):
         """
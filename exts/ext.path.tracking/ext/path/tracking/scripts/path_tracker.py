@@ -1,11 +1,18 @@
-import omni.usd
-from pxr import Gf, UsdGeom
+try:
+    import omni.usd
+except ImportError:
+    # Kit and USD modules are not available when running headless (see headless.py).
+    pass
 
 import math
+import time
 import numpy as np
 
 from .debug_draw import DebugRenderer
-from .stepper import Scenario
+from .lod import LodTier
+from .profiling import StepPhase
+from .stepper import ControlScheduler, Scenario
+from .trajectory import Trajectory
 from .vehicle import Axle, Vehicle
 
 # ======================================================================================================================
@@ -17,89 +24,264 @@ from .vehicle import Axle, Vehicle
 
 class PurePursuitScenario(Scenario):
     def __init__(self, lookahead_distance, vehicle_path, trajectory_prim_path, meters_per_unit,
-                 close_loop_flag, enable_rear_steering):
-        super().__init__(secondsToRun=10000.0, timeStep=1.0/25.0)
+                 close_loop_flag, enable_rear_steering, trajectory_cache=None,
+                 vehicle=None, trajectory_geometry=None, debug_renderer=None, control_period=1.0/25.0):
+        """
+        Vehicle, trajectory geometry and debug renderer are created from the
+        current USD stage, unless they are given explicitly (e.g. headless
+        KinematicVehicle, see headless.py).
+        Vehicle control is evaluated once per `control_period` seconds.
+        """
+        super().__init__(secondsToRun=10000.0, timeStep=control_period)
+        self._base_control_period = control_period
 
         self._MAX_STEER_ANGLE_RADIANS = math.pi / 3
 
         self._lookahead_distance = lookahead_distance
+        # Max number of trajectory points searched ahead of the current one on each step.
+        self._lookahead_window = 256
+        # Vehicle is considered off course (and re-acquires the trajectory) when
+        # farther than that many lookahead distances from the current trajectory point.
+        self._REACQUIRE_LOOKAHEAD_FACTOR = 3.0
         self._METERS_PER_UNIT = meters_per_unit
+        # Meters per second.
         self._max_speed = 250.0
-
-        self._stage = omni.usd.get_context().get_stage()
-        self._vehicle = Vehicle(
-            self._stage.GetPrimAtPath(vehicle_path),
-            self._MAX_STEER_ANGLE_RADIANS,
-            enable_rear_steering
-        )
-        self._debug_render = DebugRenderer(self._vehicle.get_bbox_size())
+        # Vehicle brakes when steering harder than that (and not almost stopped).
+        self._brake_steer_threshold = 0.1
+
+        if vehicle is None:
+            self._stage = omni.usd.get_context().get_stage()
+            vehicle = Vehicle(
+                self._stage.GetPrimAtPath(vehicle_path),
+                self._MAX_STEER_ANGLE_RADIANS,
+                enable_rear_steering
+            )
+        else:
+            self._stage = None
+        self._vehicle = vehicle
+        if debug_renderer is None:
+            debug_renderer = DebugRenderer(self._vehicle.get_bbox_size())
+        self._debug_render = debug_renderer
         self._path_tracker = PurePursuitPathTracker(math.pi/4)
 
         self._dest = None
+        self._vehicle_path = vehicle_path
         self._trajectory_prim_path = trajectory_prim_path
-        self._trajectory = Trajectory(trajectory_prim_path, close_loop=close_loop_flag)
+        # Optional TrajectoryCache shared with other scenarios tracking the same curve.
+        self._trajectory_cache = trajectory_cache
+        # Optional fixed geometry, used instead of reading the curve prim.
+        self._trajectory_geometry = trajectory_geometry
+        self._trajectory = self._create_trajectory(close_loop_flag)
         self._stopped = False
         self.draw_track = False
         self._close_loop = close_loop_flag
+        # Lookahead target of the current step.
+        self._dest_position = None
+        # Optional FleetTelemetry and this vehicle's slot in it.
+        self._telemetry = None
+        self._telemetry_slot = 0
+        # Optional FleetTrails and this vehicle's slot in it.
+        self._trails = None
+        self._trails_slot = 0
+        # Optional LodPolicy adjusting control period after every evaluation (see lod.py).
+        self._lod_policy = None
+        self._lod_tier = LodTier.FULL
 
     def on_start(self):
+        self._set_lod_tier(LodTier.FULL)
+        self._vehicle.reset_control_cache()
         self._vehicle.accelerate(1.0)
+        # Start from the nearest part of the trajectory ahead, e.g. when spawned mid-route.
+        self._vehicle.update_pose()
+        self._reacquire_trajectory()
+
+    def _reacquire_trajectory(self):
+        pose = self._vehicle.pose()
+        return self._trajectory.reacquire(pose.position, pose.forward)
+
+    def _is_off_course(self):
+        position = self._vehicle.pose().position
+        point = self._trajectory.point()
+        if point is None:
+            return False
+        max_distance = self._REACQUIRE_LOOKAHEAD_FACTOR * self._lookahead_distance
+        return (position[0] - point[0]) ** 2 + (position[2] - point[2]) ** 2 > max_distance * max_distance
 
     def on_end(self):
         self._trajectory.reset()
+        self._debug_render.clear()
 
-    def _process(self, forward, up, dest_position, distance=None, is_close_to_dest=False):
+    def _prepare_tracking_input(self, forward, dest_position):
         """
-        Steering/accleleration vehicle control heuristic.
+        Collects the positions the path tracker needs on this step, projected
+        onto the ground plane.
         """
-        if (distance is None):
-            distance, is_close_to_dest = self._vehicle.is_close_to(dest_position, self._lookahead_distance)
         curr_vehicle_pos = self._vehicle.curr_position()
 
-        self._debug_render.update_vehicle(self._vehicle)
-        self._debug_render.update_path_to_dest(curr_vehicle_pos, dest_position)
-
         # FIXME: - currently the extension expect Y-up axis which is not flexible.
         # Project onto XZ plane
         curr_vehicle_pos[1] = 0.0
         forward[1] = 0.0
-        dest_position[1] = 0.0
+        dest_position = np.array([dest_position[0], 0.0, dest_position[2]])
 
-        speed = self._vehicle.get_speed() * self._METERS_PER_UNIT
-        axle_front = Gf.Vec3f(self._vehicle.axle_position(Axle.FRONT))
-        axle_rear = Gf.Vec3f(self._vehicle.axle_position(Axle.REAR))
-        axle_front[1] = 0.0
-        axle_rear[1] = 0.0
+        axle_positions = self._vehicle.pose().axle_positions
+        axle_front = np.array([axle_positions[Axle.FRONT][0], 0.0, axle_positions[Axle.FRONT][2]])
+        axle_rear = np.array([axle_positions[Axle.REAR][0], 0.0, axle_positions[Axle.REAR][2]])
 
         # self._debug_render.update_path_tracking(axle_front, axle_rear, forward, dest_position)
 
-        steer_angle = self._path_tracker.on_step(
-            axle_front,
-            axle_rear,
-            forward,
-            dest_position,
-            curr_vehicle_pos
-        )
+        return axle_front, axle_rear, forward, dest_position, curr_vehicle_pos
+
+    def _draw_debug(self, dest_position):
+        # Overlay itself is drawn on app updates (see DebugOverlay), only the latest state is handed over here.
+        self._debug_render.update_track(self._trajectory if self.draw_track else None, self._close_loop)
+        self._debug_render.update_vehicle(self._vehicle)
+        self._debug_render.update_path_to_dest(self._vehicle.curr_position(), dest_position)
+
+    def apply_control(self, steer_angle):
+        """
+        Steering/accleleration vehicle control heuristic.
+        """
+        timings = self._timings
+        if timings is not None:
+            start = time.perf_counter_ns()
+
+        speed = self._vehicle.get_speed() * self._METERS_PER_UNIT
 
         if steer_angle < 0:
             self._vehicle.steer_left(abs(steer_angle))
         else:
             self._vehicle.steer_right(steer_angle)
         # Accelerate/break control heuristic
-        if abs(steer_angle) > 0.1 and speed > 5.0:
-            self._vehicle.brake(1.0)
-            self._vehicle.accelerate(0.0)
+        if abs(steer_angle) > self._brake_steer_threshold and speed > 5.0:
+            brake = 1.0
+            accelerator = 0.0
         else:
             if (speed >= self._max_speed):
-                self._vehicle.brake(0.8)
-                self._vehicle.accelerate(0.0)
+                brake = 0.8
+                accelerator = 0.0
             else:
-                self._vehicle.brake(0.0)
-                self._vehicle.accelerate(0.7)
+                brake = 0.0
+                accelerator = 0.7
+        self._vehicle.brake(brake)
+        self._vehicle.accelerate(accelerator)
+
+        if timings is not None:
+            timings.record(StepPhase.CONTROL_WRITE, start)
+
+        if self._telemetry is not None or self._lod_policy is not None:
+            # Computed once per evaluation and shared by telemetry and LOD.
+            position = self._vehicle.pose().position
+            cross_track_error = self._cross_track_error(position)
+            if self._telemetry is not None:
+                self._record_telemetry(position, cross_track_error, speed, steer_angle, accelerator, brake)
+            if self._lod_policy is not None:
+                self._update_lod(position, cross_track_error)
+
+    def _cross_track_error(self, position):
+        """
+        Cross-track error in meters.
+        """
+        return self._trajectory.cross_track_error(position, self._lookahead_window) * self._METERS_PER_UNIT
+
+    def _update_lod(self, position, cross_track_error):
+        policy = self._lod_policy
+        speed = self._vehicle.get_speed()
+        lookahead_distance = self._lookahead_distance
+        # Trajectory between the vehicle and its lookahead target, and as far ahead as the target may move.
+        curvature = self._trajectory.max_curvature(
+            lookahead_distance, policy.preview_distance(speed)
+        ) / self._METERS_PER_UNIT
+        self._set_lod_tier(policy.classify(position, cross_track_error, curvature), speed)
+
+    def _set_lod_tier(self, tier, speed=0.0):
+        self._lod_tier = tier
+        if self._lod_policy is None:
+            self._controlPeriod = self._base_control_period
+        else:
+            self._controlPeriod = self._lod_policy.period(
+                tier, self._base_control_period, speed, self._lookahead_distance
+            )
+
+    def _record_telemetry(self, position, cross_track_error, speed, steer_angle, accelerator, brake, controlled=True):
+        dest_position = self._dest_position
+        if dest_position is not None:
+            distance_to_target = math.hypot(dest_position[0] - position[0], dest_position[2] - position[2])
+        else:
+            distance_to_target = 0.0
+        self._telemetry.record(
+            self._telemetry_slot,
+            position[0],
+            position[2],
+            speed,
+            steer_angle,
+            accelerator,
+            brake,
+            self._trajectory.index,
+            distance_to_target * self._METERS_PER_UNIT,
+            cross_track_error,
+            controlled
+        )
 
     def _full_stop(self):
+        timings = self._timings
+        if timings is not None:
+            start = time.perf_counter_ns()
         self._vehicle.accelerate(0.0)
         self._vehicle.brake(1.0)
+        if timings is not None:
+            timings.record(StepPhase.CONTROL_WRITE, start)
+
+        if self._telemetry is not None:
+            speed = self._vehicle.get_speed() * self._METERS_PER_UNIT
+            position = self._vehicle.pose().position
+            self._record_telemetry(position, self._cross_track_error(position), speed, 0.0, 0.0, 1.0, controlled=False)
+        if self._lod_policy is not None:
+            self._set_lod_tier(LodTier.SUSPENDED)
+
+    def set_telemetry(self, telemetry, slot=0):
+        """
+        Records per-step vehicle state into a slot of the given FleetTelemetry, or stops recording if None.
+        """
+        self._telemetry = telemetry
+        self._telemetry_slot = slot
+
+    def set_trails(self, trails, slot=0):
+        """
+        Records vehicle positions into a slot of the given FleetTrails, or stops recording if None.
+        """
+        self._trails = trails
+        self._trails_slot = slot
+
+    def set_lod_policy(self, policy):
+        """
+        Updates the vehicle at a rate chosen by the given LodPolicy, or at the full control rate if None.
+        """
+        self._lod_policy = policy
+        self._set_lod_tier(LodTier.FULL)
+
+    @property
+    def lod_tier(self):
+        return self._lod_tier
+
+    @property
+    def base_control_period(self):
+        """
+        Control period of the FULL level of detail.
+        """
+        return self._base_control_period
+
+    def set_max_speed(self, value):
+        """
+        Max vehicle speed in meters per second.
+        """
+        self._max_speed = value
+
+    def set_brake_steer_threshold(self, value):
+        """
+        Steering value in range [0, 1] above which the vehicle brakes.
+        """
+        self._brake_steer_threshold = value
 
     def set_meters_per_unit(self, value):
         self._METERS_PER_UNIT = value
@@ -116,40 +298,223 @@ class PurePursuitScenario(Scenario):
     def enable_debug(self, flag):
         self._debug_render.enable(flag)
 
-    def on_step(self, deltaTime, totalTime):
+    @property
+    def debug_renderer(self):
+        return self._debug_render
+
+    def prepare_step(self):
         """
-        Updates vehicle control on sim update callback in order to stay on tracked path.
+        Advances the tracked trajectory and returns the path tracker input
+        `(front_axle_pos, rear_axle_pos, forward, dest_pos, curr_pos)`, or None
+        if no vehicle control is needed on this step.
         """
+        timings = self._timings
+        if timings is not None:
+            start = time.perf_counter_ns()
+
+        # Vehicle pose is evaluated once, all the vehicle accessors below read from the snapshot.
+        self._vehicle.update_pose()
         forward = self._vehicle.forward()
-        up = self._vehicle.up()
+        if self._trails is not None:
+            self._trails.record(self._trails_slot, self._vehicle.pose().position)
+        if timings is not None:
+            start = timings.record(StepPhase.POSE_READ, start)
+
+        if self._is_off_course():
+            self._reacquire_trajectory()
+
+        dest_position = self._trajectory.find_lookahead_point(
+            self._vehicle.pose().position,
+            self._lookahead_distance,
+            self._lookahead_window
+        )
+        self._dest_position = dest_position
+        tracking_input = None
+        if dest_position is not None:
+            tracking_input = self._prepare_tracking_input(forward, dest_position)
+        if timings is not None:
+            start = timings.record(StepPhase.TARGET_SEARCH, start)
 
-        if self._trajectory and self.draw_track:
-            self._trajectory.draw()
+        self._draw_debug(dest_position)
+        if timings is not None:
+            timings.record(StepPhase.DEBUG_DRAW, start)
 
-        dest_position = self._trajectory.point()
-        is_end_point = self._trajectory.is_at_end_point()
         # Run vehicle control unless reached the destination
-        if dest_position:
-            distance, is_close_to_dest = self._vehicle.is_close_to(dest_position, self._lookahead_distance)
-            if (is_close_to_dest):
-                dest_position = self._trajectory.next_point()
-            else:
-                # Compute vehicle steering and acceleration
-                self._process(forward, up, dest_position, distance, is_close_to_dest)
-        else:
+        if tracking_input is None:
             self._stopped = True
             self._full_stop()
+        return tracking_input
+
+    def on_step(self, deltaTime, totalTime):
+        """
+        Updates vehicle control on sim update callback in order to stay on tracked path.
+        """
+        tracking_input = self.prepare_step()
+        if tracking_input is not None:
+            # Compute vehicle steering and acceleration
+            timings = self._timings
+            if timings is None:
+                steer_angle = self._path_tracker.on_step(*tracking_input)
+            else:
+                start = time.perf_counter_ns()
+                steer_angle = self._path_tracker.on_step(*tracking_input)
+                timings.record(StepPhase.STEERING, start)
+            self.apply_control(steer_angle)
+
+    def _create_trajectory(self, close_loop):
+        geometry = self._trajectory_geometry
+        if geometry is None and self._trajectory_cache is not None:
+            geometry = self._trajectory_cache.get(self._trajectory_prim_path, self._stage)
+        return Trajectory(self._trajectory_prim_path, close_loop, geometry)
 
     def recompute_trajectory(self):
-        self._trajectory = Trajectory(self._trajectory_prim_path, self._close_loop)
+        self._trajectory = self._create_trajectory(self._close_loop)
+
+    def set_trajectory_geometry(self, geometry):
+        """
+        Applies an updated geometry of the tracked curve without resetting the progress along it.
+        """
+        self._trajectory.set_geometry(geometry)
+
+    @property
+    def vehicle_path(self):
+        return self._vehicle_path
+
+    @property
+    def trajectory_prim_path(self):
+        return self._trajectory_prim_path
 
     def set_lookahead_distance(self, distance):
         self._lookahead_distance = distance
 
+    def set_lookahead_window(self, num_points):
+        self._lookahead_window = max(1, int(num_points))
+
     def set_close_trajectory_loop(self, flag):
         self._close_loop = flag
         self._trajectory.set_close_loop(flag)
 
+    @property
+    def path_tracker(self):
+        return self._path_tracker
+
+    @property
+    def trajectory(self):
+        return self._trajectory
+
+    def is_stopped(self):
+        """
+        Checks if the vehicle reached the end of an open trajectory and was stopped.
+        """
+        return self._stopped
+
+    @property
+    def vehicle(self):
+        return self._vehicle
+
+# ======================================================================================================================
+#
+# PurePursuitFleetScenario
+#
+# ======================================================================================================================
+
+
+class PurePursuitFleetScenario(Scenario):
+    """
+    Steps a group of PurePursuitScenario-s at once: per-vehicle tracking input
+    is gathered into (N,3) arrays and steering for the whole fleet is computed
+    with a single BatchPurePursuitPathTracker call.
+    """
+
+    def __init__(self, scenarios):
+        super().__init__(secondsToRun=10000.0, timeStep=1.0/60.0)
+        # Fleet is stepped on every physics step, vehicles are evaluated at their
+        # own control rates, staggered across steps.
+        self._controlPeriod = 0.0
+        self._scenarios = list(scenarios)
+        self._control_scheduler = ControlScheduler([scenario.control_period for scenario in self._scenarios])
+        num_vehicles = len(self._scenarios)
+        self._path_tracker = BatchPurePursuitPathTracker(
+            np.array([scenario.path_tracker.max_steer_angle_radians for scenario in self._scenarios])
+        )
+        # Preallocated tracking input, only first rows are used on each step.
+        self._front_axle_pos = np.zeros((num_vehicles, 3))
+        self._rear_axle_pos = np.zeros((num_vehicles, 3))
+        self._dest_pos = np.zeros((num_vehicles, 3))
+        self._active = np.zeros(num_vehicles, dtype=np.intp)
+
+    @property
+    def scenarios(self):
+        return self._scenarios
+
+    def on_start(self):
+        for scenario in self._scenarios:
+            scenario.on_start()
+        self._control_scheduler.reset([scenario.control_period for scenario in self._scenarios])
+
+    def on_end(self):
+        for scenario in self._scenarios:
+            scenario.on_end()
+
+    def on_step(self, deltaTime, totalTime):
+        due, _ = self._control_scheduler.step(deltaTime)
+        num_active = 0
+        for i in due:
+            scenario = self._scenarios[i]
+            tracking_input = scenario.prepare_step()
+            if tracking_input is not None:
+                front_axle_pos, rear_axle_pos, _, dest_pos, _ = tracking_input
+                self._front_axle_pos[num_active] = front_axle_pos
+                self._rear_axle_pos[num_active] = rear_axle_pos
+                self._dest_pos[num_active] = dest_pos
+                self._active[num_active] = i
+                num_active += 1
+
+        if num_active > 0:
+            self._steer(num_active)
+
+        # Vehicles may change their control periods, e.g. with level of detail (see lod.py).
+        periods = self._control_scheduler.periods
+        for i in due:
+            period = self._scenarios[i].control_period
+            if period != periods[i]:
+                self._control_scheduler.set_period(i, period)
+
+    def _steer(self, num_active):
+        timings = self._timings
+        if timings is not None:
+            start = time.perf_counter_ns()
+        steer_angles = self._path_tracker.on_step(
+            self._front_axle_pos[:num_active],
+            self._rear_axle_pos[:num_active],
+            self._dest_pos[:num_active],
+            self._active[:num_active]
+        )
+        if timings is not None:
+            timings.record(StepPhase.STEERING, start)
+        for k in range(num_active):
+            self._scenarios[self._active[k]].apply_control(steer_angles[k])
+
+    def recompute_trajectory(self):
+        for scenario in self._scenarios:
+            scenario.recompute_trajectory()
+
+    def enable_debug(self, flag):
+        for scenario in self._scenarios:
+            scenario.enable_debug(flag)
+
+    def set_lookahead_distance(self, distance):
+        for scenario in self._scenarios:
+            scenario.set_lookahead_distance(distance)
+
+    def set_close_trajectory_loop(self, flag):
+        for scenario in self._scenarios:
+            scenario.set_close_trajectory_loop(flag)
+
+    def set_lod_policy(self, policy):
+        for scenario in self._scenarios:
+            scenario.set_lod_policy(policy)
+
 # ======================================================================================================================
 #
 # PurePursuitPathTracker
@@ -170,6 +535,10 @@ class PurePursuitPathTracker():
         self._max_steer_angle_radians = max_steer_angle_radians
         self._debug_enabled = False
 
+    @property
+    def max_steer_angle_radians(self):
+        return self._max_steer_angle_radians
+
     def _steer_value_from_angle(self, angle):
         """
         Computes vehicle's steering wheel angle in expected range [-1, 1].
@@ -192,8 +561,8 @@ class PurePursuitPathTracker():
             if lookahead_dist == 0.0 or forward_dist == 0.0:
                 raise Exception("Pure pursuit aglorithm: invalid state")
 
-        lookahead.Normalize()
-        forward.Normalize()
+        lookahead = lookahead / lookahead_dist
+        forward = forward / forward_dist
 
         # Compute a signed angle alpha between lookahead and forward vectors,
         # /!\ left-handed rotation assumed.
@@ -208,63 +577,54 @@ class PurePursuitPathTracker():
 
 # ======================================================================================================================
 #
-# Trajectory
+# BatchPurePursuitPathTracker
 #
 # ======================================================================================================================
 
 
-class Trajectory():
+class BatchPurePursuitPathTracker():
     """
-    A helper class to access coordinates of points that form a BasisCurve prim.
+    Vectorized PurePursuitPathTracker: computes steering values of N vehicles
+    in one call, reproducing the per-vehicle math of PurePursuitPathTracker.
     """
-    def __init__(self, prim_path, close_loop=True):
-        stage = omni.usd.get_context().get_stage()
-        basis_curves = UsdGeom.BasisCurves.Get(stage, prim_path)
-        if (basis_curves and basis_curves is not None):
-            curve_prim = stage.GetPrimAtPath(prim_path)
-            self._points = basis_curves.GetPointsAttr().Get()
-            self._num_points = len(self._points)
-            cache = UsdGeom.XformCache()
-            T = cache.GetLocalToWorldTransform(curve_prim)
-
-            for i in range(self._num_points):
-                p = Gf.Vec4d(self._points[i][0], self._points[i][1], self._points[i][2], 1.0)
-                p_ = p * T
-                self._points[i] = Gf.Vec3f(p_[0], p_[1], p_[2])
-        else:
-            self._points = None
-            self._num_points = 0
-        self._pointer = 0
-        self._close_loop = close_loop
 
-    def point(self):
-        """
-        Returns current point.
-        """
-        return self._points[self._pointer] if self._pointer < len(self._points) else None
+    def __init__(self, max_steer_angle_radians):
+        # Either a scalar or an (N,) array with per-vehicle values.
+        self._max_steer_angle_radians = np.asarray(max_steer_angle_radians, dtype=np.float64)
+        self._debug_enabled = False
 
-    def next_point(self):
+    def on_step(self, front_axle_pos, rear_axle_pos, dest_pos, indices=None):
         """
-        Next point on the curve.
+        Recomputes steering values from (N,3) arrays of axle and destination
+        positions. If `indices` is given, rows correspond to those vehicles
+        when per-vehicle max steer angles are used.
+        Returns an (N,) array of steering values in range [-1, 1].
         """
-        if (self._pointer < self._num_points):
-            self._pointer = self._pointer + 1
-            if self._pointer >= self._num_points and self._close_loop:
-                self._pointer = 0
-            return self.point()
-        return None
+        front_axle_pos = np.asarray(front_axle_pos, dtype=np.float64)
+        rear_axle_pos = np.asarray(rear_axle_pos, dtype=np.float64)
+        dest_pos = np.asarray(dest_pos, dtype=np.float64)
 
-    def is_at_end_point(self):
-        """
-        Checks if the current point is the last one.
-        """
-        return self._pointer == (self._num_points - 1)
+        # Same axle convention as PurePursuitPathTracker.on_step (front and rear are swapped).
+        lookahead = dest_pos - front_axle_pos
+        forward = rear_axle_pos - front_axle_pos
 
-    def reset(self):
-        """
-        Resets current point to the first one.
-        """
-        self._pointer = 0
+        lookahead_dist = np.sqrt(np.einsum("ij,ij->i", lookahead, lookahead))
+        forward_dist = np.sqrt(np.einsum("ij,ij->i", forward, forward))
+        if self._debug_enabled:
+            if np.any(lookahead_dist == 0.0) or np.any(forward_dist == 0.0):
+                raise Exception("Pure pursuit aglorithm: invalid state")
 
-    def set_close_loop(self, flag):
-        self._close_loop = flag
+        # Signed angle alpha between lookahead and forward vectors in XZ plane,
+        # /!\ left-handed rotation assumed.
+        lx = lookahead[:, 0] / lookahead_dist
+        lz = lookahead[:, 2] / lookahead_dist
+        fx = forward[:, 0] / forward_dist
+        fz = forward[:, 2] / forward_dist
+        alpha = np.arctan2(lx * fz - lz * fx, lx * fx + lz * fz)
+
+        theta = np.arctan(2.0 * forward_dist * np.sin(alpha) / lookahead_dist)
+
+        max_steer_angle_radians = self._max_steer_angle_radians
+        if indices is not None and max_steer_angle_radians.ndim > 0:
+            max_steer_angle_radians = max_steer_angle_radians[indices]
+        return np.clip(theta / max_steer_angle_radians, -1.0, 1.0)
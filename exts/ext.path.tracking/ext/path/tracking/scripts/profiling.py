@@ -0,0 +1,261 @@
+import enum
+import json
+import threading
+import time
+
+"""
+    Note: timings are collected only while profiling is enabled, e.g. through
+    the `/exts/ext.path.tracking/profiling/enabled` carb setting. Instrumented
+    code keeps a StepTimings reference which is None when profiling is disabled.
+
+        from ext.path.tracking import get_step_profiler
+        get_step_profiler().snapshot()
+
+"""
+
+# ======================================================================================================================
+#
+# StepPhase
+#
+# ======================================================================================================================
+
+
+class StepPhase(enum.IntEnum):
+    POSE_READ = 0
+    TARGET_SEARCH = 1
+    STEERING = 2
+    CONTROL_WRITE = 3
+    DEBUG_DRAW = 4
+    # Whole step as seen by SimStepTracker/SimStepDispatcher.
+    TOTAL = 5
+
+# ======================================================================================================================
+#
+# TimingHistogram
+#
+# ======================================================================================================================
+
+
+class TimingHistogram():
+    """
+    Fixed-size log-linear histogram of durations in nanoseconds: each power
+    of two is split into 4 buckets, so relative error of the percentiles is
+    below 25%. Durations beyond the last bucket (~18 minutes) are clamped.
+    """
+
+    NUM_BUCKETS = 164
+
+    __slots__ = ("_counts", "_count", "_total_ns", "_max_ns")
+
+    def __init__(self):
+        self._counts = [0] * self.NUM_BUCKETS
+        self._count = 0
+        self._total_ns = 0
+        self._max_ns = 0
+
+    @staticmethod
+    def bucket_index(duration_ns):
+        bits = duration_ns.bit_length()
+        if bits <= 3:
+            return duration_ns
+        index = ((bits - 3) << 2) + (duration_ns >> (bits - 3))
+        return index if index < TimingHistogram.NUM_BUCKETS else TimingHistogram.NUM_BUCKETS - 1
+
+    @staticmethod
+    def bucket_lower_bound(index):
+        if index < 8:
+            return index
+        bits = (index >> 2) + 2
+        return ((index & 3) + 4) << (bits - 3)
+
+    def add(self, duration_ns):
+        # Same as bucket_index(), inlined as it is called on every instrumented phase.
+        bits = duration_ns.bit_length()
+        if bits <= 3:
+            index = duration_ns
+        else:
+            index = ((bits - 3) << 2) + (duration_ns >> (bits - 3))
+            if index >= self.NUM_BUCKETS:
+                index = self.NUM_BUCKETS - 1
+        self._counts[index] += 1
+        self._count += 1
+        self._total_ns += duration_ns
+        if duration_ns > self._max_ns:
+            self._max_ns = duration_ns
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def total_ns(self):
+        return self._total_ns
+
+    @property
+    def max_ns(self):
+        return self._max_ns
+
+    def percentile(self, q):
+        """
+        Estimated duration in nanoseconds below which `q` percent of samples fall.
+        """
+        if self._count == 0:
+            return 0.0
+        rank = q / 100.0 * self._count
+        cumulative = 0
+        for index, count in enumerate(self._counts):
+            cumulative += count
+            if count and cumulative >= rank:
+                lower = self.bucket_lower_bound(index)
+                upper = self.bucket_lower_bound(index + 1)
+                return min(0.5 * (lower + upper), float(self._max_ns))
+        return float(self._max_ns)
+
+    def reset(self):
+        self._counts = [0] * self.NUM_BUCKETS
+        self._count = 0
+        self._total_ns = 0
+        self._max_ns = 0
+
+    def summary(self, include_buckets=False):
+        summary = {
+            "count": self._count,
+            "total_us": self._total_ns / 1e3,
+            "mean_us": self._total_ns / self._count / 1e3 if self._count else 0.0,
+            "max_us": self._max_ns / 1e3,
+            "p50_us": self.percentile(50) / 1e3,
+            "p90_us": self.percentile(90) / 1e3,
+            "p99_us": self.percentile(99) / 1e3,
+        }
+        if include_buckets:
+            # Non-empty buckets as [lower bound in ns, count] pairs.
+            summary["buckets"] = [
+                [self.bucket_lower_bound(index), count] for index, count in enumerate(self._counts) if count
+            ]
+        return summary
+
+# ======================================================================================================================
+#
+# StepTimings
+#
+# ======================================================================================================================
+
+
+class StepTimings():
+    """
+    Per-phase timing histograms of a single scenario (or other step participant).
+    """
+
+    __slots__ = ("_name", "_histograms")
+
+    def __init__(self, name):
+        self._name = name
+        self._histograms = [TimingHistogram() for _ in StepPhase]
+
+    @property
+    def name(self):
+        return self._name
+
+    def record(self, phase, start_ns):
+        """
+        Records time elapsed since `start_ns` for a phase and returns current
+        time, i.e. start of the next phase.
+        """
+        now = time.perf_counter_ns()
+        self._histograms[phase].add(now - start_ns)
+        return now
+
+    def histogram(self, phase):
+        return self._histograms[phase]
+
+    def reset(self):
+        for histogram in self._histograms:
+            histogram.reset()
+
+    def snapshot(self, include_buckets=False):
+        return {
+            phase.name.lower(): self._histograms[phase].summary(include_buckets)
+            for phase in StepPhase if self._histograms[phase].count
+        }
+
+# ======================================================================================================================
+#
+# StepProfiler
+#
+# ======================================================================================================================
+
+
+class StepProfiler():
+    """
+    Owns StepTimings of all the instrumented scenarios, keyed by name.
+    """
+
+    def __init__(self, enabled=False):
+        self._enabled = enabled
+        self._timings = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    def set_enabled(self, flag):
+        self._enabled = bool(flag)
+
+    def timings(self, name):
+        """
+        StepTimings registered under a name, created on first request.
+        Returns None when profiling is disabled.
+        """
+        if not self._enabled:
+            return None
+        with self._lock:
+            timings = self._timings.get(name)
+            if timings is None:
+                timings = StepTimings(name)
+                self._timings[name] = timings
+            return timings
+
+    def names(self):
+        with self._lock:
+            return list(self._timings.keys())
+
+    def reset(self):
+        with self._lock:
+            for timings in self._timings.values():
+                timings.reset()
+
+    def clear(self):
+        with self._lock:
+            self._timings.clear()
+
+    def snapshot(self, include_buckets=False):
+        """
+        Returns `{name: {phase: summary}}` with count, total, mean, max and
+        percentile durations in microseconds of each recorded phase.
+        """
+        with self._lock:
+            timings = list(self._timings.values())
+        return {t.name: t.snapshot(include_buckets) for t in timings}
+
+    def export(self, path):
+        """
+        Writes a snapshot including histogram buckets to a JSON file.
+        """
+        data = {
+            "enabled": self._enabled,
+            "timestamp": time.time(),
+            "timings": self.snapshot(include_buckets=True),
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+_step_profiler = StepProfiler()
+
+
+def get_step_profiler():
+    """
+    Returns the process-wide StepProfiler used by the extension.
+    """
+    return _step_profiler
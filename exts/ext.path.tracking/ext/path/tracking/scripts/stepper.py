@@ -1,12 +1,20 @@
-import omni.kit
-import omni.physx
-import omni.usd
-import omni.timeline
+try:
+    import omni.kit
+    import omni.physx
+    import omni.usd
+    import omni.timeline
 
-from omni.physx.bindings._physx import SimulationEvent
+    from omni.physx.bindings._physx import SimulationEvent
+except ImportError:
+    # Kit and USD modules are not available when running headless (see headless.py).
+    pass
 
 import math
 import threading
+import time
+import numpy as np
+
+from .profiling import StepPhase
 
 """
 Based on Nvidia's sample from omni.physx.vehicle Physics extension.
@@ -22,10 +30,22 @@ Based on Nvidia's sample from omni.physx.vehicle Physics extension.
 class Scenario:
     def __init__(self, secondsToRun, timeStep=1.0 / 60.0):
         self._targetIterationCount = math.ceil(secondsToRun / timeStep)
+        # Scenario is evaluated once per time step (or on every physics step if it is shorter),
+        # control inputs are held in between.
+        self._controlPeriod = timeStep
+        # Optional StepTimings, set while profiling is enabled (see profiling.py).
+        self._timings = None
 
     def get_iteration_count(self):
         return self._targetIterationCount
 
+    @property
+    def control_period(self):
+        return self._controlPeriod
+
+    def set_timings(self, timings):
+        self._timings = timings
+
     # override in subclass as needed
     def on_start(self):
         pass
@@ -36,6 +56,69 @@ class Scenario:
     def on_step(self, deltaTime, totalTime):
         pass
 
+# ======================================================================================================================
+#
+# ControlScheduler
+#
+# ======================================================================================================================
+
+
+class ControlScheduler:
+    """
+    Multi-rate scheduler of scenario evaluations: each client is due once per
+    its control period (on every step if the period is shorter than a step).
+    Clients are staggered across the period, so that evaluations of many
+    clients with the same period are spread evenly over steps.
+    """
+
+    # Fractional parts of multiples of the golden ratio spread phases evenly for any number of clients.
+    _PHASE_STEP = 0.6180339887498949
+
+    def __init__(self, periods, phase_index=0):
+        self._periods = np.asarray(periods, dtype=np.float64).reshape(-1)
+        self._phase_index = phase_index
+        self.reset()
+
+    def reset(self, periods=None):
+        """
+        Restarts scheduling from the initial phases, optionally with new periods.
+        """
+        if periods is not None:
+            self._periods = np.asarray(periods, dtype=np.float64).reshape(-1)
+        phases = ((self._phase_index + np.arange(len(self._periods))) * self._PHASE_STEP) % 1.0
+        # Time until the next evaluation of each client.
+        self._remaining = phases * self._periods
+        # Time since the last evaluation of each client (or the start).
+        self._elapsed = np.zeros(len(self._periods))
+
+    @property
+    def periods(self):
+        return self._periods
+
+    def set_period(self, index, period):
+        """
+        Changes period of a client, starting with its current interval.
+        """
+        self._remaining[index] = max(self._remaining[index] + period - self._periods[index], 0.0)
+        self._periods[index] = period
+
+    def step(self, dt):
+        """
+        Advances time by `dt` and returns `(indices, elapsed)`: indices of the
+        clients due on this step and time since their previous evaluation.
+        """
+        remaining = self._remaining
+        remaining -= dt
+        self._elapsed += dt
+        # Tolerance avoids skipping a step due to rounding when the period is a multiple of dt.
+        indices = np.flatnonzero(remaining <= 1e-9)
+        due_elapsed = self._elapsed[indices]
+        self._elapsed[indices] = 0.0
+        # Next evaluation is a period after this one, evaluations missed when
+        # the period is shorter than a step are dropped.
+        remaining[indices] = np.maximum(remaining[indices] + self._periods[indices], 0.0)
+        return indices, due_elapsed
+
 # ======================================================================================================================
 #
 # SimStepTracker
@@ -44,24 +127,44 @@ class Scenario:
 
 
 class SimStepTracker:
-    def __init__(self, scenario, scenarioDoneSignal):
+    def __init__(self, scenario, scenarioDoneSignal, dispatcher=None):
         self._scenario = scenario
         self._targetIterationCount = scenario.get_iteration_count()
         self._scenarioDoneSignal = scenarioDoneSignal
+        # When a shared dispatcher is given, simulation and physics step events
+        # are received through it instead of own subscriptions.
+        self._dispatcher = dispatcher
+        # Trackers sharing a dispatcher evaluate their scenarios on staggered steps.
+        phase_index = dispatcher.num_trackers if dispatcher is not None else 0
+        self._controlScheduler = ControlScheduler([scenario.control_period], phase_index)
 
         self._physx = omni.physx.get_physx_interface()
-        self._physxSimEventSubscription = self._physx.get_simulation_event_stream_v2().create_subscription_to_pop(
-            self._on_simulation_event
-        )
+        if self._dispatcher is not None:
+            self._physxSimEventSubscription = None
+            self._dispatcher.register_tracker(self)
+        else:
+            self._physxSimEventSubscription = self._physx.get_simulation_event_stream_v2().create_subscription_to_pop(
+                self._on_simulation_event
+            )
 
         self._hasStarted = False
         self._resetOnNextResume = False
+        self._timings = None
+
+    def set_timings(self, timings):
+        """
+        Records scenario step time into the given StepTimings, or stops recording if None.
+        """
+        self._timings = timings
 
     def abort(self):
         if self._hasStarted:
             self._on_stop()
 
         self._physxSimEventSubscription = None
+        if self._dispatcher is not None:
+            self._dispatcher.unregister_tracker(self)
+            self._dispatcher = None
 
         self._physx = (
             None
@@ -81,25 +184,28 @@ class SimStepTracker:
         self._physxStepEventSubscription = None  # should unsubscribe automatically
         self._scenario.on_end()
 
+    def _start(self):
+        self._scenario.on_start()
+        self._iterationCount = 0
+        self._totalTime = 0
+        self._controlScheduler.reset([self._scenario.control_period])
+        self._hasStarted = True
+
     def _on_simulation_event(self, event):
         if event.type == int(SimulationEvent.RESUMED):
             if not self._hasStarted:
-                self._scenario.on_start()
-                self._iterationCount = 0
-                self._totalTime = 0
-                self._physxStepEventSubscription = self._physx.subscribe_physics_step_events(self._on_physics_step)
-                self._hasStarted = True
+                if self._dispatcher is None:
+                    self._physxStepEventSubscription = self._physx.subscribe_physics_step_events(
+                        self._on_physics_step
+                    )
+                self._start()
             elif self._resetOnNextResume:
                 self._resetOnNextResume = False
 
                 # the simulation step callback is still registered and should remain so, thus no unsubscribe
                 self._hasStarted = False
                 self._scenario.on_end()
-
-                self._scenario.on_start()
-                self._iterationCount = 0
-                self._totalTime = 0
-                self._hasStarted = True
+                self._start()
         # elif event.type == int(SimulationEvent.PAUSED):
         #     self._on_pause()
         elif event.type == int(SimulationEvent.STOPPED):
@@ -110,30 +216,196 @@ class SimStepTracker:
             pass
 
             if self._iterationCount < self._targetIterationCount:
-                self._scenario.on_step(dt, self._totalTime)
-                self._iterationCount += 1
+                # Scenario is evaluated at its own control rate, not on every physics step.
+                due, elapsed = self._controlScheduler.step(dt)
+                if len(due):
+                    timings = self._timings
+                    if timings is None:
+                        self._scenario.on_step(elapsed[0], self._totalTime)
+                    else:
+                        start = time.perf_counter_ns()
+                        self._scenario.on_step(elapsed[0], self._totalTime)
+                        timings.record(StepPhase.TOTAL, start)
+                    # Scenario may change its control period, e.g. with level of detail (see lod.py).
+                    if self._scenario.control_period != self._controlScheduler.periods[0]:
+                        self._controlScheduler.set_period(0, self._scenario.control_period)
+                    self._iterationCount += 1
                 self._totalTime += dt
             else:
                 self._scenarioDoneSignal.set()
 
 # ======================================================================================================================
 #
-# StageEventListener
+# SimStepDispatcher
 #
 # ======================================================================================================================
 
 
-class StageEventListener:
-    def __init__(self, simStepTracker):
-        self._simStepTracker = simStepTracker
+class SimStepDispatcher:
+    """
+    Owns a single simulation event, physics step and stage event subscription
+    and forwards every event to all registered SimStepTracker-s and
+    StageEventListener-s in registration order. Sharing one dispatcher across
+    scenarios avoids one Python callback per scenario on every physics step.
+    """
+
+    def __init__(self):
+        self._trackers = []
+        self._stage_event_listeners = []
+        # Called after all the trackers were stepped, e.g. to commit batched control writes.
+        self._post_step_callbacks = []
+        # Optional StepTimings of whole physics steps and post-step callbacks.
+        self._timings = None
+        # Simulation time since the last resume.
+        self._total_time = 0.0
+        # Set while physics is stepped manually (see batch.py), simulation events are ignored then.
+        self._manual_stepping = False
+
+        self._physx = omni.physx.get_physx_interface()
+        self._physxSimEventSubscription = self._physx.get_simulation_event_stream_v2().create_subscription_to_pop(
+            self._on_simulation_event
+        )
+        self._physxStepEventSubscription = None
         self._stageEventSubscription = (
             omni.usd.get_context().get_stage_event_stream().create_subscription_to_pop(self._on_stage_event)
         )
+
+    def teardown(self):
+        self._physxStepEventSubscription = None
+        self._physxSimEventSubscription = None
+        self._stageEventSubscription = None
+        self._trackers.clear()
+        self._stage_event_listeners.clear()
+        self._post_step_callbacks.clear()
+        self._physx = None
+
+    def set_timings(self, timings):
+        self._timings = timings
+
+    @property
+    def total_time(self):
+        return self._total_time
+
+    @property
+    def num_trackers(self):
+        return len(self._trackers)
+
+    @property
+    def is_running(self):
+        """
+        True while physics steps are dispatched, from resume to stop or during manual stepping.
+        """
+        return self._manual_stepping or self._physxStepEventSubscription is not None
+
+    def register_tracker(self, tracker):
+        self._trackers.append(tracker)
+
+    def unregister_tracker(self, tracker):
+        if tracker in self._trackers:
+            self._trackers.remove(tracker)
+
+    def register_post_step_callback(self, callback):
+        self._post_step_callbacks.append(callback)
+
+    def unregister_post_step_callback(self, callback):
+        if callback in self._post_step_callbacks:
+            self._post_step_callbacks.remove(callback)
+
+    def register_stage_event_listener(self, listener):
+        self._stage_event_listeners.append(listener)
+
+    def unregister_stage_event_listener(self, listener):
+        if listener in self._stage_event_listeners:
+            self._stage_event_listeners.remove(listener)
+
+    def start_manual_stepping(self):
+        """
+        Starts all the registered trackers without a simulation event, in
+        order to step them with step() instead of physics step events.
+        """
+        self._manual_stepping = True
+        self._physxStepEventSubscription = None
+        self._total_time = 0.0
+        for tracker in list(self._trackers):
+            if not tracker._hasStarted:
+                tracker._start()
+
+    def step(self, dt):
+        """
+        Steps all the registered trackers and post-step callbacks once, as on a physics step event.
+        """
+        self._on_physics_step(dt)
+
+    def stop_manual_stepping(self):
+        for tracker in list(self._trackers):
+            if tracker._hasStarted:
+                tracker._on_stop()
+        self._manual_stepping = False
+
+    def _on_simulation_event(self, event):
+        if self._manual_stepping:
+            return
+        for tracker in list(self._trackers):
+            tracker._on_simulation_event(event)
+
+        if event.type == int(SimulationEvent.RESUMED):
+            if self._physxStepEventSubscription is None:
+                self._total_time = 0.0
+                self._physxStepEventSubscription = self._physx.subscribe_physics_step_events(self._on_physics_step)
+        elif event.type == int(SimulationEvent.STOPPED):
+            self._physxStepEventSubscription = None  # should unsubscribe automatically
+
+    def _on_physics_step(self, dt):
+        self._total_time += dt
+        # Iterating copies, as trackers and callbacks may unregister while being stepped.
+        timings = self._timings
+        if timings is None:
+            for tracker in list(self._trackers):
+                tracker._on_physics_step(dt)
+            for callback in list(self._post_step_callbacks):
+                callback()
+            return
+
+        step_start = time.perf_counter_ns()
+        for tracker in list(self._trackers):
+            tracker._on_physics_step(dt)
+        start = time.perf_counter_ns()
+        for callback in list(self._post_step_callbacks):
+            callback()
+        # Post-step callbacks are mostly batched control writes (see ControlCommitter).
+        timings.record(StepPhase.CONTROL_WRITE, start)
+        timings.record(StepPhase.TOTAL, step_start)
+
+    def _on_stage_event(self, event):
+        for listener in list(self._stage_event_listeners):
+            listener._on_stage_event(event)
+
+# ======================================================================================================================
+#
+# StageEventListener
+#
+# ======================================================================================================================
+
+
+class StageEventListener:
+    def __init__(self, simStepTracker, dispatcher=None):
+        self._simStepTracker = simStepTracker
+        self._dispatcher = dispatcher
+        if self._dispatcher is not None:
+            self._stageEventSubscription = None
+            self._dispatcher.register_stage_event_listener(self)
+        else:
+            self._stageEventSubscription = (
+                omni.usd.get_context().get_stage_event_stream().create_subscription_to_pop(self._on_stage_event)
+            )
         self._stageIsClosing = False
         self.restart_after_stop = False
 
     def cleanup(self):
         self._stageEventSubscription = None
+        if self._dispatcher is not None:
+            self._dispatcher.unregister_stage_event_listener(self)
+            self._dispatcher = None
 
     def is_stage_closing(self):
         return self._stageIsClosing
@@ -164,19 +436,27 @@ class StageEventListener:
 
 
 class ScenarioManager:
-    def __init__(self, scenario):
+    def __init__(self, scenario, dispatcher=None):
         self._scenario = scenario
+        self._dispatcher = dispatcher
         self._setup(scenario)
 
     def _setup(self, scenario):
         self._init_done = False
         scenarioDoneSignal = threading.Event()
-        self._simStepTracker = SimStepTracker(scenario, scenarioDoneSignal)
-        self._stageEventListener = StageEventListener(self._simStepTracker)
+        self._simStepTracker = SimStepTracker(scenario, scenarioDoneSignal, self._dispatcher)
+        self._stageEventListener = StageEventListener(self._simStepTracker, self._dispatcher)
 
     def stop_scenario(self):
         self._stageEventListener._stop()
 
+    def set_timings(self, timings):
+        """
+        Records step timings of the managed scenario into the given StepTimings, or stops recording if None.
+        """
+        self._scenario.set_timings(timings)
+        self._simStepTracker.set_timings(timings)
+
     def cleanup(self):
         self._stageEventListener.cleanup()
         self._simStepTracker.abort()
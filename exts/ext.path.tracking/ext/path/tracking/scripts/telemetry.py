@@ -0,0 +1,203 @@
+import json
+import os
+import numpy as np
+
+"""
+    Note: FleetTelemetry keeps the last `capacity` steps of every vehicle in a
+    preallocated structured array. Vehicles are evaluated at their control
+    rate (see ControlScheduler), and their values are held on the steps in
+    between. Per-step writes go to precomputed field views, so recording does
+    not allocate. Older steps can be appended to a file on disk and analysed
+    offline as a memory-mapped array:
+
+        data, metadata = load_telemetry("run.telemetry")
+        data["cross_track_error"][:, vehicle_index]
+
+"""
+
+TELEMETRY_DTYPE = np.dtype([
+    ("step", np.int64),
+    ("time", np.float64),
+    # True if the vehicle was evaluated on this step, otherwise values are held from the previous step.
+    ("updated", np.bool_),
+    # False if the vehicle is not tracking the trajectory (e.g. destination reached) or not evaluated yet.
+    ("controlled", np.bool_),
+    # Vehicle position in stage units.
+    ("x", np.float32),
+    ("z", np.float32),
+    # Meters per second.
+    ("speed", np.float32),
+    # Steering value in range [-1, 1], negative steers left.
+    ("steer", np.float32),
+    ("accelerator", np.float32),
+    ("brake", np.float32),
+    ("target_index", np.int32),
+    # Meters.
+    ("distance_to_target", np.float32),
+    # Signed distance to the trajectory in meters, positive when the vehicle is left of it.
+    ("cross_track_error", np.float32),
+])
+
+# ======================================================================================================================
+#
+# FleetTelemetry
+#
+# ======================================================================================================================
+
+
+class FleetTelemetry():
+    """
+    Per-step telemetry ring buffer of a fleet, shaped (capacity, num_vehicles).
+    Vehicles write to their own slot of the current row with record(), and
+    end_step() moves to the next row once every vehicle was stepped.
+    If `path` is given, rows are appended to that file before being overwritten.
+    """
+
+    def __init__(self, num_vehicles, capacity=4096, path=None, vehicle_names=None):
+        self._num_vehicles = num_vehicles
+        self._capacity = max(1, int(capacity))
+        # One extra row for the step in progress, so that `capacity` completed steps are kept.
+        self._num_rows = self._capacity + 1
+        self._buffer = np.zeros((self._num_rows, num_vehicles), dtype=TELEMETRY_DTYPE)
+        self._step_col = self._buffer["step"]
+        self._time_col = self._buffer["time"]
+        self._updated_col = self._buffer["updated"]
+        self._controlled_col = self._buffer["controlled"]
+        self._x_col = self._buffer["x"]
+        self._z_col = self._buffer["z"]
+        self._speed_col = self._buffer["speed"]
+        self._steer_col = self._buffer["steer"]
+        self._accelerator_col = self._buffer["accelerator"]
+        self._brake_col = self._buffer["brake"]
+        self._target_index_col = self._buffer["target_index"]
+        self._distance_to_target_col = self._buffer["distance_to_target"]
+        self._cross_track_error_col = self._buffer["cross_track_error"]
+        # Ring buffer row of the current step and number of completed steps.
+        self._row = 0
+        self._step = 0
+        # Number of completed steps already written to the file.
+        self._flushed_steps = 0
+        self._path = path
+        self._file = None
+        if path is not None:
+            self._file = open(path, "wb")
+            with open(path + ".json", "w") as f:
+                json.dump({
+                    "dtype": TELEMETRY_DTYPE.descr,
+                    "num_vehicles": num_vehicles,
+                    "vehicle_names": list(vehicle_names) if vehicle_names is not None else None,
+                }, f, indent=2)
+
+    @property
+    def num_vehicles(self):
+        return self._num_vehicles
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def num_steps(self):
+        """
+        Number of completed steps, including the ones no longer in the buffer.
+        """
+        return self._step
+
+    @property
+    def path(self):
+        return self._path
+
+    def record(self, slot, x, z, speed, steer, accelerator, brake, target_index, distance_to_target,
+               cross_track_error, controlled=True):
+        row = self._row
+        self._updated_col[row, slot] = True
+        self._controlled_col[row, slot] = controlled
+        self._x_col[row, slot] = x
+        self._z_col[row, slot] = z
+        self._speed_col[row, slot] = speed
+        self._steer_col[row, slot] = steer
+        self._accelerator_col[row, slot] = accelerator
+        self._brake_col[row, slot] = brake
+        self._target_index_col[row, slot] = target_index
+        self._distance_to_target_col[row, slot] = distance_to_target
+        self._cross_track_error_col[row, slot] = cross_track_error
+
+    def end_step(self, time):
+        """
+        Completes the current step, stamping it with the simulation time.
+        """
+        row = self._row
+        self._step_col[row] = self._step
+        self._time_col[row] = time
+        self._step += 1
+        self._row = row + 1 if row + 1 < self._num_rows else 0
+        if self._file is not None and self._step - self._flushed_steps >= self._capacity:
+            self.flush()
+        # Vehicles not evaluated on the next step keep their values.
+        self._buffer[self._row] = self._buffer[row]
+        self._updated_col[self._row] = False
+
+    def _ring_rows(self, first_step, last_step):
+        """
+        Contiguous (start, stop) buffer row ranges holding completed steps [first_step, last_step).
+        """
+        start = first_step % self._num_rows
+        count = last_step - first_step
+        if start + count <= self._num_rows:
+            return [(start, start + count)]
+        return [(start, self._num_rows), (0, start + count - self._num_rows)]
+
+    def flush(self):
+        """
+        Appends completed steps not yet written to the file.
+        """
+        if self._file is None:
+            return
+        first_step = max(self._flushed_steps, self._step - self._capacity)
+        for start, stop in self._ring_rows(first_step, self._step):
+            self._buffer[start:stop].tofile(self._file)
+        self._file.flush()
+        self._flushed_steps = self._step
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def last_step(self):
+        """
+        View of the last completed step, shaped (num_vehicles,). Overwritten by later steps.
+        """
+        return self._buffer[self._row - 1 if self._row > 0 else self._num_rows - 1]
+
+    def latest(self, num_steps=None):
+        """
+        Copy of the last `num_steps` completed steps (all buffered by default),
+        oldest first, shaped (num_steps, num_vehicles).
+        """
+        available = min(self._step, self._capacity)
+        num_steps = available if num_steps is None else min(num_steps, available)
+        rows = self._ring_rows(self._step - num_steps, self._step)
+        return np.concatenate([self._buffer[start:stop] for start, stop in rows])
+
+    def clear(self):
+        self._buffer[:] = 0
+        self._row = 0
+        self._step = 0
+        self._flushed_steps = 0
+
+
+def load_telemetry(path):
+    """
+    Memory-maps a telemetry file written by FleetTelemetry.
+    Returns `(data, metadata)`, with data shaped (num_steps, num_vehicles).
+    """
+    with open(path + ".json") as f:
+        metadata = json.load(f)
+    dtype = np.dtype([tuple(field) for field in metadata["dtype"]])
+    num_vehicles = metadata["num_vehicles"]
+    if os.path.getsize(path) == 0:
+        return np.zeros((0, num_vehicles), dtype=dtype), metadata
+    data = np.memmap(path, dtype=dtype, mode="r")
+    return data.reshape(-1, num_vehicles), metadata
@@ -0,0 +1,143 @@
+import math
+import numpy as np
+
+"""
+    Note: FleetTrails keeps positions of every vehicle over the last
+    `duration` seconds in a preallocated ring buffer, so memory use does not
+    grow with the length of a run. Scenarios hand over the position of their
+    latest pose snapshot, and positions of the whole fleet are sampled at once
+    every `sample_period` seconds. Trails are drawn by a DebugOverlay, with
+    long trails decimated to `max_segments` segments per vehicle:
+
+        get_debug_overlay().add_renderer(trails)
+
+"""
+
+# ======================================================================================================================
+#
+# FleetTrails
+#
+# ======================================================================================================================
+
+
+class FleetTrails():
+    """
+    Position history of a fleet, shaped (capacity, num_vehicles, 3).
+    Vehicles write their current position to their own slot with record(),
+    and end_step() samples all of them into the next row once per sample period.
+    """
+
+    def __init__(self, num_vehicles, duration=30.0, sample_period=0.1, max_segments=100):
+        self._num_vehicles = num_vehicles
+        self._sample_period = sample_period
+        self._capacity = max(2, int(math.ceil(duration / sample_period)))
+        # Vehicles without a recorded position are NaN, and are not drawn.
+        self._positions = np.full((self._capacity, num_vehicles, 3), np.nan, dtype=np.float32)
+        self._current = np.full((num_vehicles, 3), np.nan, dtype=np.float32)
+        # Ring buffer row of the next sample and number of samples taken.
+        self._row = 0
+        self._num_samples = 0
+        self._next_sample_time = 0.0
+        self._last_time = 0.0
+        self._enabled = True
+        self.max_segments = max_segments
+        # Draw buffers: ring buffer rows of drawn samples, their positions and
+        # the segments connecting consecutive samples that have a NaN end.
+        self._draw_rows = np.empty(self._capacity + 1, dtype=np.int64)
+        self._draw_positions = np.empty_like(self._positions)
+        self._draw_nan = np.empty((self._capacity, num_vehicles), dtype=bool)
+        self._draw_invalid = np.empty((self._capacity - 1, num_vehicles), dtype=bool)
+        self._sample_offsets = np.arange(self._capacity + 1, dtype=np.int64)
+        self.color = 0xFF1E90FF
+        self.width = 2.0
+
+    @property
+    def num_vehicles(self):
+        return self._num_vehicles
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def num_samples(self):
+        """
+        Number of samples taken, including the ones no longer in the buffer.
+        """
+        return self._num_samples
+
+    def record(self, slot, position):
+        current = self._current[slot]
+        current[0] = position[0]
+        current[1] = position[1]
+        current[2] = position[2]
+
+    def end_step(self, time):
+        """
+        Samples current positions of all the vehicles if a sample period passed since the previous sample.
+        """
+        if time < self._last_time:
+            # Simulation was restarted.
+            self.clear()
+        self._last_time = time
+        if time < self._next_sample_time:
+            return
+        self._positions[self._row] = self._current
+        self._row = self._row + 1 if self._row + 1 < self._capacity else 0
+        self._num_samples += 1
+        # Sampling does not drift when steps do not divide the sample period.
+        self._next_sample_time = max(self._next_sample_time + self._sample_period, time)
+
+    def trails(self):
+        """
+        Copy of the buffered samples, oldest first, shaped (num_samples, num_vehicles, 3).
+        """
+        count = min(self._num_samples, self._capacity)
+        if count < self._capacity:
+            return self._positions[:count].copy()
+        return np.concatenate((self._positions[self._row:], self._positions[:self._row]))
+
+    def clear(self):
+        self._positions[:] = np.nan
+        self._current[:] = np.nan
+        self._row = 0
+        self._num_samples = 0
+        self._next_sample_time = 0.0
+        self._last_time = 0.0
+
+    def enable(self, value):
+        self._enabled = value
+
+    def draw(self, overlay):
+        """
+        Adds trails of the whole fleet to a DebugOverlay as a single batch of
+        segments, built in preallocated buffers.
+        """
+        count = min(self._num_samples, self._capacity)
+        if not self._enabled or count < 2:
+            return
+        # Every stride-th sample, oldest first, and always the latest one.
+        stride = max(1, int(math.ceil((count - 1) / max(1, self.max_segments))))
+        num_drawn = (count - 1) // stride + 1
+        rows = self._draw_rows[:num_drawn + 1]
+        np.multiply(self._sample_offsets[:num_drawn + 1], stride, out=rows)
+        rows[num_drawn] = count - 1
+        if rows[num_drawn - 1] != count - 1:
+            num_drawn += 1
+        rows = rows[:num_drawn]
+        if count == self._capacity:
+            # Buffer is full, the oldest sample is at the next row.
+            np.add(rows, self._row, out=rows)
+            np.remainder(rows, self._capacity, out=rows)
+        positions = np.take(self._positions, rows, axis=0, out=self._draw_positions[:num_drawn], mode="clip")
+        starts = positions[:-1].reshape(-1, 3)
+        ends = positions[1:].reshape(-1, 3)
+
+        nan = np.isnan(positions[:, :, 0], out=self._draw_nan[:num_drawn])
+        invalid = np.logical_or(nan[:-1], nan[1:], out=self._draw_invalid[:num_drawn - 1])
+        if invalid.any():
+            # Vehicles without positions yet, rare enough to mask with temporary arrays.
+            drawn = ~invalid.reshape(-1)
+            starts = starts[drawn]
+            ends = ends[drawn]
+        overlay.add_lines(starts, ends, self.color, self.width)
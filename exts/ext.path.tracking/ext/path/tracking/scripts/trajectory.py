@@ -0,0 +1,735 @@
+try:
+    import omni.usd
+    from pxr import Sdf, UsdGeom
+except ImportError:
+    # Kit and USD modules are not available when running headless (see headless.py).
+    pass
+
+import hashlib
+import math
+import numpy as np
+
+# ======================================================================================================================
+#
+# TrajectoryGeometry
+#
+# ======================================================================================================================
+
+
+class TrajectoryGeometry():
+    """
+    Read-only world space points of a BasisCurves prim. A single geometry
+    instance is shared by all the vehicles tracking the same curve.
+    """
+
+    def __init__(self, prim_path, points, key=None, local_points=None, transform=None):
+        self._prim_path = prim_path
+        self._points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 3)
+        self._points.flags.writeable = False
+        # Content key (see TrajectoryGeometry.content_key), None if geometry is not cached.
+        self._key = key
+        # Source curve data the geometry was built from, used for incremental updates.
+        self._local_points = local_points
+        self._transform = transform
+
+        # Cumulative arc length at each point, arc_lengths[0] = 0.
+        segment_lengths = np.linalg.norm(np.diff(self._points, axis=0), axis=1)
+        self._arc_lengths = np.concatenate(([0.0], np.cumsum(segment_lengths)))
+        self._arc_lengths.flags.writeable = False
+        # Length of the segment connecting last point to the first one in a closed loop.
+        self._closing_length = float(np.linalg.norm(self._points[0] - self._points[-1])) if len(self._points) else 0.0
+        # Lazily built SegmentGrid-s and per-point curvatures, keyed by closed loop flag.
+        self._segment_grids = {}
+        self._curvatures = {}
+
+    @property
+    def prim_path(self):
+        return self._prim_path
+
+    @property
+    def points(self):
+        return self._points
+
+    @property
+    def num_points(self):
+        return len(self._points)
+
+    @property
+    def key(self):
+        return self._key
+
+    @property
+    def arc_lengths(self):
+        return self._arc_lengths
+
+    @property
+    def length(self):
+        return float(self._arc_lengths[-1])
+
+    @property
+    def loop_length(self):
+        return self.length + self._closing_length
+
+    def segment_grid(self, close_loop=False):
+        """
+        Spatial index of trajectory segments, built on first use and shared by all the users of the geometry.
+        """
+        grid = self._segment_grids.get(close_loop)
+        if grid is None:
+            grid = SegmentGrid(self._points, close_loop)
+            self._segment_grids[close_loop] = grid
+        return grid
+
+    def curvatures(self, close_loop=False):
+        """
+        Curvature in XZ plane at each point (in 1/stage units): turning angle
+        between adjacent segments over their mean length. Zero at the ends of open curves.
+        Computed on first use and shared by all the users of the geometry.
+        """
+        curvatures = self._curvatures.get(close_loop)
+        if curvatures is None:
+            curvatures = np.zeros(len(self._points))
+            if len(self._points) > 2:
+                points = self._points[:, ::2]
+                nexts = np.roll(points, -1, axis=0)
+                prevs = np.roll(points, 1, axis=0)
+                d_in = points - prevs
+                d_out = nexts - points
+                cross = d_in[:, 0] * d_out[:, 1] - d_in[:, 1] * d_out[:, 0]
+                dot = np.einsum("ij,ij->i", d_in, d_out)
+                lengths = 0.5 * (np.linalg.norm(d_in, axis=1) + np.linalg.norm(d_out, axis=1))
+                angles = np.arctan2(np.abs(cross), dot)
+                curvatures = np.divide(angles, lengths, out=curvatures, where=lengths > 0.0)
+                if not close_loop:
+                    curvatures[0] = 0.0
+                    curvatures[-1] = 0.0
+            curvatures.flags.writeable = False
+            self._curvatures[close_loop] = curvatures
+        return curvatures
+
+    def max_curvature(self, start_s, end_s, close_loop=False):
+        """
+        Max curvature (in 1/stage units) of points between arc lengths `start_s` and `end_s`.
+        """
+        curvatures = self.curvatures(close_loop)
+        if len(curvatures) == 0:
+            return 0.0
+        arc_lengths = self._arc_lengths
+        loop_length = self.loop_length
+        if close_loop and loop_length > 0.0:
+            if end_s - start_s >= loop_length:
+                return float(curvatures.max())
+            start_s = start_s % loop_length
+            end_s = end_s % loop_length
+        first = int(np.searchsorted(arc_lengths, start_s, side="left"))
+        last = int(np.searchsorted(arc_lengths, end_s, side="right"))
+        if close_loop and start_s > end_s:
+            # Range wraps around the start of the loop.
+            curvature = curvatures[first:].max() if first < len(curvatures) else 0.0
+            return float(max(curvature, curvatures[:last].max() if last > 0 else 0.0))
+        return float(curvatures[first:last].max()) if last > first else 0.0
+
+    def index_at(self, s, close_loop=False):
+        """
+        Index of the first point at arc length `s` or further along the curve.
+        """
+        index = int(np.searchsorted(self._arc_lengths, s, side="left"))
+        if index >= len(self._points):
+            return 0 if close_loop else len(self._points)
+        return index
+
+    def point_at(self, s, close_loop=False):
+        """
+        Point at arc length `s` along the curve, linearly interpolated between
+        the points found by bisection in the arc length table.
+        """
+        num_points = len(self._points)
+        if num_points == 0:
+            return None
+        if num_points == 1:
+            return self._points[0].copy()
+
+        length = self.length
+        if close_loop and self.loop_length > 0.0:
+            s = s % self.loop_length
+            if s > length:
+                t = (s - length) / self._closing_length
+                return self._points[-1] + t * (self._points[0] - self._points[-1])
+        else:
+            s = min(max(s, 0.0), length)
+
+        i = min(int(np.searchsorted(self._arc_lengths, s, side="right")) - 1, num_points - 2)
+        segment_length = self._arc_lengths[i + 1] - self._arc_lengths[i]
+        t = (s - self._arc_lengths[i]) / segment_length if segment_length > 0.0 else 0.0
+        return self._points[i] + t * (self._points[i + 1] - self._points[i])
+
+    def updated(self, points, transform, key):
+        """
+        Builds geometry for changed curve data. If only some of the points were
+        moved, only those are transformed to world space, the rest is copied.
+        """
+        if (self._local_points is not None and points.shape == self._local_points.shape
+                and np.array_equal(transform, self._transform)):
+            changed = np.flatnonzero(np.any(points != self._local_points, axis=1))
+            world_points = self._points.copy()
+            world_points[changed] = TrajectoryGeometry.transform_points(points[changed], transform)
+        else:
+            world_points = TrajectoryGeometry.transform_points(points, transform)
+        return TrajectoryGeometry(self._prim_path, world_points, key, points, transform)
+
+    @staticmethod
+    def read_curve(stage, prim_path):
+        """
+        Reads local curve points as (N,3) array and curve's local-to-world
+        transform as (4,4) array. Returns None if there is no BasisCurves prim at the path.
+        """
+        basis_curves = UsdGeom.BasisCurves.Get(stage, prim_path)
+        if not basis_curves:
+            return None
+        points = basis_curves.GetPointsAttr().Get()
+        points = np.array(points if points is not None else [], dtype=np.float64).reshape(-1, 3)
+        cache = UsdGeom.XformCache()
+        transform = np.array(cache.GetLocalToWorldTransform(basis_curves.GetPrim()))
+        return points, transform
+
+    @staticmethod
+    def transform_points(points, transform):
+        """
+        Transforms curve points to world space with a single matrix product.
+        Returns a contiguous (N,3) float array.
+        """
+        # Gf row-vector convention: p' = p * T
+        return np.ascontiguousarray(points @ transform[:3, :3] + transform[3, :3])
+
+    @staticmethod
+    def content_key(prim_path, points, transform):
+        """
+        Key identifying curve content: prim path plus a hash of local points and world transform.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(points.tobytes())
+        digest.update(transform.tobytes())
+        return (str(prim_path), digest.hexdigest())
+
+    @staticmethod
+    def from_prim(stage, prim_path):
+        curve = TrajectoryGeometry.read_curve(stage, prim_path)
+        if curve is None:
+            return TrajectoryGeometry(prim_path, np.empty((0, 3)))
+        points, transform = curve
+        return TrajectoryGeometry(
+            prim_path,
+            TrajectoryGeometry.transform_points(points, transform),
+            TrajectoryGeometry.content_key(prim_path, points, transform),
+            points,
+            transform
+        )
+
+# ======================================================================================================================
+#
+# SegmentGrid
+#
+# ======================================================================================================================
+
+
+class SegmentGrid():
+    """
+    Uniform grid over the ground (XZ) plane bucketing trajectory segments.
+    Answers nearest segment queries by visiting grid cells in rings around the
+    query position, hence the cost does not depend on the number of segments.
+    """
+
+    def __init__(self, points, close_loop=False, cell_size=None):
+        points = np.asarray(points, dtype=np.float64)
+        self._starts = points[:-1]
+        self._ends = points[1:]
+        if close_loop and len(points) > 2:
+            self._starts = np.vstack([self._starts, points[-1:]])
+            self._ends = np.vstack([self._ends, points[:1]])
+        num_segments = len(self._starts)
+
+        # Segment endpoints projected onto XZ plane.
+        a = self._starts[:, [0, 2]]
+        b = self._ends[:, [0, 2]]
+        if cell_size is None and num_segments:
+            # Roughly as many cells as segments, but not much smaller than a segment.
+            extent = np.maximum(a, b).max(axis=0) - np.minimum(a, b).min(axis=0)
+            cell_size = max(
+                float(np.mean(np.linalg.norm(b - a, axis=1))) * 2.0,
+                float(np.sqrt(extent[0] * extent[1] / num_segments))
+            )
+        elif cell_size is None:
+            cell_size = 1.0
+        self._cell_size = max(cell_size, 1e-6)
+
+        lo = np.floor(np.minimum(a, b) / self._cell_size).astype(np.int64)
+        hi = np.floor(np.maximum(a, b) / self._cell_size).astype(np.int64)
+        self._origin = lo.min(axis=0) if num_segments else np.zeros(2, dtype=np.int64)
+        lo -= self._origin
+        hi -= self._origin
+        self._dims = (hi.max(axis=0) + 1) if num_segments else np.ones(2, dtype=np.int64)
+
+        # Insert every segment into all the cells overlapped by its bounding box.
+        span = hi - lo + 1
+        counts = span[:, 0] * span[:, 1]
+        segment_ids = np.repeat(np.arange(num_segments), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        span_x = np.repeat(span[:, 0], counts)
+        cx = np.repeat(lo[:, 0], counts) + local % span_x
+        cz = np.repeat(lo[:, 1], counts) + local // span_x
+        keys = cx * self._dims[1] + cz
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        self._cell_segments = segment_ids[order]
+        self._cell_keys, self._cell_starts = np.unique(keys, return_index=True)
+        self._cell_ends = np.append(self._cell_starts[1:], len(keys))
+
+    @property
+    def num_segments(self):
+        return len(self._starts)
+
+    def _ring_segments(self, cell, ring):
+        """
+        Segments stored in grid cells at Chebyshev distance `ring` from `cell`.
+        """
+        if ring == 0:
+            cells = np.array([cell])
+        else:
+            r = np.arange(-ring, ring + 1)
+            cells = np.concatenate([
+                np.stack([np.full(len(r), -ring), r], axis=1),
+                np.stack([np.full(len(r), ring), r], axis=1),
+                np.stack([r[1:-1], np.full(len(r) - 2, -ring)], axis=1),
+                np.stack([r[1:-1], np.full(len(r) - 2, ring)], axis=1)
+            ]) + cell
+        valid = np.all((cells >= 0) & (cells < self._dims), axis=1)
+        keys = cells[valid, 0] * self._dims[1] + cells[valid, 1]
+        slots = np.minimum(np.searchsorted(self._cell_keys, keys), len(self._cell_keys) - 1)
+        slots = slots[self._cell_keys[slots] == keys]
+        if len(slots) == 0:
+            return np.empty(0, dtype=np.int64)
+        counts = self._cell_ends[slots] - self._cell_starts[slots]
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.unique(self._cell_segments[np.repeat(self._cell_starts[slots], counts) + offsets])
+
+    def nearest_segment(self, position, forward=None):
+        """
+        Finds the segment closest to `position` in XZ plane. If `forward` is given,
+        only segments heading the same way (i.e. ahead of the pose) are considered.
+        Returns a tuple (segment index, segment parameter t in [0, 1], distance), or None.
+        """
+        if self.num_segments == 0:
+            return None
+        p = np.array([position[0], position[2]], dtype=np.float64)
+        heading = None if forward is None else np.array([forward[0], forward[2]], dtype=np.float64)
+        cell = np.floor(p / self._cell_size).astype(np.int64) - self._origin
+        # Rings closer than min_ring or beyond max_ring are outside of the grid.
+        min_ring = int(max(np.max(-cell), np.max(cell - self._dims + 1), 0))
+        max_ring = int(np.max(np.maximum(np.abs(cell), np.abs(cell - self._dims + 1))))
+
+        best = None
+        for ring in range(min_ring, max_ring + 1):
+            # Any segment in cells of this ring or further is at least that far.
+            if best is not None and best[2] <= (ring - 1) * self._cell_size:
+                break
+            candidates = self._ring_segments(cell, ring)
+            if len(candidates) == 0:
+                continue
+            a = self._starts[candidates][:, [0, 2]]
+            d = self._ends[candidates][:, [0, 2]] - a
+            if heading is not None:
+                ahead = d @ heading > 0.0
+                candidates, a, d = candidates[ahead], a[ahead], d[ahead]
+                if len(candidates) == 0:
+                    continue
+            d_sq = np.einsum("ij,ij->i", d, d)
+            t = np.clip(np.einsum("ij,ij->i", p - a, d) / np.where(d_sq > 0.0, d_sq, 1.0), 0.0, 1.0)
+            closest = a + t[:, None] * d
+            distances = np.linalg.norm(closest - p, axis=1)
+            k = int(np.argmin(distances))
+            if best is None or distances[k] < best[2]:
+                best = (int(candidates[k]), float(t[k]), float(distances[k]))
+        return best
+
+# ======================================================================================================================
+#
+# TrajectoryCache
+#
+# ======================================================================================================================
+
+
+class TrajectoryCache():
+    """
+    Shares TrajectoryGeometry across vehicles and scenario restarts. Entries
+    are keyed by curve prim path and validated against a hash of curve points
+    and world transform, hence an outdated entry is never returned.
+    An entry is validated once per stage-change generation: the owner calls
+    invalidate() when USD reports a curve change, and until then lookups
+    return the entry without reading the curve.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._generation = 0
+        self._validated = {}
+        # Paths of cached curves indexed by the paths of their ancestors and themselves.
+        self._curves_under = {}
+
+    def get(self, prim_path, stage=None):
+        """
+        Returns geometry for the curve at the prim path, (re)building it only if the curve content changed.
+        """
+        stage = stage if stage is not None else omni.usd.get_context().get_stage()
+        prim_path = str(prim_path)
+        geometry = self._entries.get(prim_path)
+        validation_key = (id(stage), self._generation)
+        if geometry is not None and self._validated.get(prim_path) == validation_key:
+            return geometry
+
+        curve = TrajectoryGeometry.read_curve(stage, prim_path)
+        if curve is None:
+            self.evict(prim_path)
+            return TrajectoryGeometry(prim_path, np.empty((0, 3)))
+
+        points, transform = curve
+        key = TrajectoryGeometry.content_key(prim_path, points, transform)
+        if geometry is None:
+            geometry = TrajectoryGeometry(
+                prim_path, TrajectoryGeometry.transform_points(points, transform), key, points, transform
+            )
+            self._entries[prim_path] = geometry
+            self._index_ancestors(prim_path)
+        elif geometry.key != key:
+            geometry = geometry.updated(points, transform, key)
+            self._entries[prim_path] = geometry
+        self._validated[prim_path] = validation_key
+        return geometry
+
+    def invalidate(self, prim_path=None):
+        """
+        Makes the next lookup of the curve (of all curves if None) re-read and re-hash it.
+        """
+        if prim_path is None:
+            self._generation += 1
+        else:
+            self._validated.pop(str(prim_path), None)
+
+    def curves_under(self, prim_path):
+        """
+        Sdf.Paths of the cached curves at or under the prim path.
+        """
+        return self._curves_under.get(prim_path, ())
+
+    def contains(self, prim_path):
+        return str(prim_path) in self._entries
+
+    def evict(self, prim_path):
+        prim_path = str(prim_path)
+        if self._entries.pop(prim_path, None) is not None:
+            curve_path = Sdf.Path(prim_path)
+            for ancestor in self._ancestors(curve_path):
+                curves = self._curves_under[ancestor]
+                curves.discard(curve_path)
+                if not curves:
+                    del self._curves_under[ancestor]
+        self._validated.pop(prim_path, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._validated.clear()
+        self._curves_under.clear()
+
+    def _index_ancestors(self, prim_path):
+        curve_path = Sdf.Path(prim_path)
+        for ancestor in self._ancestors(curve_path):
+            self._curves_under.setdefault(ancestor, set()).add(curve_path)
+
+    @staticmethod
+    def _ancestors(curve_path):
+        return list(curve_path.GetAncestorsRange()) + [Sdf.Path.absoluteRootPath]
+
+    def prim_paths(self):
+        return list(self._entries.keys())
+
+    def __len__(self):
+        return len(self._entries)
+
+# ======================================================================================================================
+#
+# Trajectory
+#
+# ======================================================================================================================
+
+
+class Trajectory():
+    """
+    A helper class to access coordinates of points that form a BasisCurve prim.
+    Holds a per-vehicle cursor over a (possibly shared) TrajectoryGeometry.
+    """
+    def __init__(self, prim_path, close_loop=True, geometry=None):
+        if geometry is None:
+            geometry = TrajectoryGeometry.from_prim(omni.usd.get_context().get_stage(), prim_path)
+        self._pointer = 0
+        # Arc length of the current position along the curve.
+        self._s = 0.0
+        self._close_loop = close_loop
+        self.set_geometry(geometry)
+
+    @property
+    def geometry(self):
+        return self._geometry
+
+    def set_geometry(self, geometry):
+        """
+        Switches to updated geometry of the tracked curve, keeping the current point if it still exists.
+        """
+        self._geometry = geometry
+        self._points = geometry.points
+        self._num_points = geometry.num_points
+        # X and Z coordinates of the points and cross_track_error() buffers, built on first use.
+        self._points_x = None
+        self._points_z = None
+        self._cross_track_scratch = None
+        self._pointer = min(self._pointer, self._num_points)
+        self._sync_arc_length()
+
+    def _sync_arc_length(self):
+        if self._pointer < self._num_points:
+            self._s = float(self._geometry.arc_lengths[self._pointer])
+        else:
+            self._s = self._geometry.length if self._num_points else 0.0
+
+    @property
+    def arc_length(self):
+        """
+        Arc length of the current position along the curve.
+        """
+        return self._s
+
+    @property
+    def index(self):
+        """
+        Index of the current point, equal to the number of points at the end of an open trajectory.
+        """
+        return self._pointer
+
+    def point_at(self, s):
+        """
+        Point at arc length `s` along the curve.
+        """
+        return self._geometry.point_at(s, self._close_loop)
+
+    def advance(self, ds):
+        """
+        Moves the current position by `ds` along the curve and returns the point
+        there, or None if moved past the end of an open trajectory.
+        """
+        s = self._s + ds
+        if self._close_loop and self._geometry.loop_length > 0.0:
+            s = s % self._geometry.loop_length
+        elif s > self._geometry.length:
+            self._s = self._geometry.length
+            self._pointer = self._num_points
+            return None
+        self._s = max(s, 0.0)
+        self._pointer = self._geometry.index_at(self._s, self._close_loop)
+        return self.point_at(self._s)
+
+    @property
+    def points(self):
+        """
+        World space trajectory points as read-only (N,3) array.
+        """
+        return self._points
+
+    def point(self):
+        """
+        Returns current point.
+        """
+        return self._points[self._pointer].copy() if self._pointer < self._num_points else None
+
+    def next_point(self):
+        """
+        Next point on the curve.
+        """
+        if (self._pointer < self._num_points):
+            self._pointer = self._pointer + 1
+            if self._pointer >= self._num_points and self._close_loop:
+                self._pointer = 0
+            self._sync_arc_length()
+            return self.point()
+        return None
+
+    def reacquire(self, position, forward=None):
+        """
+        Moves the current position onto the nearest trajectory segment ahead of
+        the given pose (e.g. when a vehicle starts mid-route or was pushed off
+        course). Returns False if there is no such segment.
+        """
+        nearest = self._geometry.segment_grid(self._close_loop).nearest_segment(position, forward)
+        if nearest is None:
+            return False
+        segment, t, _ = nearest
+        arc_lengths = self._geometry.arc_lengths
+        if segment < self._num_points - 1:
+            self._s = float(arc_lengths[segment] + t * (arc_lengths[segment + 1] - arc_lengths[segment]))
+            self._pointer = segment + 1
+        else:
+            # Segment closing the loop.
+            self._s = self._geometry.length + t * (self._geometry.loop_length - self._geometry.length)
+            self._pointer = 0
+        return True
+
+    def find_lookahead_point(self, position, lookahead_distance, window=256):
+        """
+        Advances the current point to the first point at least `lookahead_distance`
+        away from `position`, searching at most `window` points ahead of the
+        current one, and returns the lookahead target. The target is interpolated
+        onto the segment crossing the lookahead distance, if there is one.
+        Returns None once the remaining trajectory is within the lookahead distance
+        (i.e. the destination is reached).
+        """
+        if self._pointer >= self._num_points:
+            return None
+        if self._close_loop:
+            count = min(window, self._num_points)
+            indices = (self._pointer + np.arange(count)) % self._num_points
+        else:
+            count = min(window, self._num_points - self._pointer)
+            indices = self._pointer + np.arange(count)
+
+        position = np.asarray(position, dtype=np.float64)
+        candidates = self._points[indices]
+        offsets = candidates - position
+        distances_sq = np.einsum("ij,ij->i", offsets, offsets)
+        outside = np.flatnonzero(distances_sq >= lookahead_distance * lookahead_distance)
+
+        if len(outside) == 0:
+            if not self._close_loop and self._pointer + count >= self._num_points:
+                self._pointer = self._num_points
+                self._sync_arc_length()
+                return None
+            # Lookahead distance is beyond the search window, track the farthest point searched.
+            self._pointer = int(indices[-1])
+            self._sync_arc_length()
+            return candidates[-1].copy()
+
+        k = outside[0]
+        self._pointer = int(indices[k])
+        self._sync_arc_length()
+        if k == 0:
+            return candidates[0].copy()
+        t = Trajectory._segment_param_at_distance(offsets[k - 1], offsets[k], lookahead_distance)
+        self._s = float(self._geometry.arc_lengths[indices[k - 1]]) + t * np.linalg.norm(offsets[k] - offsets[k - 1])
+        return candidates[k - 1] + t * (candidates[k] - candidates[k - 1])
+
+    def cross_track_error(self, position, window=256):
+        """
+        Signed distance in XZ plane from `position` to the nearest trajectory
+        segment among `window` segments before the current point (i.e. between
+        the vehicle and its lookahead target). Positive when `position` is on
+        the left of the trajectory. Near the start of an open trajectory the
+        window extends ahead of the current point. Computed in preallocated
+        buffers, no arrays are allocated per call.
+        """
+        if self._num_points < 2:
+            return 0.0
+        scratch = self._cross_track_scratch
+        if scratch is None or scratch["window"] != window:
+            scratch = self._create_cross_track_scratch(window)
+        count = scratch["count"]
+        starts = scratch["starts"]
+        ends = scratch["ends"]
+        if self._close_loop:
+            np.add(scratch["offsets"], self._pointer - count, out=starts)
+            np.remainder(starts, self._num_points, out=starts)
+            np.add(starts, 1, out=ends)
+            np.remainder(ends, self._num_points, out=ends)
+        else:
+            end = min(max(self._pointer, count), self._num_points - 1)
+            np.add(scratch["offsets"], end - count, out=starts)
+            np.add(starts, 1, out=ends)
+
+        # Coordinates are kept in separate X and Z arrays, broadcasting (N,2) arrays would buffer a temporary.
+        x = self._points_x
+        z = self._points_z
+        ax = np.take(x, starts, out=scratch["ax"], mode="clip")
+        az = np.take(z, starts, out=scratch["az"], mode="clip")
+        dx = np.take(x, ends, out=scratch["dx"], mode="clip")
+        dz = np.take(z, ends, out=scratch["dz"], mode="clip")
+        np.subtract(dx, ax, out=dx)
+        np.subtract(dz, az, out=dz)
+        px = np.subtract(position[0], ax, out=ax)
+        pz = np.subtract(position[2], az, out=az)
+        tmp = scratch["tmp"]
+        # Parameter of the nearest point on each segment, 0 for degenerate segments.
+        length_sq = np.multiply(dx, dx, out=scratch["length_sq"])
+        length_sq += np.multiply(dz, dz, out=tmp)
+        np.maximum(length_sq, 1e-12, out=length_sq)
+        t = np.multiply(px, dx, out=scratch["t"])
+        t += np.multiply(pz, dz, out=tmp)
+        t /= length_sq
+        np.clip(t, 0.0, 1.0, out=t)
+        # Offsets from the nearest points, in place of px and pz.
+        px -= np.multiply(t, dx, out=tmp)
+        pz -= np.multiply(t, dz, out=tmp)
+        distances_sq = np.multiply(px, px, out=length_sq)
+        distances_sq += np.multiply(pz, pz, out=tmp)
+        k = int(np.argmin(distances_sq))
+        # Left of direction (dx, dz) is (dz, -dx), e.g. +X when heading +Z.
+        side = dz[k] * px[k] - dx[k] * pz[k]
+        distance = math.sqrt(distances_sq[k])
+        return distance if side >= 0.0 else -distance
+
+    def _create_cross_track_scratch(self, window):
+        if self._points_x is None:
+            self._points_x = np.ascontiguousarray(self._points[:, 0])
+            self._points_z = np.ascontiguousarray(self._points[:, 2])
+        num_segments = self._num_points if self._close_loop else self._num_points - 1
+        count = min(window, num_segments)
+        self._cross_track_scratch = {
+            "window": window,
+            "count": count,
+            "offsets": np.arange(count, dtype=np.int64),
+            "starts": np.empty(count, dtype=np.int64),
+            "ends": np.empty(count, dtype=np.int64),
+        }
+        for name in ("ax", "az", "dx", "dz", "length_sq", "t", "tmp"):
+            self._cross_track_scratch[name] = np.empty(count)
+        return self._cross_track_scratch
+
+    @staticmethod
+    def _segment_param_at_distance(inner, outer, distance):
+        """
+        Parameter t in [0, 1] of a segment (given by offsets from a center) where
+        it crosses a sphere of the given radius, with `inner` inside and `outer` outside of it.
+        """
+        d = outer - inner
+        a = np.dot(d, d)
+        b = np.dot(inner, d)
+        c = np.dot(inner, inner) - distance * distance
+        return (-b + np.sqrt(max(b * b - a * c, 0.0))) / a
+
+    def max_curvature(self, distance_behind, distance_ahead):
+        """
+        Max curvature (in 1/stage units) of the trajectory around the current
+        position, from `distance_behind` before to `distance_ahead` after it.
+        """
+        return self._geometry.max_curvature(self._s - distance_behind, self._s + distance_ahead, self._close_loop)
+
+    def is_at_end_point(self):
+        """
+        Checks if the current point is the last one.
+        """
+        return self._pointer == (self._num_points - 1)
+
+    def reset(self):
+        """
+        Resets current point to the first one.
+        """
+        self._pointer = 0
+        self._s = 0.0
+
+    def set_close_loop(self, flag):
+        self._close_loop = flag
+        self._cross_track_scratch = None
@@ -0,0 +1,266 @@
+import argparse
+import concurrent.futures
+import itertools
+import json
+import math
+import os
+import numpy as np
+
+from .headless import HeadlessSimulation, KinematicVehicle, create_headless_scenario
+from .trajectory import TrajectoryGeometry
+
+"""
+    Parameter tuner of PurePursuitScenario: sweeps lookahead distance, max
+    speed and the brake-on-steer threshold over a set of trajectories, runs
+    every configuration as a headless simulation (see headless.py) in a
+    process pool, and ranks configurations by lap time and cross-track error.
+
+        cd exts/ext.path.tracking
+        python -m ext.path.tracking.scripts.tuner --trajectories track.npy --output tuning.json
+
+    Trajectories are (N,3) world space point arrays saved with numpy.save(),
+    e.g. `TrajectoryGeometry.from_prim(stage, curve_path).points`. Built-in
+    sample tracks are used if none are given.
+
+"""
+
+DEFAULT_LOOKAHEAD_DISTANCES = [300.0, 400.0, 550.0, 800.0, 1200.0]
+# Meters per second.
+DEFAULT_MAX_SPEEDS = [5.0, 10.0, 15.0, 20.0]
+DEFAULT_BRAKE_STEER_THRESHOLDS = [0.05, 0.1, 0.2, 0.4]
+
+# ======================================================================================================================
+#
+# TuningTrack
+#
+# ======================================================================================================================
+
+
+class TuningTrack():
+    """
+    A trajectory configurations are evaluated on. Closed tracks are driven
+    for one lap, open ones until their end.
+    """
+
+    def __init__(self, name, points, close_loop=True):
+        self.name = name
+        self.points = np.asarray(points, dtype=np.float64)
+        self.close_loop = close_loop
+
+    @staticmethod
+    def load(path, close_loop=True):
+        return TuningTrack(os.path.splitext(os.path.basename(path))[0], np.load(path), close_loop)
+
+
+def sample_tracks():
+    """
+    Built-in tracks: an oval with long straights and an S-shaped open road.
+    """
+    angles = np.linspace(0.0, 2.0 * math.pi, 720, endpoint=False)
+    x = 6000.0 * np.cos(angles)
+    z = 2500.0 * np.sin(angles)
+    oval = np.stack([x, np.zeros_like(x), z], axis=1)
+
+    z = np.linspace(0.0, 20000.0, 800)
+    x = 1500.0 * np.sin(z / 3000.0)
+    s_curve = np.stack([x, np.zeros_like(x), z], axis=1)
+    return [TuningTrack("oval", oval, True), TuningTrack("s_curve", s_curve, False)]
+
+# ======================================================================================================================
+#
+# Evaluation
+#
+# ======================================================================================================================
+
+
+def evaluate(track, lookahead_distance, max_speed, brake_steer_threshold, time_step=1.0 / 60.0,
+             max_time=600.0, max_cross_track_error=10.0, meters_per_unit=0.01):
+    """
+    Drives a KinematicVehicle with PurePursuitScenario along a track.
+    Returns lap time and cross-track error statistics in seconds and meters.
+    A run fails if the vehicle does not complete the track within `max_time`
+    or gets farther than `max_cross_track_error` from it.
+    """
+    geometry = TrajectoryGeometry(track.name, track.points)
+    start = geometry.points[0]
+    direction = geometry.points[1] - start
+    # Speed is limited by the scenario, not by the vehicle model.
+    vehicle = KinematicVehicle(
+        position=start,
+        heading=math.atan2(direction[0], direction[2]),
+        max_speed=2.0 * max_speed / meters_per_unit
+    )
+    scenario = create_headless_scenario(
+        geometry, lookahead_distance, track.close_loop, vehicle, meters_per_unit
+    )
+    scenario.set_max_speed(max_speed)
+    scenario.set_brake_steer_threshold(brake_steer_threshold)
+    trajectory = scenario.trajectory
+    simulation = HeadlessSimulation([scenario], time_step)
+    simulation.start()
+
+    lap_length = geometry.loop_length if track.close_loop else geometry.length
+    # Progress along the track, unwrapped on closed loops.
+    progress = 0.0
+    last_s = trajectory.arc_length
+    sum_sq_error = 0.0
+    max_error = 0.0
+    num_steps = 0
+    completed = False
+    max_steps = int(max_time / time_step)
+    while num_steps < max_steps:
+        simulation.step()
+        num_steps += 1
+
+        s = trajectory.arc_length
+        ds = s - last_s
+        if track.close_loop and ds < -0.5 * lap_length:
+            ds += lap_length
+        progress += max(ds, 0.0)
+        last_s = s
+
+        position = vehicle.curr_position()
+        error = abs(trajectory.cross_track_error(position)) * meters_per_unit
+        sum_sq_error += error * error
+        max_error = max(max_error, error)
+        if max_error > max_cross_track_error:
+            break
+        # Lookahead target runs ahead of the vehicle, a lap completes when the vehicle passes the start.
+        if track.close_loop:
+            if progress >= lap_length and np.linalg.norm(position - start) < lookahead_distance:
+                completed = True
+                break
+        elif scenario.is_stopped():
+            completed = True
+            break
+
+    return {
+        "completed": completed,
+        "lap_time": num_steps * time_step if completed else float("inf"),
+        "rms_cross_track_error": math.sqrt(sum_sq_error / max(1, num_steps)),
+        "max_cross_track_error": max_error,
+    }
+
+
+def _evaluate_task(task):
+    config, track_index = task
+    return evaluate(_worker_tracks[track_index], **config)
+
+
+_worker_tracks = None
+
+
+def _init_worker(tracks):
+    # Tracks are sent to every worker once instead of with every task.
+    global _worker_tracks
+    _worker_tracks = tracks
+
+# ======================================================================================================================
+#
+# Tuner
+#
+# ======================================================================================================================
+
+
+def parameter_grid(lookahead_distances, max_speeds, brake_steer_thresholds):
+    return [
+        {"lookahead_distance": lookahead, "max_speed": speed, "brake_steer_threshold": threshold}
+        for lookahead, speed, threshold in itertools.product(lookahead_distances, max_speeds, brake_steer_thresholds)
+    ]
+
+
+def score(result, cross_track_weight):
+    """
+    Lower is better: total lap time plus `cross_track_weight` seconds per meter of RMS cross-track error.
+    """
+    return result["lap_time"] + cross_track_weight * result["rms_cross_track_error"]
+
+
+def tune(tracks, configs, max_workers=None, cross_track_weight=10.0, evaluation_args=None):
+    """
+    Evaluates every configuration on every track in a process pool and
+    returns configurations sorted from best to worst with per-track results.
+    Configurations failing on any track are ranked last.
+    """
+    evaluation_args = evaluation_args or {}
+    tasks = [
+        (dict(config, **evaluation_args), track_index)
+        for config in configs
+        for track_index in range(len(tracks))
+    ]
+    if max_workers == 1:
+        _init_worker(tracks)
+        results = [_evaluate_task(task) for task in tasks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers or os.cpu_count(),
+            initializer=_init_worker,
+            initargs=(tracks,)
+        ) as executor:
+            chunksize = max(1, len(tasks) // (4 * (max_workers or os.cpu_count() or 1)))
+            results = list(executor.map(_evaluate_task, tasks, chunksize=chunksize))
+
+    ranking = []
+    num_tracks = len(tracks)
+    for i, config in enumerate(configs):
+        track_results = results[i * num_tracks:(i + 1) * num_tracks]
+        lap_time = sum(result["lap_time"] for result in track_results)
+        rms_error = max(result["rms_cross_track_error"] for result in track_results)
+        total = {"lap_time": lap_time, "rms_cross_track_error": rms_error}
+        ranking.append({
+            "config": config,
+            "completed": all(result["completed"] for result in track_results),
+            "lap_time": lap_time,
+            "rms_cross_track_error": rms_error,
+            "max_cross_track_error": max(result["max_cross_track_error"] for result in track_results),
+            "score": score(total, cross_track_weight),
+            "tracks": {track.name: result for track, result in zip(tracks, track_results)},
+        })
+    ranking.sort(key=lambda entry: (not entry["completed"], entry["score"]))
+    return ranking
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Path tracking parameter tuner")
+    parser.add_argument("--trajectories", nargs="+", help="Paths of (N,3) trajectory point arrays saved as .npy")
+    parser.add_argument("--open", action="store_true", help="Trajectories are open (driven once to their end)")
+    parser.add_argument("--lookahead-distances", type=float, nargs="+", default=DEFAULT_LOOKAHEAD_DISTANCES)
+    parser.add_argument("--max-speeds", type=float, nargs="+", default=DEFAULT_MAX_SPEEDS, help="Meters per second")
+    parser.add_argument("--brake-steer-thresholds", type=float, nargs="+", default=DEFAULT_BRAKE_STEER_THRESHOLDS)
+    parser.add_argument("--cross-track-weight", type=float, default=10.0,
+                        help="Seconds of lap time a meter of RMS cross-track error is worth")
+    parser.add_argument("--max-time", type=float, default=600.0, help="Time limit of a single run in seconds")
+    parser.add_argument("--workers", type=int, help="Number of worker processes, all cores by default")
+    parser.add_argument("--top", type=int, default=10, help="Number of best configurations to print")
+    parser.add_argument("--output", help="Path of JSON file to write the full ranking to")
+    args = parser.parse_args(argv)
+
+    if args.trajectories:
+        tracks = [TuningTrack.load(path, not args.open) for path in args.trajectories]
+    else:
+        tracks = sample_tracks()
+    configs = parameter_grid(args.lookahead_distances, args.max_speeds, args.brake_steer_thresholds)
+    print(f"Evaluating {len(configs)} configurations on {len(tracks)} trajectories...")
+    ranking = tune(
+        tracks, configs, args.workers, args.cross_track_weight, evaluation_args={"max_time": args.max_time}
+    )
+
+    for rank, entry in enumerate(ranking[:args.top]):
+        config = entry["config"]
+        print(
+            f"{rank + 1:>3}. lookahead {config['lookahead_distance']:>7.1f}"
+            f"  max speed {config['max_speed']:>5.1f} m/s"
+            f"  brake steer {config['brake_steer_threshold']:>4.2f}"
+            f"  lap time {entry['lap_time']:>8.2f} s"
+            f"  rms cte {entry['rms_cross_track_error']:>6.3f} m"
+            f"  max cte {entry['max_cross_track_error']:>6.3f} m"
+            f"{'' if entry['completed'] else '  (failed)'}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(ranking, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -126,6 +126,12 @@ class ExtensionUI():
                                 enable_debug_checkbox.model.add_value_changed_fn(
                                     self._controller._changed_enable_debug
                                 )
+                            with ui.HStack(width=width, height=height):
+                                ui.Label("Debug draw trajectories: ")
+                                draw_tracks_checkbox = ui.CheckBox()
+                                draw_tracks_checkbox.model.add_value_changed_fn(
+                                    self._controller._changed_draw_tracks
+                                )
                             ui.Spacer(height=LINE_HEIGHT/4)
                             ui.Label("REFERENCE COORDINATE SYSTEM: Up-axis: Y-axis (fixed)")
                             ui.Spacer(height=LINE_HEIGHT/4)
@@ -224,6 +230,14 @@ class ExtensionUI():
                                 style=IMPORTANT_BUTTON_STYLE
                             )
                             ui.Spacer(height=LINE_HEIGHT/8)
+                            with ui.HStack(height=DEFAULT_BTN_HEIGHT):
+                                # JSON or CSV file of vehicle-to-curve attachments.
+                                self._attachments_file_field = ui.StringField()
+                                ui.Button(
+                                    "Attach from File",
+                                    clicked_fn=self._controller._on_click_attach_from_file
+                                )
+                            ui.Spacer(height=LINE_HEIGHT/8)
                             ui.Button(
                                 "Clear All Attachments",
                                 clicked_fn=self._controller._on_click_clear_attachments
@@ -262,6 +276,7 @@ class ExtensionUI():
         self._settings_frame = None
         self._controls_frame = None
         self._atachments_frame = None
+        self._attachments_file_field = None
         self._window = None
 
     def get_lookahead_distance(self):
@@ -273,6 +288,9 @@ class ExtensionUI():
     def _notify_lookahead_distance_changed(self, model):
         self._controller._on_lookahead_distance_changed(model.as_float)
 
+    def get_attachments_file_path(self):
+        return self._attachments_file_field.model.get_value_as_string().strip()
+
     def update_attachment_info(self, attachments):
         self._attachment_model.attachments_changed(attachments)
         if len(attachments) > 0:
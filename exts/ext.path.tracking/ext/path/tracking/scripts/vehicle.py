@@ -1,6 +1,11 @@
-import omni.usd
 from enum import IntEnum
-from pxr import Gf, Usd, UsdGeom, PhysxSchema
+
+try:
+    import omni.usd
+    from pxr import Gf, Sdf, Usd, UsdGeom, PhysxSchema
+except ImportError:
+    # Kit and USD modules are not available when running headless (see headless.py).
+    pass
 
 import numpy as np
 
@@ -20,6 +25,116 @@ class Wheel(IntEnum):
     REAR_LEFT = 2,
     REAR_RIGHT = 3
 
+
+class ControlInput(IntEnum):
+    STEER_LEFT = 0,
+    STEER_RIGHT = 1,
+    ACCELERATOR = 2,
+    BRAKE = 3
+
+
+_CONTROL_INPUT_ATTRIBUTES = {
+    ControlInput.STEER_LEFT: "physxVehicleController:steerLeft",
+    ControlInput.STEER_RIGHT: "physxVehicleController:steerRight",
+    ControlInput.ACCELERATOR: "physxVehicleController:accelerator",
+    ControlInput.BRAKE: "physxVehicleController:brake"
+}
+
+# ======================================================================================================================
+
+
+class ControlCommitter():
+    """
+    Collects controller input writes of all vehicles during a simulation step
+    and applies them at once inside a single Sdf.ChangeBlock, so that USD change
+    processing happens once per step rather than once per vehicle.
+    """
+
+    def __init__(self):
+        self._pending_attributes = []
+        self._pending_values = []
+        self._last_commit_size = 0
+
+    def submit(self, attribute, value):
+        self._pending_attributes.append(attribute)
+        self._pending_values.append(value)
+
+    def commit(self):
+        """
+        Applies pending writes in submission order, hence the last write to an attribute wins.
+        """
+        self._last_commit_size = len(self._pending_attributes)
+        if self._last_commit_size == 0:
+            return
+        # Controller attributes are expected to be already authored,
+        # so only their values are changed within the change block.
+        with Sdf.ChangeBlock():
+            for attribute, value in zip(self._pending_attributes, self._pending_values):
+                attribute.Set(value)
+        self.clear()
+
+    def clear(self):
+        self._pending_attributes.clear()
+        self._pending_values.clear()
+
+    def get_last_commit_size(self):
+        return self._last_commit_size
+
+# ======================================================================================================================
+
+
+class WheelGeometry():
+    """
+    Wheel offsets in the vehicle frame, read once from the wheel prims.
+    Offsets do not change during simulation, hence they are only re-read when
+    the wheel prims are reported to be changed.
+    """
+
+    def __init__(self, wheel_prims):
+        # (4,3) wheel offsets indexed by Wheel.
+        self.wheel_offsets = np.zeros((len(Wheel), 3))
+        # (2,4) homogeneous axle midpoints indexed by Axle, projected onto the vehicle's ground plane.
+        self.axle_offsets = np.ones((len(Axle), 4))
+        self.wheelbase = 0.0
+        self.refresh(wheel_prims)
+
+    def refresh(self, wheel_prims):
+        for wheel in Wheel:
+            self.wheel_offsets[wheel] = wheel_prims[wheel].GetAttribute("xformOp:translate").Get()
+        self.axle_offsets[Axle.FRONT, :3] = (
+            self.wheel_offsets[Wheel.FRONT_LEFT] + self.wheel_offsets[Wheel.FRONT_RIGHT]
+        ) / 2
+        self.axle_offsets[Axle.REAR, :3] = (
+            self.wheel_offsets[Wheel.REAR_LEFT] + self.wheel_offsets[Wheel.REAR_RIGHT]
+        ) / 2
+        self.axle_offsets[:, 1] = 0.0
+        self.wheelbase = float(np.linalg.norm(self.axle_offsets[Axle.FRONT, :3] - self.axle_offsets[Axle.REAR, :3]))
+
+    def axle_positions(self, transform):
+        """
+        World positions (2,3) of the axle midpoints for a local-to-world transform.
+        """
+        return (self.axle_offsets @ np.array(transform))[:, :3]
+
+# ======================================================================================================================
+
+
+class VehiclePose():
+    """
+    Snapshot of vehicle's world pose, taken once per simulation step.
+    """
+
+    __slots__ = ("transform", "rotation", "position", "forward", "up", "axle_positions")
+
+    def __init__(self, transform, rotation, position, forward, up, axle_positions):
+        self.transform = transform
+        self.rotation = rotation
+        self.position = position
+        self.forward = forward
+        self.up = up
+        # (2,3) array indexed by Axle.
+        self.axle_positions = axle_positions
+
 # ======================================================================================================================
 
 
@@ -29,7 +144,7 @@ class Vehicle():
     dynamic properties, such as acceleration, desceleration, steering etc.
     """
 
-    def __init__(self, vehicle_prim, max_steer_angle_radians, rear_steering=True):
+    def __init__(self, vehicle_prim, max_steer_angle_radians, rear_steering=True, control_write_tolerance=1e-4):
         self._prim = vehicle_prim
         self._path = self._prim.GetPath()
         self._steer_delta = 0.01
@@ -59,10 +174,33 @@ class Vehicle():
         p = self._prim.GetAttribute("xformOp:translate").Get()
         self._p = Gf.Vec4f(p[0], p[1], p[2], 1.0)
 
+        self._wheel_geometry = WheelGeometry(self._wheel_prims)
+        self._wheel_geometry_dirty = False
+
+        self._pose = None
+        # Number of local-to-world transform evaluations since the last pose snapshot.
+        self._transform_evaluations = 0
+
+        # Resolved controller attributes, indexed by ControlInput.
+        self._control_attributes = [self._prim.GetAttribute(_CONTROL_INPUT_ATTRIBUTES[i]) for i in ControlInput]
+        self._velocity_attribute = self._prim.GetAttribute("physics:velocity")
+        # Control writes within tolerance of the last written value are skipped
+        # in order to avoid redundant USD change notifications.
+        self._control_write_tolerance = control_write_tolerance
+        self._last_control_values = [None] * len(ControlInput)
+        self._control_writes_issued = 0
+        self._control_writes_suppressed = 0
+        # Optional ControlCommitter to defer control writes to, written directly if None.
+        self._control_committer = None
+
     def _set_max_steer_angle(self, wheel_prim, max_steer_angle_radians):
         physx_wheel = PhysxSchema.PhysxVehicleWheelAPI(wheel_prim)
         physx_wheel.GetMaxSteerAngleAttr().Set(max_steer_angle_radians)
 
+    @property
+    def prim_path(self):
+        return self._path
+
     def get_bbox_size(self):
         """Computes size of vehicle's oriented bounding box."""
         purposes = [UsdGeom.Tokens.default_]
@@ -82,32 +220,100 @@ class Vehicle():
             self._steer_right_priv(value)
 
     def _steer_left_priv(self, value):
-        self._prim.GetAttribute("physxVehicleController:steerLeft").Set(value)
-        self._prim.GetAttribute("physxVehicleController:steerRight").Set(0.0)
+        self._set_control(ControlInput.STEER_LEFT, value)
+        self._set_control(ControlInput.STEER_RIGHT, 0.0)
 
     def _steer_right_priv(self, value):
-        self._prim.GetAttribute("physxVehicleController:steerLeft").Set(0.0)
-        self._prim.GetAttribute("physxVehicleController:steerRight").Set(value)
+        self._set_control(ControlInput.STEER_LEFT, 0.0)
+        self._set_control(ControlInput.STEER_RIGHT, value)
 
     def accelerate(self, value):
-        self._vehicle().GetAttribute("physxVehicleController:accelerator").Set(value)
+        self._set_control(ControlInput.ACCELERATOR, value)
 
     def brake(self, value):
-        self._prim.GetAttribute("physxVehicleController:brake").Set(value)
+        self._set_control(ControlInput.BRAKE, value)
+
+    def _set_control(self, control_input, value):
+        last_value = self._last_control_values[control_input]
+        if last_value is not None and abs(value - last_value) <= self._control_write_tolerance:
+            self._control_writes_suppressed += 1
+            return
+        if self._control_committer is not None:
+            self._control_committer.submit(self._control_attributes[control_input], value)
+        else:
+            self._control_attributes[control_input].Set(value)
+        self._last_control_values[control_input] = value
+        self._control_writes_issued += 1
+
+    def set_control_committer(self, committer):
+        self._control_committer = committer
+
+    def reset_control_cache(self):
+        """
+        Forgets last written control values, so that next control writes are
+        issued regardless of their value (e.g. after inputs were changed outside
+        of the vehicle wrapper).
+        """
+        self._last_control_values = [None] * len(ControlInput)
+
+    def get_control_write_stats(self):
+        """
+        Returns a tuple with numbers of (issued, suppressed) control writes.
+        """
+        return self._control_writes_issued, self._control_writes_suppressed
 
     def get_velocity(self):
-        return self._prim.GetAttribute("physics:velocity").Get()
+        return self._velocity_attribute.Get()
 
     def get_speed(self):
         return np.linalg.norm(self.get_velocity())
 
-    def curr_position(self):
-        prim = self._vehicle()
+    def update_pose(self):
+        """
+        Takes a snapshot of vehicle's world pose. Meant to be called once per
+        simulation step, all pose accessors read from the latest snapshot.
+        """
+        self._transform_evaluations = 0
+        if self._wheel_geometry_dirty:
+            self._wheel_geometry.refresh(self._wheel_prims)
+            self._wheel_geometry_dirty = False
+        T = self._local_to_world_transform()
+        R = Gf.Matrix4d(T.ExtractRotationMatrix(), Gf.Vec3d())
+        p = self._p * T
+        f = self._forward_local()
+        u = self._up_local()
+        self._pose = VehiclePose(
+            transform=T,
+            rotation=R,
+            position=Gf.Vec3f(p[0], p[1], p[2]),
+            forward=Gf.Vec4f(f[0], f[1], f[2], 1.0) * R,
+            up=Gf.Vec4f(u[0], u[1], u[2], 1.0) * R,
+            axle_positions=self._wheel_geometry.axle_positions(T)
+        )
+        return self._pose
+
+    def pose(self):
+        """
+        Latest pose snapshot, taken on demand if there is none yet.
+        """
+        if self._pose is None:
+            return self.update_pose()
+        return self._pose
 
+    def get_transform_evaluations(self):
+        """
+        Number of local-to-world transform evaluations since the last pose snapshot
+        (including the snapshot itself).
+        """
+        return self._transform_evaluations
+
+    def _local_to_world_transform(self):
+        self._transform_evaluations += 1
         cache = UsdGeom.XformCache()
-        T = cache.GetLocalToWorldTransform(prim)
-        p = self._p * T
-        return Gf.Vec3f(p[0], p[1], p[2])
+        return cache.GetLocalToWorldTransform(self._prim)
+
+    def curr_position(self):
+        return Gf.Vec3f(self.pose().position)
 
     def axle_front(self):
         return self.axle_position(Axle.FRONT)
@@ -116,38 +322,27 @@ class Vehicle():
         return self.axle_position(Axle.REAR)
 
     def axle_position(self, type):
-        cache = UsdGeom.XformCache()
-        T = cache.GetLocalToWorldTransform(self._vehicle())
-        if type == Axle.FRONT:
-            wheel_fl = self._wheel_prims[Wheel.FRONT_LEFT].GetAttribute("xformOp:translate").Get()
-            wheel_fr = self._wheel_prims[Wheel.FRONT_RIGHT].GetAttribute("xformOp:translate").Get()
-            wheel_fl[1] = 0.0
-            wheel_fr[1] = 0.0
-            wheel_fl = Gf.Vec4f(wheel_fl[0], wheel_fl[1], wheel_fl[2], 1.0) * T
-            wheel_fr = Gf.Vec4f(wheel_fr[0], wheel_fr[1], wheel_fr[2], 1.0) * T
-
-            wheel_fl = Gf.Vec3f(wheel_fl[0], wheel_fl[1], wheel_fl[2])
-            wheel_fr = Gf.Vec3f(wheel_fr[0], wheel_fr[1], wheel_fr[2])
-
-            return (wheel_fl + wheel_fr) / 2
-        elif type == Axle.REAR:
-            wheel_rl = self._wheel_prims[Wheel.REAR_LEFT].GetAttribute("xformOp:translate").Get()
-            wheel_rr = self._wheel_prims[Wheel.REAR_RIGHT].GetAttribute("xformOp:translate").Get()
-            wheel_rl[1] = 0.0
-            wheel_rr[1] = 0.0
-            wheel_rl = Gf.Vec4f(wheel_rl[0], wheel_rl[1], wheel_rl[2], 1.0) * T
-            wheel_rr = Gf.Vec4f(wheel_rr[0], wheel_rr[1], wheel_rr[2], 1.0) * T
-
-            wheel_rl = Gf.Vec3f(wheel_rl[0], wheel_rl[1], wheel_rl[2])
-            wheel_rr = Gf.Vec3f(wheel_rr[0], wheel_rr[1], wheel_rr[2])
-
-            return (wheel_rl + wheel_rr) / 2
+        if type == Axle.FRONT or type == Axle.REAR:
+            p = self.pose().axle_positions[type]
+            return Gf.Vec3f(p[0], p[1], p[2])
         else:
             return None
 
+    def get_wheelbase(self):
+        return self._wheel_geometry.wheelbase
+
+    def wheel_prim_paths(self):
+        return [wheel_prim.GetPath() for wheel_prim in self._wheel_prims.values()]
+
+    def on_wheel_prims_changed(self):
+        """
+        Marks cached wheel geometry as outdated, it is re-read on the next pose snapshot.
+        """
+        self._wheel_geometry_dirty = True
+
     def _wheel_pos(self, type):
         R = self.rotation_matrix()
-        wheel_pos = self._wheel_prims[type].GetAttribute("xformOp:translate").Get()
+        wheel_pos = self._wheel_geometry.wheel_offsets[type]
         wheel_pos = Gf.Vec4f(wheel_pos[0], wheel_pos[1], wheel_pos[2], 1.0) * R
         return Gf.Vec3f(wheel_pos[0], wheel_pos[1], wheel_pos[2]) + self.curr_position()
 
@@ -167,19 +362,13 @@ class Vehicle():
         """
         Produces vehicle's local-to-world rotation transform.
         """
-        cache = UsdGeom.XformCache()
-        T = cache.GetLocalToWorldTransform(self._vehicle())
-        return Gf.Matrix4d(T.ExtractRotationMatrix(), Gf.Vec3d())
+        return Gf.Matrix4d(self.pose().rotation)
 
     def forward(self):
-        R = self.rotation_matrix()
-        f = self._forward_local()
-        return Gf.Vec4f(f[0], f[1], f[2], 1.0) * R
+        return Gf.Vec4d(self.pose().forward)
 
     def up(self):
-        R = self.rotation_matrix()
-        u = self._up_local()
-        return Gf.Vec4f(u[0], u[1], u[2], 1.0) * R
+        return Gf.Vec4d(self.pose().up)
 
     def _forward_local(self):
         return Gf.Vec3f(0.0, 0.0, 1.0)
@@ -191,7 +380,7 @@ class Vehicle():
         return self._stage.GetPrimAtPath(self._path)
 
     def is_close_to(self, point, lookahead_distance):
-        if not point:
+        if point is None:
             raise Exception("[Vehicle] Point is None")
         curr_vehicle_pos = self.curr_position()
         if not curr_vehicle_pos:
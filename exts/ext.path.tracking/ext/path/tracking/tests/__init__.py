@@ -1,5 +1,20 @@
 try:
+    from .test_attachments import *
+    from .test_batch import *
+    from .test_benchmark import *
+    from .test_debug_draw import *
     from .test_extension_model import *
+    from .test_fleet import *
+    from .test_headless import *
+    from .test_lod import *
+    from .test_path_tracker import *
+    from .test_profiling import *
+    from .test_stepper import *
+    from .test_telemetry import *
+    from .test_trail import *
+    from .test_trajectory import *
+    from .test_tuner import *
+    from .test_vehicle import *
 except:
     import carb
     carb.log_error("No tests for this module, check extension settings")
@@ -0,0 +1,56 @@
+import omni.kit.test
+
+import os
+import tempfile
+
+from ..scripts.attachments import read_attachments
+
+# ======================================================================================================================
+
+
+class TestReadAttachments(omni.kit.test.AsyncTestCase):
+    def _read(self, suffix, text):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "attachments" + suffix)
+            with open(path, "w") as f:
+                f.write(text)
+            return read_attachments(path)
+
+    async def test_json(self):
+        expected = [("/World/Fleet/WizardVehicle_000", "/World/A"), ("/World/Fleet/WizardVehicle_001", "/World/B")]
+        mapping = '{"/World/Fleet/WizardVehicle_000": "/World/A", "/World/Fleet/WizardVehicle_001": "/World/B"}'
+        self.assertEqual(self._read(".json", mapping), expected)
+        entries = (
+            '[{"WizardVehicle": "/World/Fleet/WizardVehicle_000", "BasisCurve": "/World/A"},'
+            ' {"WizardVehicle": "/World/Fleet/WizardVehicle_001", "BasisCurve": "/World/B"}]'
+        )
+        self.assertEqual(self._read(".json", entries), expected)
+
+    async def test_csv(self):
+        text = (
+            "WizardVehicle,BasisCurve\n"
+            "/World/Fleet/WizardVehicle_000, /World/A\n"
+            "\n"
+            "# Second route\n"
+            "/World/Fleet/WizardVehicle_001,/World/B\n"
+        )
+        self.assertEqual(
+            self._read(".csv", text),
+            [("/World/Fleet/WizardVehicle_000", "/World/A"), ("/World/Fleet/WizardVehicle_001", "/World/B")]
+        )
+
+    async def test_all_errors_are_reported(self):
+        with self.assertRaises(ValueError) as context:
+            self._read(".csv", "/World/V0\n/World/V1,/World/A\n/World/V2,,/World/B\n")
+        message = str(context.exception)
+        self.assertIn("line 1", message)
+        self.assertIn("line 3", message)
+        self.assertNotIn("line 2", message)
+
+        with self.assertRaises(ValueError) as context:
+            self._read(".json", '[{"WizardVehicle": "/World/V0"}, {"BasisCurve": "/World/A"}]')
+        self.assertIn("entry 0", str(context.exception))
+        self.assertIn("entry 1", str(context.exception))
+
+        with self.assertRaises(ValueError):
+            self._read(".txt", "/World/V0,/World/A\n")
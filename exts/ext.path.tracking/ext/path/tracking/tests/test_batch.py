@@ -0,0 +1,92 @@
+import omni.kit.app
+import omni.timeline
+import omni.usd
+from omni.kit.test import AsyncTestCaseFailOnLogError
+
+from ..scripts.batch import BatchMetrics, KinematicUsdStepper, PhysxStepper
+from ..scripts.model import ExtensionModel
+from ..scripts.telemetry import FleetTelemetry
+
+# ======================================================================================================================
+
+
+class TestBatchRun(AsyncTestCaseFailOnLogError):
+    async def setUp(self):
+        usd_context = omni.usd.get_context()
+        await usd_context.new_stage_async()
+
+        ext_manager = omni.kit.app.get_app().get_extension_manager()
+        self._ext_id = ext_manager.get_enabled_extension_id("ext.path.tracking")
+
+        self._ext_model = ExtensionModel(self._ext_id,
+                                         default_lookahead_distance=550.0,
+                                         max_lookahed_distance=1200.0,
+                                         min_lookahed_distance=300.0
+                                         )
+        self._ext_model.load_preset_scene()
+        self._vehicle_path = list(self._ext_model._vehicle_to_curve_attachments.keys())[0]
+
+    async def tearDown(self):
+        self._ext_model.teardown()
+        self._ext_model = None
+
+    async def test_run_batch_with_kinematic_stepper(self):
+        stage = omni.usd.get_context().get_stage()
+        translate = stage.GetPrimAtPath(self._vehicle_path).GetAttribute("xformOp:translate")
+        start_position = translate.Get()
+
+        result = self._ext_model.run_batch(30.0, stepper=KinematicUsdStepper())
+
+        self.assertGreater(result["steps"], 0)
+        self.assertLessEqual(result["sim_time"], 30.0 + 1e-6)
+        vehicle = result["vehicles"][self._vehicle_path]
+        self.assertGreater(vehicle["distance"], 0.0)
+        self.assertGreater(vehicle["mean_speed"], 0.0)
+        # Stand-in stepper restores the stage on stop.
+        self.assertEqual(translate.Get(), start_position)
+
+    async def test_run_batch_with_physx_stepper(self):
+        result = self._ext_model.run_batch(10.0, stepper=PhysxStepper(), until_finished=False)
+
+        self.assertGreater(result["steps"], 0)
+        vehicle = result["vehicles"][self._vehicle_path]
+        # Speed is read from velocities PhysX writes back to USD.
+        self.assertGreater(vehicle["mean_speed"], 0.0)
+        self.assertGreater(vehicle["distance"], 0.0)
+
+    async def test_run_batch_while_playing(self):
+        timeline = omni.timeline.get_timeline_interface()
+        timeline.play()
+        await omni.kit.app.get_app().next_update_async()
+        try:
+            with self.assertRaises(ValueError):
+                self._ext_model.run_batch(1.0, stepper=KinematicUsdStepper())
+            # Nothing was loaded nor stepped.
+            self.assertEqual(len(self._ext_model._scenarios), 0)
+        finally:
+            timeline.stop()
+            await omni.kit.app.get_app().next_update_async()
+
+
+class TestBatchMetrics(AsyncTestCaseFailOnLogError):
+    async def test_finish_time_and_distance(self):
+        telemetry = FleetTelemetry(2, capacity=1)
+        metrics = BatchMetrics(["/A", "/B"])
+        dt = 0.5
+        for step in range(4):
+            telemetry.record(0, 0.0, 0.0, 10.0, 0.0, 0.7, 0.0, step, 5.0, 0.2)
+            # Reaches its destination on the third step.
+            telemetry.record(1, 0.0, 0.0, 4.0, 0.0, 0.7, 0.0, step, 5.0, -0.4, controlled=step < 2)
+            telemetry.end_step((step + 1) * dt)
+            metrics.update(telemetry.last_step(), dt, (step + 1) * dt)
+
+        result = metrics.result()
+        self.assertFalse(metrics.all_finished())
+        self.assertFalse(result["/A"]["finished"])
+        self.assertAlmostEqual(result["/A"]["distance"], 20.0)
+        self.assertAlmostEqual(result["/A"]["rms_cross_track_error"], 0.2, places=5)
+        self.assertTrue(result["/B"]["finished"])
+        self.assertAlmostEqual(result["/B"]["finish_time"], 1.5)
+        self.assertAlmostEqual(result["/B"]["distance"], 4.0)
+        self.assertAlmostEqual(result["/B"]["mean_speed"], 4.0)
+        self.assertAlmostEqual(result["/B"]["max_cross_track_error"], 0.4, places=5)
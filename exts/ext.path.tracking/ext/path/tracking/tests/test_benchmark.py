@@ -0,0 +1,37 @@
+import omni.kit.test
+
+from ..scripts.benchmark import compare_results, result_key, run_suite
+
+# ======================================================================================================================
+
+
+class TestBenchmark(omni.kit.test.AsyncTestCase):
+    async def test_run_suite(self):
+        results = run_suite([1, 4], [100], [300.0, 550.0], num_steps=5, max_seconds=1.0)
+
+        names = set(record["name"] for record in results["results"])
+        self.assertEqual(names, set([
+            "path_tracker.on_step",
+            "batch_path_tracker.on_step",
+            "trajectory.load",
+            "trajectory.find_lookahead_point",
+            "scenario.step",
+            "fleet_scenario.step",
+        ]))
+        for record in results["results"]:
+            self.assertGreater(record["steps_per_sec"], 0.0)
+            self.assertLessEqual(record["latency_us"]["p50"], record["latency_us"]["p99"])
+            self.assertIn("peak_bytes", record["alloc_per_step"])
+
+        comparison = compare_results(results, results)
+        self.assertEqual(len(comparison), len(results["results"]))
+        self.assertEqual(len(set(key for key, _, _, _ in comparison)), len(comparison))
+        for key, before, after, speedup in comparison:
+            self.assertAlmostEqual(speedup, 1.0)
+
+    async def test_cases_filter(self):
+        results = run_suite([2], [100], [550.0], num_steps=5, cases=["scenario"], max_seconds=1.0)
+
+        self.assertEqual([result_key(record) for record in results["results"]], [
+            "scenario.step(batched=False, fleet_size=2, lookahead_distance=550.0, trajectory_points=100)"
+        ])
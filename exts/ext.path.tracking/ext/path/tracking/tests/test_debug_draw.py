@@ -0,0 +1,166 @@
+import omni.kit.test
+import omni.usd
+
+import math
+import numpy as np
+from pxr import Usd
+
+from ..scripts.debug_draw import DebugCurvesPrim, DebugLineBatch, DebugOverlay, DebugRenderer, TrackPolyline
+from ..scripts.headless import HeadlessSimulation, create_headless_scenario
+from ..scripts.trajectory import TrajectoryGeometry
+
+# ======================================================================================================================
+
+
+class _RecordingTarget():
+    def __init__(self):
+        self.lines = []
+        self.num_submits = 0
+
+    def set_lines(self, starts, ends, colors, widths):
+        self.num_submits += 1
+        self.lines = [(tuple(start), tuple(end), color) for start, end, color in
+                      zip(starts.tolist(), ends.tolist(), colors.tolist())]
+
+
+def _circle(num_points=400, radius=3000.0):
+    angles = np.linspace(0.0, 2.0 * math.pi, num_points, endpoint=False)
+    return np.stack([radius * np.cos(angles), np.zeros_like(angles), radius * np.sin(angles)], axis=1)
+
+
+class TestDebugLineBatch(omni.kit.test.AsyncTestCase):
+    async def test_grows_and_keeps_lines(self):
+        batch = DebugLineBatch(capacity=2)
+        batch.add_line((0.0, 0.0, 0.0), (1.0, 0.0, 0.0), 0xFF0000FF, 2.0)
+        batch.add_lines(np.zeros((5, 3)), np.ones((5, 3)), 0xFF00FF00, 4.0)
+
+        starts, ends, colors, widths = batch.lines()
+        self.assertEqual(batch.count, 6)
+        self.assertGreaterEqual(batch.capacity, 6)
+        np.testing.assert_array_equal(ends[0], [1.0, 0.0, 0.0])
+        np.testing.assert_array_equal(colors, [0xFF0000FF] + [0xFF00FF00] * 5)
+        np.testing.assert_array_equal(widths[1:], 4.0)
+
+        batch.clear()
+        self.assertEqual(batch.count, 0)
+
+
+class TestDebugOverlay(omni.kit.test.AsyncTestCase):
+    async def test_track_polyline_level_of_detail(self):
+        geometry = TrajectoryGeometry("/Circle", _circle())
+        polyline = TrackPolyline(geometry, True, max_segments=50)
+
+        self.assertLessEqual(polyline.num_segments, 51)
+        # Closed loop ends where it starts.
+        np.testing.assert_allclose(polyline.ends[-1], geometry.points[0])
+        self.assertEqual(TrackPolyline(geometry, False, max_segments=1000).num_segments, 399)
+
+    async def test_tracks_are_cached_and_drawn_once_per_frame(self):
+        target = _RecordingTarget()
+        overlay = DebugOverlay(max_track_segments=100, target=target)
+        geometry = TrajectoryGeometry("/Circle", _circle())
+
+        overlay.add_track(geometry, True)
+        overlay.add_track(geometry, True)
+        polyline = overlay._tracks["/Circle"]
+        self.assertEqual(overlay.lines.count, polyline.num_segments)
+        overlay.submit()
+        self.assertEqual(len(target.lines), polyline.num_segments)
+
+        overlay.clear()
+        overlay.add_track(geometry, True)
+        self.assertIs(overlay._tracks["/Circle"], polyline)
+        # Changed curve gets a new geometry, its polyline is rebuilt.
+        overlay.clear()
+        overlay.add_track(TrajectoryGeometry("/Circle", _circle(radius=2000.0)), True)
+        self.assertIsNot(overlay._tracks["/Circle"], polyline)
+
+    def _fleet(self, overlay, num_vehicles):
+        scenarios = []
+        for i in range(num_vehicles):
+            scenario = create_headless_scenario(_circle() + np.array([10000.0 * i, 0.0, 0.0]), close_loop=True)
+            # Replaces the headless stand-in.
+            scenario._debug_render = DebugRenderer(scenario.vehicle.get_bbox_size())
+            overlay.add_renderer(scenario.debug_renderer)
+            scenario.on_start()
+            scenarios.append(scenario)
+        return scenarios
+
+    async def test_fleet_overlay_is_drawn_on_app_update(self):
+        target = _RecordingTarget()
+        overlay = DebugOverlay(target=target)
+        scenarios = self._fleet(overlay, 3)
+
+        for scenario in scenarios:
+            scenario.on_step(1.0 / 25.0, 0.0)
+        # Nothing is drawn during physics steps.
+        self.assertEqual(overlay.lines.count, 0)
+        self.assertEqual(len(target.lines), 0)
+
+        overlay.on_update(1.0 / 60.0)
+        # Forward, up and lookahead target lines.
+        self.assertEqual(overlay.lines.count, 3 * 3)
+        self.assertEqual(len(target.lines), 3 * 3)
+
+        for scenario in scenarios:
+            scenario.on_end()
+        overlay.on_update(1.0)
+        self.assertEqual(overlay.lines.count, 0)
+
+    async def test_refresh_rate(self):
+        target = _RecordingTarget()
+        overlay = DebugOverlay(target=target, refresh_rate=10.0)
+        scenario = self._fleet(overlay, 1)[0]
+        simulation = HeadlessSimulation([scenario])
+
+        simulation.step()
+        overlay.on_update(1.0 / 60.0)
+        first_frame = list(target.lines)
+        self.assertEqual(target.num_submits, 1)
+        simulation.run(5)
+        # Segments are rebuilt and submitted only once per refresh period.
+        overlay.on_update(1.0 / 60.0)
+        self.assertEqual(target.num_submits, 1)
+        overlay.on_update(0.1)
+        self.assertEqual(target.num_submits, 2)
+        self.assertEqual(len(target.lines), len(first_frame))
+        self.assertNotEqual(target.lines[0][0], first_frame[0][0])
+
+    async def test_max_segments(self):
+        target = _RecordingTarget()
+        overlay = DebugOverlay(target=target, max_segments=5)
+        overlay.add_lines(np.zeros((9, 3)), np.ones((9, 3)), 0xFF0000FF, 2.0)
+        overlay.submit()
+        self.assertEqual(len(target.lines), 5)
+
+
+class TestDebugCurvesPrim(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        await omni.usd.get_context().new_stage_async()
+
+    async def test_lines_are_written_in_bulk(self):
+        stage = omni.usd.get_context().get_stage()
+        curves = DebugCurvesPrim("/DebugOverlayTest", width_scale=1.0)
+        starts = np.zeros((3, 3), dtype=np.float32)
+        ends = np.ones((3, 3), dtype=np.float32)
+        colors = np.array([0xFF0000FF, 0x80FF0000, 0xFF00FF00], dtype=np.uint32)
+        widths = np.array([2.0, 2.0, 4.0], dtype=np.float32)
+        curves.set_lines(starts, ends, colors, widths)
+
+        prim = stage.GetPrimAtPath("/DebugOverlayTest")
+        self.assertEqual(list(prim.GetAttribute("curveVertexCounts").Get()), [2, 2, 2])
+        self.assertEqual(len(prim.GetAttribute("points").Get()), 6)
+        self.assertEqual(list(prim.GetAttribute("widths").Get()), [2.0, 2.0, 2.0, 2.0, 4.0, 4.0])
+        self.assertEqual(tuple(prim.GetAttribute("primvars:displayColor").Get()[2]), (1.0, 0.0, 0.0))
+        # Authored in the session layer only.
+        self.assertIsNone(stage.GetRootLayer().GetPrimAtPath("/DebugOverlayTest"))
+
+        # Unchanged segments are not written again.
+        points = prim.GetAttribute("points")
+        with Usd.EditContext(stage, stage.GetSessionLayer()):
+            points.Set(points.Get()[:2])
+        curves.set_lines(starts, ends, colors, widths)
+        self.assertEqual(len(points.Get()), 2)
+
+        curves.remove()
+        self.assertFalse(stage.GetPrimAtPath("/DebugOverlayTest"))
@@ -2,6 +2,7 @@ from email.policy import default
 import omni.kit.app
 import omni.kit.commands
 import omni.usd
+from pxr import Usd
 from omni.kit.test import AsyncTestCaseFailOnLogError
 
 # from omni.kit.test_suite.helpers import wait_stage_loading
@@ -43,6 +44,65 @@ class TestExtensionModel(AsyncTestCaseFailOnLogError):
         self.assertTrue(vehicle_template is not None)
         self.assertTrue(curve is not None)
 
+    async def test_load_fleet(self):
+        ext_model = ExtensionModel(self._ext_id,
+                                   default_lookahead_distance=self._DEFAULT_LOOKAHEAD,
+                                   max_lookahed_distance=self._MAX_LOOKAHEAD,
+                                   min_lookahed_distance=self._MIN_LOOKAHEAD
+                                   )
+        ext_model.load_sample_track()
+        vehicle_paths = ext_model.load_fleet(10, "/World/BasisCurves/BasisCurves")
+
+        stage = omni.usd.get_context().get_stage()
+        self.assertEqual(len(vehicle_paths), 10)
+        for vehicle_path in vehicle_paths:
+            self.assertTrue(stage.GetPrimAtPath(vehicle_path + "/Vehicle"))
+            self.assertEqual(
+                ext_model._vehicle_to_curve_attachments[vehicle_path + "/Vehicle"], "/World/BasisCurves/BasisCurves"
+            )
+        # Shared vehicle data is simulated and its relationships include the spawned vehicles.
+        shared_data = stage.GetPrimAtPath("/World/FleetTemplate/SharedData")
+        self.assertTrue(shared_data)
+        self.assertFalse(shared_data.IsAbstract())
+        self.assertTrue(stage.GetPrimAtPath("/World/FleetTemplate/Template").IsAbstract())
+        targets = [
+            target
+            for prim in Usd.PrimRange(shared_data)
+            for relationship in prim.GetRelationships()
+            for target in relationship.GetTargets()
+        ]
+        for vehicle_path in vehicle_paths:
+            self.assertTrue(any(target.HasPrefix(vehicle_path) for target in targets))
+        # A single template is shared by fleets.
+        ext_model.load_fleet(5, "/World/BasisCurves/BasisCurves")
+        self.assertEqual(len(ext_model._vehicle_to_curve_attachments), 15)
+        ext_model.teardown()
+
+    async def test_attach_vehicles_to_curves(self):
+        ext_model = ExtensionModel(self._ext_id,
+                                   default_lookahead_distance=self._DEFAULT_LOOKAHEAD,
+                                   max_lookahed_distance=self._MAX_LOOKAHEAD,
+                                   min_lookahed_distance=self._MIN_LOOKAHEAD
+                                   )
+        ext_model.load_sample_track()
+        curve_path = "/World/BasisCurves/BasisCurves"
+        vehicle_paths = ext_model.load_fleet(4, curve_path)
+        ext_model.clear_attachments()
+
+        # All invalid entries are reported and nothing is attached.
+        attachments = [(path, curve_path) for path in vehicle_paths]
+        attachments += [("/World/Missing", curve_path), (vehicle_paths[0], "/World/Missing")]
+        with self.assertRaises(ValueError) as context:
+            ext_model.attach_vehicles_to_curves(attachments)
+        message = str(context.exception)
+        self.assertIn("/World/Missing: no such vehicle prim", message)
+        self.assertIn(f"{vehicle_paths[0]}: /World/Missing is not a BasisCurves prim", message)
+        self.assertEqual(len(ext_model._vehicle_to_curve_attachments), 0)
+
+        self.assertEqual(ext_model.attach_vehicles_to_curves({path: curve_path for path in vehicle_paths}), 4)
+        self.assertEqual(len(ext_model._vehicle_to_curve_attachments), 4)
+        ext_model.teardown()
+
     async def test_hello(self):
         ext_model = ExtensionModel(self._ext_id,
                                    default_lookahead_distance=self._DEFAULT_LOOKAHEAD,
@@ -0,0 +1,77 @@
+import omni.kit.test
+
+import math
+import numpy as np
+from pxr import Gf, Sdf, Usd, UsdGeom
+
+from ..scripts.fleet import curve_placements, spawn_fleet
+from ..scripts.trajectory import TrajectoryGeometry
+
+# ======================================================================================================================
+
+
+def _create_template(stage):
+    """
+    Minimal stand-in of a WizardVehicle under a class prim, with a collision
+    group of shared vehicle data including its chassis, laid out as in
+    ExtensionModel._load_fleet_template.
+    """
+    UsdGeom.Xform.Define(stage, "/World/FleetTemplate")
+    stage.DefinePrim("/World/FleetTemplate/Template").SetSpecifier(Sdf.SpecifierClass)
+    UsdGeom.Xform.Define(stage, "/World/FleetTemplate/Template/WizardVehicle")
+    vehicle = UsdGeom.Xform.Define(stage, "/World/FleetTemplate/Template/WizardVehicle/Vehicle")
+    vehicle.AddTranslateOp().Set(Gf.Vec3f(0.0, 50.0, 0.0))
+    vehicle.AddOrientOp().Set(Gf.Quatf(1.0))
+    UsdGeom.Xform.Define(stage, "/World/FleetTemplate/Template/WizardVehicle/Vehicle/Chassis")
+    group = stage.DefinePrim("/World/FleetTemplate/SharedData/ChassisGroup")
+    includes = group.CreateRelationship("collection:colliders:includes")
+    includes.SetTargets(["/World/FleetTemplate/Template/WizardVehicle/Vehicle/Chassis"])
+    return includes
+
+
+class TestFleet(omni.kit.test.AsyncTestCase):
+    async def test_curve_placements(self):
+        angles = np.linspace(0.0, 2.0 * math.pi, 400, endpoint=False)
+        circle = np.stack([3000.0 * np.cos(angles), np.zeros_like(angles), 3000.0 * np.sin(angles)], axis=1)
+        geometry = TrajectoryGeometry("/Circle", circle)
+
+        positions, headings = curve_placements(geometry, 8, close_loop=True)
+        np.testing.assert_allclose(np.linalg.norm(positions, axis=1), 3000.0, rtol=1e-3)
+        # Evenly spaced around the loop.
+        spacing = np.linalg.norm(np.diff(positions, axis=0), axis=1)
+        np.testing.assert_allclose(spacing, 2.0 * 3000.0 * math.sin(math.pi / 8), rtol=1e-3)
+        # Facing along the curve: counterclockwise tangent at the first point is +Z.
+        self.assertAlmostEqual(headings[0], 0.0, delta=0.01)
+        self.assertAlmostEqual(abs(headings[4]), math.pi, delta=0.01)
+
+    async def test_spawn_fleet(self):
+        stage = Usd.Stage.CreateInMemory()
+        includes = _create_template(stage)
+        positions = [(1000.0 * i, 0.0, 0.0) for i in range(100)]
+        headings = [0.5 * math.pi] * 100
+        vehicle_paths = spawn_fleet(stage, "/World/FleetTemplate/Template/WizardVehicle", positions, headings,
+                                    "/World/Fleet", "/World/FleetTemplate/SharedData")
+
+        self.assertEqual(len(vehicle_paths), 100)
+        vehicle = stage.GetPrimAtPath(vehicle_paths[3] + "/Vehicle")
+        self.assertTrue(vehicle.GetPrimAtPath("Chassis"))
+        world = UsdGeom.Xformable(vehicle).ComputeLocalToWorldTransform(Usd.TimeCode.Default())
+        self.assertTrue(Gf.IsClose(world.ExtractTranslation(), Gf.Vec3d(3000.0, 50.0, 0.0), 1e-6))
+        # Rotated to face +X.
+        forward = world.TransformDir(Gf.Vec3d(0.0, 0.0, 1.0))
+        self.assertTrue(Gf.IsClose(forward, Gf.Vec3d(1.0, 0.0, 0.0), 1e-6))
+
+        # Template is not traversed, spawned vehicles are.
+        traversed = [str(prim.GetPath()) for prim in stage.Traverse()]
+        self.assertNotIn("/World/FleetTemplate/Template/WizardVehicle/Vehicle", traversed)
+        self.assertIn(vehicle_paths[99] + "/Vehicle/Chassis", traversed)
+        # Shared data is traversed and includes all the spawned vehicles.
+        self.assertIn("/World/FleetTemplate/SharedData/ChassisGroup", traversed)
+        expected = ["/World/FleetTemplate/Template/WizardVehicle/Vehicle/Chassis"]
+        expected += [vehicle_path + "/Vehicle/Chassis" for vehicle_path in vehicle_paths]
+        self.assertEqual([str(target) for target in includes.GetTargets()], expected)
+
+    async def test_missing_template(self):
+        stage = Usd.Stage.CreateInMemory()
+        with self.assertRaises(ValueError):
+            spawn_fleet(stage, "/World/Missing", [(0.0, 0.0, 0.0)], [0.0], "/World/Fleet")
@@ -0,0 +1,63 @@
+import omni.kit.test
+
+import math
+import numpy as np
+
+from ..scripts.headless import HeadlessSimulation, KinematicVehicle, create_headless_scenario
+
+# ======================================================================================================================
+
+
+class TestHeadlessSimulation(omni.kit.test.AsyncTestCase):
+    async def test_tracks_closed_loop(self):
+        radius = 3000.0
+        angles = np.linspace(0.0, 2.0 * math.pi, 400, endpoint=False)
+        points = np.stack([radius * np.cos(angles) - radius, np.zeros_like(angles), radius * np.sin(angles)], axis=1)
+        scenario = create_headless_scenario(points, close_loop=True)
+        simulation = HeadlessSimulation([scenario])
+
+        simulation.run(600)
+        max_error = 0.0
+        for _ in range(1200):
+            simulation.step()
+            position = scenario.vehicle.curr_position()
+            max_error = max(max_error, abs(math.hypot(position[0] + radius, position[2]) - radius))
+
+        self.assertGreater(scenario.vehicle.get_speed(), 0.0)
+        self.assertLess(max_error, 0.1 * radius)
+
+    async def test_stops_at_end_of_open_trajectory(self):
+        points = np.stack([np.zeros(100), np.zeros(100), np.linspace(0.0, 10000.0, 100)], axis=1)
+        scenario = create_headless_scenario(points, close_loop=False)
+        simulation = HeadlessSimulation([scenario])
+
+        simulation.run(3000)
+
+        position = scenario.vehicle.curr_position()
+        self.assertGreater(position[2], 9000.0)
+        self.assertAlmostEqual(position[0], 0.0, places=3)
+        self.assertAlmostEqual(scenario.vehicle.get_speed(), 0.0)
+
+    async def test_kinematic_vehicle_turns_left(self):
+        vehicle = KinematicVehicle(heading=0.0)
+        vehicle.accelerate(1.0)
+        vehicle.steer_left(0.5)
+        for _ in range(60):
+            vehicle.step(1.0 / 60.0)
+        pose = vehicle.update_pose()
+
+        self.assertGreater(vehicle.get_heading(), 0.0)
+        self.assertGreater(pose.position[0], 0.0)
+        self.assertGreater(pose.position[2], 0.0)
+        np.testing.assert_allclose(
+            pose.axle_positions[0] - pose.axle_positions[1], vehicle.get_wheelbase() * pose.forward
+        )
+
+    async def test_pose_outdated_after_step(self):
+        vehicle = KinematicVehicle(heading=0.0)
+        position = vehicle.curr_position()
+        vehicle.accelerate(1.0)
+        for _ in range(10):
+            vehicle.step(1.0 / 60.0)
+
+        self.assertGreater(vehicle.curr_position()[2], position[2])
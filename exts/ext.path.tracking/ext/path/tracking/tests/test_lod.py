@@ -0,0 +1,115 @@
+import omni.kit.test
+
+import math
+import numpy as np
+
+from ..scripts.headless import HeadlessSimulation, create_headless_scenario
+from ..scripts.lod import LodPolicy, LodTier, lod_stats
+from ..scripts.telemetry import FleetTelemetry
+from ..scripts.trajectory import TrajectoryGeometry
+
+# ======================================================================================================================
+
+
+def _straight_and_turn():
+    """
+    200 m straight, a 20 m radius left turn and another 180 m straight.
+    """
+    z = np.linspace(0.0, 20000.0, 200)
+    straight = np.stack([np.zeros_like(z), np.zeros_like(z), z], axis=1)
+    angles = np.linspace(0.0, 0.5 * math.pi, 50)[1:]
+    turn = np.stack(
+        [2000.0 * np.cos(angles) - 2000.0, np.zeros_like(angles), 20000.0 + 2000.0 * np.sin(angles)], axis=1
+    )
+    x = np.linspace(-2000.0, -20000.0, 150)[1:]
+    exit_straight = np.stack([x, np.zeros_like(x), np.full_like(x, 22000.0)], axis=1)
+    return np.concatenate([straight, turn, exit_straight])
+
+
+class TestTrajectoryCurvature(omni.kit.test.AsyncTestCase):
+    async def test_circle_and_straight(self):
+        angles = np.linspace(0.0, 2.0 * math.pi, 400, endpoint=False)
+        circle = np.stack([3000.0 * np.cos(angles), np.zeros_like(angles), 3000.0 * np.sin(angles)], axis=1)
+        np.testing.assert_allclose(TrajectoryGeometry("/Circle", circle).curvatures(True), 1.0 / 3000.0, rtol=1e-3)
+
+        geometry = TrajectoryGeometry("/Track", _straight_and_turn())
+        self.assertAlmostEqual(geometry.max_curvature(0.0, 15000.0), 0.0)
+        self.assertAlmostEqual(geometry.max_curvature(15000.0, 21000.0), 1.0 / 2000.0, delta=1e-5)
+
+
+class TestLodPolicy(omni.kit.test.AsyncTestCase):
+    async def test_tiers_and_periods(self):
+        policy = LodPolicy(reduced_period=0.2, far_period=0.5, max_cross_track_error=0.25, max_curvature=0.02)
+        self.assertEqual(policy.classify((0.0, 0.0, 0.0), 0.1, 0.01), LodTier.REDUCED)
+        self.assertEqual(policy.classify((0.0, 0.0, 0.0), 0.3, 0.01), LodTier.FULL)
+        self.assertEqual(policy.classify((0.0, 0.0, 0.0), 0.1, 0.05), LodTier.FULL)
+
+        policy.set_region_of_interest((10000.0, 0.0, 0.0), 1000.0)
+        self.assertEqual(policy.classify((0.0, 0.0, 0.0), 0.1, 0.01), LodTier.FAR)
+        self.assertEqual(policy.classify((0.0, 0.0, 0.0), 0.3, 0.01), LodTier.REDUCED)
+
+        self.assertAlmostEqual(policy.period(LodTier.FULL, 0.04), 0.04)
+        self.assertAlmostEqual(policy.period(LodTier.REDUCED, 0.04), 0.2)
+        # At most a quarter of the lookahead distance traveled between evaluations.
+        self.assertAlmostEqual(policy.period(LodTier.FAR, 0.04, speed=1000.0, lookahead_distance=1000.0), 0.25)
+        self.assertAlmostEqual(policy.period(LodTier.REDUCED, 0.04, speed=10000.0, lookahead_distance=1000.0), 0.04)
+
+    def _run(self, policy):
+        scenario = create_headless_scenario(_straight_and_turn())
+        scenario.set_lod_policy(policy)
+        telemetry = FleetTelemetry(1, capacity=4096)
+        scenario.set_telemetry(telemetry, 0)
+        simulation = HeadlessSimulation([scenario], telemetry=telemetry)
+        num_steps = 0
+        max_error = 0.0
+        while not scenario.is_stopped() and num_steps < 3000:
+            simulation.step()
+            num_steps += 1
+            error = abs(scenario.trajectory.cross_track_error(scenario.vehicle.curr_position())) * 0.01
+            max_error = max(max_error, error)
+        return scenario, num_steps, max_error, int(telemetry.latest()["updated"].sum())
+
+    async def test_reduced_rate_keeps_accuracy(self):
+        _, full_steps, full_error, full_evaluations = self._run(None)
+        scenario, lod_steps, lod_error, lod_evaluations = self._run(LodPolicy())
+
+        self.assertLess(lod_evaluations, 0.7 * full_evaluations)
+        self.assertLessEqual(lod_steps, 1.01 * full_steps)
+        self.assertLess(lod_error, full_error + 0.05)
+
+        # Stopped at the end of the trajectory.
+        self.assertEqual(scenario.lod_tier, LodTier.SUSPENDED)
+        stats = lod_stats([scenario])
+        self.assertEqual(stats["tiers"]["suspended"], 1)
+        self.assertAlmostEqual(stats["evaluations_per_second"], 1.0)
+        self.assertAlmostEqual(stats["full_evaluations_per_second"], 25.0)
+
+    async def test_cross_track_error_computed_once(self):
+        scenario = create_headless_scenario(_straight_and_turn())
+        scenario.set_lod_policy(LodPolicy())
+        telemetry = FleetTelemetry(1, capacity=4096)
+        scenario.set_telemetry(telemetry, 0)
+        simulation = HeadlessSimulation([scenario], telemetry=telemetry)
+        trajectory = scenario.trajectory
+        cross_track_error = trajectory.cross_track_error
+        calls = []
+
+        def counted_cross_track_error(*args, **kwargs):
+            calls.append(1)
+            return cross_track_error(*args, **kwargs)
+
+        trajectory.cross_track_error = counted_cross_track_error
+        simulation.run(300)
+
+        # Shared by telemetry and LOD, once per evaluation.
+        evaluations = int(telemetry.latest()["updated"].sum())
+        self.assertGreater(evaluations, 0)
+        self.assertEqual(len(calls), evaluations)
+
+    async def test_no_policy_is_full_rate(self):
+        scenario = create_headless_scenario(_straight_and_turn())
+        simulation = HeadlessSimulation([scenario])
+        simulation.run(60)
+
+        self.assertEqual(scenario.lod_tier, LodTier.FULL)
+        self.assertAlmostEqual(scenario.control_period, 1.0 / 25.0)
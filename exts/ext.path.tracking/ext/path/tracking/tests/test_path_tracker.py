@@ -0,0 +1,56 @@
+import omni.kit.test
+from pxr import Gf
+
+import math
+import numpy as np
+
+from ..scripts.path_tracker import BatchPurePursuitPathTracker, PurePursuitPathTracker
+
+# ======================================================================================================================
+
+
+class TestBatchPurePursuitPathTracker(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        rng = np.random.default_rng(7)
+        num_vehicles = 64
+        self._rear = rng.uniform(-1000.0, 1000.0, (num_vehicles, 3))
+        heading = rng.uniform(-math.pi, math.pi, num_vehicles)
+        wheelbase = rng.uniform(150.0, 350.0, num_vehicles)
+        self._front = self._rear + np.stack(
+            [wheelbase * np.sin(heading), np.zeros(num_vehicles), wheelbase * np.cos(heading)], axis=1
+        )
+        self._dest = self._rear + rng.uniform(-2000.0, 2000.0, (num_vehicles, 3))
+        for positions in (self._rear, self._front, self._dest):
+            positions[:, 1] = 0.0
+
+    async def test_matches_per_vehicle_tracker(self):
+        max_steer_angle = math.pi / 4
+        tracker = PurePursuitPathTracker(max_steer_angle)
+        batch_tracker = BatchPurePursuitPathTracker(max_steer_angle)
+
+        steer = batch_tracker.on_step(self._front, self._rear, self._dest)
+
+        self.assertEqual(steer.shape, (len(self._front),))
+        for i in range(len(self._front)):
+            expected = tracker.on_step(
+                Gf.Vec3f(*self._front[i]),
+                Gf.Vec3f(*self._rear[i]),
+                Gf.Vec3f(0.0, 0.0, 1.0),
+                Gf.Vec3f(*self._dest[i]),
+                Gf.Vec3f(*self._rear[i])
+            )
+            self.assertAlmostEqual(steer[i], expected, places=4)
+
+    async def test_per_vehicle_max_steer_angle(self):
+        max_steer_angles = np.full(len(self._front), math.pi / 4)
+        max_steer_angles[::2] = math.pi / 3
+        batch_tracker = BatchPurePursuitPathTracker(max_steer_angles)
+
+        indices = np.arange(1, len(self._front), 3)
+        steer = batch_tracker.on_step(self._front[indices], self._rear[indices], self._dest[indices], indices)
+
+        for k, i in enumerate(indices):
+            expected = BatchPurePursuitPathTracker(max_steer_angles[i]).on_step(
+                self._front[i:i+1], self._rear[i:i+1], self._dest[i:i+1]
+            )
+            self.assertAlmostEqual(steer[k], expected[0])
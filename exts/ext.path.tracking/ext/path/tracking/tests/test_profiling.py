@@ -0,0 +1,74 @@
+import omni.kit.test
+
+import json
+import math
+import os
+import tempfile
+import numpy as np
+
+from ..scripts.headless import HeadlessSimulation, create_headless_scenario
+from ..scripts.profiling import StepPhase, StepProfiler, TimingHistogram
+
+# ======================================================================================================================
+
+
+class TestTimingHistogram(omni.kit.test.AsyncTestCase):
+    async def test_bucket_bounds(self):
+        for duration in [0, 1, 7, 8, 9, 15, 16, 1000, 123456, 10 ** 9]:
+            index = TimingHistogram.bucket_index(duration)
+            self.assertLessEqual(TimingHistogram.bucket_lower_bound(index), duration)
+            self.assertGreater(TimingHistogram.bucket_lower_bound(index + 1), duration)
+        self.assertEqual(TimingHistogram.bucket_index(2 ** 60), TimingHistogram.NUM_BUCKETS - 1)
+
+    async def test_percentiles(self):
+        histogram = TimingHistogram()
+        for duration in range(1000, 101000, 1000):
+            histogram.add(duration)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.max_ns, 100000)
+        self.assertAlmostEqual(histogram.percentile(50), 50000, delta=0.25 * 50000)
+        self.assertAlmostEqual(histogram.percentile(99), 99000, delta=0.25 * 99000)
+        self.assertLessEqual(histogram.percentile(100), histogram.max_ns)
+
+
+class TestStepProfiler(omni.kit.test.AsyncTestCase):
+    async def test_disabled_profiler_has_no_timings(self):
+        profiler = StepProfiler()
+
+        self.assertIsNone(profiler.timings("vehicle"))
+        self.assertEqual(profiler.snapshot(), {})
+
+    async def test_scenario_phases(self):
+        profiler = StepProfiler(enabled=True)
+        angles = np.linspace(0.0, 2.0 * math.pi, 200, endpoint=False)
+        points = np.stack([3000.0 * np.cos(angles), np.zeros_like(angles), 3000.0 * np.sin(angles)], axis=1)
+        # Evaluated on every step.
+        scenario = create_headless_scenario(points, close_loop=True, control_period=1.0 / 60.0)
+        scenario.set_timings(profiler.timings("vehicle"))
+        simulation = HeadlessSimulation([scenario])
+
+        simulation.run(50)
+
+        snapshot = profiler.snapshot()["vehicle"]
+        for phase in (StepPhase.POSE_READ, StepPhase.TARGET_SEARCH, StepPhase.STEERING,
+                      StepPhase.CONTROL_WRITE, StepPhase.DEBUG_DRAW):
+            summary = snapshot[phase.name.lower()]
+            self.assertEqual(summary["count"], 50)
+            self.assertLessEqual(summary["p50_us"], summary["max_us"])
+
+        profiler.reset()
+        self.assertEqual(profiler.snapshot()["vehicle"], {})
+
+    async def test_export(self):
+        profiler = StepProfiler(enabled=True)
+        profiler.timings("dispatcher").record(StepPhase.TOTAL, 0)
+
+        path = os.path.join(tempfile.mkdtemp(), "timings.json")
+        profiler.export(path)
+        with open(path) as f:
+            data = json.load(f)
+
+        total = data["timings"]["dispatcher"]["total"]
+        self.assertEqual(total["count"], 1)
+        self.assertEqual(sum(count for _, count in total["buckets"]), 1)
@@ -0,0 +1,133 @@
+import omni.kit.test
+from omni.physx.bindings._physx import SimulationEvent
+
+import threading
+import numpy as np
+
+from ..scripts.stepper import ControlScheduler, Scenario, SimStepDispatcher, SimStepTracker
+
+# ======================================================================================================================
+
+
+class TestControlScheduler(omni.kit.test.AsyncTestCase):
+    async def test_control_rate(self):
+        dt = 1.0 / 60.0
+        scheduler = ControlScheduler([1.0 / 20.0, 1.0 / 25.0, 0.0])
+        counts = np.zeros(3, dtype=np.int64)
+        elapsed_total = np.zeros(3)
+        for _ in range(600):
+            due, elapsed = scheduler.step(dt)
+            counts[due] += 1
+            elapsed_total[due] += elapsed
+
+        # 10 seconds at 20 Hz, 25 Hz and on every step.
+        np.testing.assert_allclose(counts, [200, 250, 600], atol=1)
+        # Elapsed time of evaluations adds up to the simulated time, less the time since the last one.
+        np.testing.assert_allclose(elapsed_total, 10.0, atol=0.05)
+
+    async def test_staggering(self):
+        num_clients = 100
+        scheduler = ControlScheduler([4.0 / 60.0] * num_clients)
+        due_per_step = [len(scheduler.step(1.0 / 60.0)[0]) for _ in range(60)]
+
+        # Every client is due once per 4 steps, spread evenly over the steps.
+        self.assertAlmostEqual(sum(due_per_step), 15 * num_clients, delta=1)
+        self.assertLessEqual(max(due_per_step), 0.3 * num_clients)
+
+    async def test_reset(self):
+        scheduler = ControlScheduler([0.1, 0.1])
+        first = [list(scheduler.step(0.02)[0]) for _ in range(10)]
+        scheduler.reset()
+        second = [list(scheduler.step(0.02)[0]) for _ in range(10)]
+        self.assertEqual(first, second)
+
+
+class _RecordingScenario(Scenario):
+    """
+    Evaluated on every step, logs its start, step and end calls.
+    """
+
+    def __init__(self, name, log, dt):
+        super().__init__(1.0, dt)
+        self.name = name
+        self.tracker = None
+        self.abort_on_step = None
+        self._log = log
+        self._num_steps = 0
+
+    def on_start(self):
+        self._log.append(("start", self.name))
+
+    def on_end(self):
+        self._log.append(("end", self.name))
+
+    def on_step(self, deltaTime, totalTime):
+        self._num_steps += 1
+        self._log.append(("step", self.name))
+        if self._num_steps == self.abort_on_step:
+            self.tracker.abort()
+
+
+class _Event():
+    def __init__(self, event_type):
+        self.type = int(event_type)
+
+
+class TestSimStepDispatcher(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._dt = 1.0 / 60.0
+        self._log = []
+        self._dispatcher = SimStepDispatcher()
+        self._scenarios = [_RecordingScenario(name, self._log, self._dt) for name in "abc"]
+        for scenario in self._scenarios:
+            scenario.tracker = SimStepTracker(scenario, threading.Event(), self._dispatcher)
+        self._dispatcher.register_post_step_callback(lambda: self._log.append(("post", None)))
+
+    async def tearDown(self):
+        self._dispatcher.teardown()
+        self._dispatcher = None
+
+    def _step_log(self, names):
+        return [("step", name) for name in names] + [("post", None)]
+
+    async def test_event_order(self):
+        self.assertEqual(self._dispatcher.num_trackers, 3)
+        self.assertFalse(self._dispatcher.is_running)
+        self._dispatcher._on_simulation_event(_Event(SimulationEvent.RESUMED))
+        self.assertTrue(self._dispatcher.is_running)
+        self.assertEqual(self._log, [("start", "a"), ("start", "b"), ("start", "c")])
+
+        del self._log[:]
+        self._dispatcher.step(self._dt)
+        self._dispatcher.step(self._dt)
+        self.assertEqual(self._log, 2 * self._step_log("abc"))
+        self.assertAlmostEqual(self._dispatcher.total_time, 2.0 * self._dt)
+
+        # Only the tracker flagged for reset restarts on resume.
+        del self._log[:]
+        self._scenarios[1].tracker.reset_on_next_resume()
+        self._dispatcher._on_simulation_event(_Event(SimulationEvent.RESUMED))
+        self.assertEqual(self._log, [("end", "b"), ("start", "b")])
+        self.assertEqual([scenario.tracker._iterationCount for scenario in self._scenarios], [2, 0, 2])
+
+        del self._log[:]
+        self._dispatcher._on_simulation_event(_Event(SimulationEvent.STOPPED))
+        self.assertEqual(self._log, [("end", "a"), ("end", "b"), ("end", "c")])
+        self.assertFalse(self._dispatcher.is_running)
+        del self._log[:]
+        self._dispatcher.step(self._dt)
+        self.assertEqual(self._log, [("post", None)])
+
+    async def test_tracker_aborted_during_step(self):
+        self._scenarios[1].abort_on_step = 2
+        self._dispatcher._on_simulation_event(_Event(SimulationEvent.RESUMED))
+        del self._log[:]
+        for _ in range(3):
+            self._dispatcher.step(self._dt)
+
+        # Trackers after the aborted one are still stepped on the same step.
+        expected = self._step_log("abc")
+        expected += [("step", "a"), ("step", "b"), ("end", "b"), ("step", "c"), ("post", None)]
+        expected += self._step_log("ac")
+        self.assertEqual(self._log, expected)
+        self.assertEqual(self._dispatcher.num_trackers, 2)
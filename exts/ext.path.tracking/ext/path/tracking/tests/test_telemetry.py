@@ -0,0 +1,99 @@
+import omni.kit.test
+
+import math
+import os
+import tempfile
+import tracemalloc
+import numpy as np
+
+from ..scripts.headless import HeadlessSimulation, create_headless_scenario
+from ..scripts.telemetry import FleetTelemetry, load_telemetry
+from ..scripts.trajectory import Trajectory, TrajectoryGeometry
+
+# ======================================================================================================================
+
+
+class TestFleetTelemetry(omni.kit.test.AsyncTestCase):
+    async def test_ring_buffer(self):
+        telemetry = FleetTelemetry(2, capacity=4)
+        for step in range(6):
+            telemetry.record(0, step, 0.0, 1.0, 0.0, 0.7, 0.0, step, 5.0, 0.1)
+            telemetry.end_step(step * 0.5)
+
+        latest = telemetry.latest()
+        self.assertEqual(telemetry.num_steps, 6)
+        self.assertEqual(latest.shape, (4, 2))
+        np.testing.assert_array_equal(latest["step"][:, 0], [2, 3, 4, 5])
+        np.testing.assert_array_equal(latest["target_index"][:, 0], [2, 3, 4, 5])
+        np.testing.assert_allclose(latest["time"][:, 1], [1.0, 1.5, 2.0, 2.5])
+        self.assertTrue(latest["updated"][:, 0].all())
+        self.assertFalse(latest["updated"][:, 1].any())
+        self.assertFalse(latest["controlled"][:, 1].any())
+        self.assertEqual(len(telemetry.latest(2)), 2)
+
+    async def test_flush_to_file(self):
+        path = os.path.join(tempfile.mkdtemp(), "run.telemetry")
+        telemetry = FleetTelemetry(3, capacity=8, path=path, vehicle_names=["/A", "/B", "/C"])
+        for step in range(21):
+            for slot in range(3):
+                telemetry.record(slot, slot, step, 1.0, 0.0, 0.7, 0.0, step, 5.0, 0.0)
+            telemetry.end_step(step / 60.0)
+        telemetry.close()
+
+        data, metadata = load_telemetry(path)
+        self.assertEqual(metadata["vehicle_names"], ["/A", "/B", "/C"])
+        self.assertEqual(data.shape, (21, 3))
+        np.testing.assert_array_equal(data["step"][:, 0], np.arange(21))
+        np.testing.assert_array_equal(data["z"][:, 2], np.arange(21))
+        np.testing.assert_array_equal(data["x"][5], [0, 1, 2])
+
+    async def test_headless_scenario_telemetry(self):
+        radius = 3000.0
+        angles = np.linspace(0.0, 2.0 * math.pi, 400, endpoint=False)
+        points = np.stack([radius * np.cos(angles) - radius, np.zeros_like(angles), radius * np.sin(angles)], axis=1)
+        scenario = create_headless_scenario(points, close_loop=True)
+        telemetry = FleetTelemetry(1, capacity=1024)
+        scenario.set_telemetry(telemetry, 0)
+        simulation = HeadlessSimulation([scenario], telemetry=telemetry)
+
+        simulation.run(600)
+
+        data = telemetry.latest()[:, 0]
+        self.assertEqual(len(data), 600)
+        self.assertTrue(data["controlled"].all())
+        # Evaluated at 25 Hz, values are held on the steps in between.
+        self.assertAlmostEqual(data["updated"].sum(), 250, delta=1)
+        self.assertGreater(data["speed"][-1], 0.0)
+        self.assertLess(np.abs(data["cross_track_error"][300:]).max(), 0.1 * radius * 0.01)
+        self.assertAlmostEqual(data["distance_to_target"][-1], 5.5, delta=0.5)
+
+
+class TestCrossTrackError(omni.kit.test.AsyncTestCase):
+    async def test_signed_distance(self):
+        points = np.stack([np.zeros(11), np.zeros(11), np.linspace(0.0, 1000.0, 11)], axis=1)
+        trajectory = Trajectory("/Line", False, TrajectoryGeometry("/Line", points))
+        trajectory.find_lookahead_point(np.array([0.0, 0.0, 0.0]), 550.0)
+
+        # Heading +Z, left is +X.
+        self.assertAlmostEqual(trajectory.cross_track_error(np.array([30.0, 0.0, 250.0])), 30.0)
+        self.assertAlmostEqual(trajectory.cross_track_error(np.array([-20.0, 0.0, 250.0])), -20.0)
+        self.assertAlmostEqual(trajectory.cross_track_error(np.array([0.0, 0.0, 120.0])), 0.0)
+
+    async def test_no_array_allocation(self):
+        angles = np.linspace(0.0, 2.0 * math.pi, 4000, endpoint=False)
+        points = np.stack([1000.0 * np.cos(angles), np.zeros_like(angles), 1000.0 * np.sin(angles)], axis=1)
+        trajectory = Trajectory("/Circle", True, TrajectoryGeometry("/Circle", points))
+        trajectory.find_lookahead_point(np.array([1000.0, 0.0, 0.0]), 550.0)
+        position = np.array([1010.0, 0.0, 50.0])
+        expected = trajectory.cross_track_error(position, window=2048)
+
+        tracemalloc.start()
+        try:
+            for _ in range(100):
+                error = trajectory.cross_track_error(position, window=2048)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(error, expected)
+        # A temporary (2048, 2) array of the window alone would take 32 KB.
+        self.assertLess(peak, 16 * 1024)
@@ -0,0 +1,87 @@
+import omni.kit.test
+
+import math
+import numpy as np
+
+from ..scripts.debug_draw import DebugOverlay
+from ..scripts.headless import HeadlessSimulation, create_headless_scenario
+from ..scripts.trail import FleetTrails
+
+# ======================================================================================================================
+
+
+class TestFleetTrails(omni.kit.test.AsyncTestCase):
+    async def test_ring_buffer(self):
+        trails = FleetTrails(2, duration=0.4, sample_period=0.1)
+        for step in range(7):
+            trails.record(0, (step, 0.0, 0.0))
+            trails.end_step(step * 0.1)
+
+        self.assertEqual(trails.capacity, 4)
+        self.assertEqual(trails.num_samples, 7)
+        data = trails.trails()
+        self.assertEqual(data.shape, (4, 2, 3))
+        np.testing.assert_array_equal(data[:, 0, 0], [3, 4, 5, 6])
+        # Vehicle 1 never recorded a position.
+        self.assertTrue(np.isnan(data[:, 1]).all())
+
+    async def test_sample_period(self):
+        trails = FleetTrails(1, duration=10.0, sample_period=0.125)
+        for step in range(40):
+            trails.record(0, (step, 0.0, 0.0))
+            trails.end_step(step / 32.0)
+
+        # One sample per 4 steps.
+        self.assertEqual(trails.num_samples, 10)
+        np.testing.assert_array_equal(trails.trails()[:, 0, 0], np.arange(0, 40, 4))
+
+        # Restarted simulation starts a new trail.
+        trails.end_step(0.0)
+        self.assertEqual(trails.num_samples, 1)
+
+    async def test_draw_decimates_trails(self):
+        trails = FleetTrails(2, duration=4.0, sample_period=0.125, max_segments=10)
+        for step in range(60):
+            trails.record(0, (step, 0.0, 0.0))
+            trails.end_step(step / 8.0)
+
+        overlay = DebugOverlay()
+        trails.draw(overlay)
+        starts, ends, _, _ = overlay.lines.lines()
+        data = trails.trails()
+        # 31 segments of the full ring buffer are decimated to every 4th sample and the latest one.
+        self.assertEqual(overlay.lines.count, 8)
+        np.testing.assert_array_equal(starts[:, 0], data[0:29:4, 0, 0])
+        np.testing.assert_array_equal(ends[-1], data[-1, 0])
+        # Vehicle 1 never recorded a position and is not drawn.
+        self.assertFalse(np.isnan(starts).any() or np.isnan(ends).any())
+
+    async def test_fleet_trails_are_drawn_in_one_batch(self):
+        angles = np.linspace(0.0, 2.0 * math.pi, 400, endpoint=False)
+        points = np.stack([3000.0 * np.cos(angles), np.zeros_like(angles), 3000.0 * np.sin(angles)], axis=1)
+        scenarios = [
+            create_headless_scenario(points + np.array([10000.0 * i, 0.0, 0.0]), close_loop=True) for i in range(3)
+        ]
+        trails = FleetTrails(len(scenarios), duration=2.0, sample_period=0.1)
+        for slot, scenario in enumerate(scenarios):
+            scenario.set_trails(trails, slot)
+        simulation = HeadlessSimulation(scenarios)
+
+        for _ in range(600):
+            simulation.step()
+            trails.end_step(simulation.total_time)
+
+        # Memory is bounded by the trail duration.
+        self.assertAlmostEqual(trails.num_samples, 100, delta=1)
+        data = trails.trails()
+        self.assertEqual(data.shape, (20, 3, 3))
+        self.assertFalse(np.isnan(data).any())
+        # Trails follow the vehicles.
+        for slot, scenario in enumerate(scenarios):
+            position = scenario.vehicle.curr_position()
+            self.assertLess(np.linalg.norm(data[-1, slot] - position), 300.0)
+
+        overlay = DebugOverlay()
+        overlay.add_renderer(trails)
+        overlay.refresh()
+        self.assertEqual(overlay.lines.count, 19 * 3)
@@ -0,0 +1,165 @@
+import omni.kit.test
+from pxr import Gf, Sdf, Usd, UsdGeom
+
+import numpy as np
+
+from ..scripts.trajectory import Trajectory, TrajectoryCache, TrajectoryGeometry
+
+# ======================================================================================================================
+
+
+class TestTrajectory(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._stage = Usd.Stage.CreateInMemory()
+        UsdGeom.Xform.Define(self._stage, "/World")
+        self._curve_path = "/World/BasisCurves"
+        self._curve = UsdGeom.BasisCurves.Define(self._stage, self._curve_path)
+        self._local_points = np.stack(
+            [np.linspace(0.0, 1000.0, 101), np.zeros(101), np.linspace(0.0, 500.0, 101)], axis=1
+        )
+        self._curve.CreatePointsAttr().Set([Gf.Vec3f(*p) for p in self._local_points])
+        self._curve.AddTranslateOp().Set(Gf.Vec3d(10.0, 0.0, -20.0))
+
+    async def tearDown(self):
+        self._stage = None
+
+    async def test_world_space_points(self):
+        cache = TrajectoryCache()
+        trajectory = Trajectory(self._curve_path, close_loop=False, geometry=cache.get(self._curve_path, self._stage))
+        expected = self._local_points + np.array([10.0, 0.0, -20.0])
+        self.assertTrue(np.allclose(trajectory.points, expected, atol=1e-3))
+        self.assertFalse(trajectory.points.flags.writeable)
+
+    async def test_cache_shares_geometry(self):
+        cache = TrajectoryCache()
+        geometry = cache.get(self._curve_path, self._stage)
+        self.assertIs(cache.get(self._curve_path, self._stage), geometry)
+
+        first = Trajectory(self._curve_path, close_loop=False, geometry=geometry)
+        second = Trajectory(self._curve_path, close_loop=False, geometry=geometry)
+        first.next_point()
+        self.assertTrue(np.array_equal(second.point(), geometry.points[0]))
+
+    async def test_cache_detects_curve_changes(self):
+        cache = TrajectoryCache()
+        geometry = cache.get(self._curve_path, self._stage)
+        self._curve.GetPrim().GetAttribute("xformOp:translate").Set(Gf.Vec3d(0.0, 0.0, 0.0))
+        self.assertIs(cache.get(self._curve_path, self._stage), geometry)
+        cache.invalidate(self._curve_path)
+        updated = cache.get(self._curve_path, self._stage)
+        self.assertIsNot(updated, geometry)
+        self.assertTrue(np.allclose(updated.points, self._local_points, atol=1e-3))
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    async def test_cache_reads_curve_once_per_generation(self):
+        reads = []
+        read_curve = TrajectoryGeometry.read_curve
+
+        def counting_read_curve(stage, prim_path):
+            reads.append(prim_path)
+            return read_curve(stage, prim_path)
+
+        TrajectoryGeometry.read_curve = staticmethod(counting_read_curve)
+        try:
+            cache = TrajectoryCache()
+            # A fleet load: every vehicle looks the curve up at creation and at trajectory recompute.
+            geometries = [cache.get(self._curve_path, self._stage) for _ in range(2 * 50)]
+            self.assertEqual(len(reads), 1)
+            self.assertTrue(all(geometry is geometries[0] for geometry in geometries))
+
+            cache.invalidate(self._curve_path)
+            self.assertIs(cache.get(self._curve_path, self._stage), geometries[0])
+            cache.invalidate()
+            cache.get(self._curve_path, self._stage)
+            self.assertEqual(len(reads), 3)
+
+            # Another stage is never served entries validated against the previous one.
+            cache.get(self._curve_path, Usd.Stage.CreateInMemory())
+            self.assertEqual(len(reads), 4)
+            self.assertFalse(cache.contains(self._curve_path))
+        finally:
+            TrajectoryGeometry.read_curve = staticmethod(read_curve)
+
+    async def test_curves_under(self):
+        other_path = "/World/Group/BasisCurves"
+        UsdGeom.BasisCurves.Define(self._stage, other_path).CreatePointsAttr().Set(
+            [Gf.Vec3f(*p) for p in self._local_points]
+        )
+        cache = TrajectoryCache()
+        cache.get(self._curve_path, self._stage)
+        cache.get(other_path, self._stage)
+        both = {Sdf.Path(self._curve_path), Sdf.Path(other_path)}
+
+        self.assertEqual(set(cache.curves_under(Sdf.Path("/World"))), both)
+        self.assertEqual(set(cache.curves_under(Sdf.Path.absoluteRootPath)), both)
+        self.assertEqual(set(cache.curves_under(Sdf.Path("/World/Group"))), {Sdf.Path(other_path)})
+        self.assertEqual(set(cache.curves_under(Sdf.Path(self._curve_path))), {Sdf.Path(self._curve_path)})
+        self.assertEqual(len(cache.curves_under(Sdf.Path("/World/Fleet"))), 0)
+
+        cache.evict(other_path)
+        self.assertEqual(set(cache.curves_under(Sdf.Path("/World"))), {Sdf.Path(self._curve_path)})
+        self.assertEqual(len(cache.curves_under(Sdf.Path("/World/Group"))), 0)
+        cache.clear()
+        self.assertEqual(len(cache.curves_under(Sdf.Path("/World"))), 0)
+
+    async def test_incremental_update_keeps_progress(self):
+        cache = TrajectoryCache()
+        geometry = cache.get(self._curve_path, self._stage)
+        trajectory = Trajectory(self._curve_path, close_loop=False, geometry=geometry)
+        for _ in range(10):
+            trajectory.next_point()
+
+        moved_points = self._local_points.copy()
+        moved_points[50] += np.array([0.0, 0.0, 100.0])
+        self._curve.GetPointsAttr().Set([Gf.Vec3f(*p) for p in moved_points])
+        cache.invalidate()
+        updated = cache.get(self._curve_path, self._stage)
+        trajectory.set_geometry(updated)
+
+        self.assertTrue(np.allclose(updated.points[50], geometry.points[50] + np.array([0.0, 0.0, 100.0])))
+        self.assertTrue(np.array_equal(np.delete(updated.points, 50, axis=0), np.delete(geometry.points, 50, axis=0)))
+        self.assertTrue(np.array_equal(trajectory.point(), updated.points[10]))
+
+    async def test_lookahead_search_advances_many_points(self):
+        points = np.stack([np.arange(0.0, 1000.0, 10.0), np.zeros(100), np.zeros(100)], axis=1)
+        trajectory = Trajectory("/Line", close_loop=False, geometry=TrajectoryGeometry("/Line", points))
+
+        target = trajectory.find_lookahead_point(np.array([0.0, 0.0, 0.0]), 55.0, window=256)
+        self.assertTrue(np.allclose(target, [55.0, 0.0, 0.0]))
+        self.assertEqual(trajectory.point()[0], 60.0)
+
+        # Lookahead distance beyond the search window: farthest searched point is tracked.
+        target = trajectory.find_lookahead_point(np.array([50.0, 0.0, 0.0]), 500.0, window=8)
+        self.assertTrue(np.allclose(target, [130.0, 0.0, 0.0]))
+
+        # The rest of the trajectory is within lookahead distance: destination is reached.
+        self.assertIsNone(trajectory.find_lookahead_point(np.array([980.0, 0.0, 0.0]), 1000.0, window=256))
+
+    async def test_arc_length_lookup(self):
+        square = np.array([[0.0, 0.0, 0.0], [100.0, 0.0, 0.0], [100.0, 0.0, 100.0], [0.0, 0.0, 100.0]])
+        geometry = TrajectoryGeometry("/Square", square)
+        self.assertAlmostEqual(geometry.length, 300.0)
+        self.assertAlmostEqual(geometry.loop_length, 400.0)
+        self.assertTrue(np.allclose(geometry.point_at(150.0), [100.0, 0.0, 50.0]))
+        self.assertTrue(np.allclose(geometry.point_at(350.0, close_loop=True), [0.0, 0.0, 50.0]))
+
+        trajectory = Trajectory("/Square", close_loop=False, geometry=geometry)
+        self.assertTrue(np.allclose(trajectory.advance(120.0), [100.0, 0.0, 20.0]))
+        self.assertAlmostEqual(trajectory.arc_length, 120.0)
+        self.assertTrue(np.array_equal(trajectory.point(), square[2]))
+        self.assertIsNone(trajectory.advance(500.0))
+
+    async def test_reacquire_nearest_segment_ahead(self):
+        square = np.array([[0.0, 0.0, 0.0], [100.0, 0.0, 0.0], [100.0, 0.0, 100.0], [0.0, 0.0, 100.0]])
+        trajectory = Trajectory("/Square", close_loop=True, geometry=TrajectoryGeometry("/Square", square))
+
+        self.assertTrue(trajectory.reacquire(np.array([50.0, 0.0, 110.0]), np.array([-1.0, 0.0, 0.0])))
+        self.assertAlmostEqual(trajectory.arc_length, 250.0)
+        self.assertTrue(np.array_equal(trajectory.point(), square[3]))
+
+        # Closing segment of the loop heads towards -Z.
+        self.assertTrue(trajectory.reacquire(np.array([-10.0, 0.0, 50.0]), np.array([0.0, 0.0, -1.0])))
+        self.assertAlmostEqual(trajectory.arc_length, 350.0)
+        self.assertTrue(np.array_equal(trajectory.point(), square[0]))
@@ -0,0 +1,27 @@
+import omni.kit.test
+
+from ..scripts.tuner import evaluate, parameter_grid, sample_tracks, tune
+
+# ======================================================================================================================
+
+
+class TestTuner(omni.kit.test.AsyncTestCase):
+    async def test_evaluate_sample_tracks(self):
+        for track in sample_tracks():
+            result = evaluate(track, lookahead_distance=550.0, max_speed=15.0, brake_steer_threshold=0.1)
+
+            self.assertTrue(result["completed"], track.name)
+            self.assertGreater(result["lap_time"], 0.0)
+            self.assertLess(result["max_cross_track_error"], 5.0)
+
+    async def test_ranking(self):
+        configs = parameter_grid([550.0], [5.0, 15.0], [0.1])
+        # Run in-process, worker processes can't be spawned from every test environment.
+        ranking = tune(sample_tracks(), configs, max_workers=1)
+
+        self.assertEqual(len(ranking), 2)
+        self.assertTrue(all(entry["completed"] for entry in ranking))
+        self.assertLessEqual(ranking[0]["score"], ranking[1]["score"])
+        # Faster configuration completes laps sooner.
+        self.assertEqual(ranking[0]["config"]["max_speed"], 15.0)
+        self.assertEqual(set(ranking[0]["tracks"].keys()), set(["oval", "s_curve"]))
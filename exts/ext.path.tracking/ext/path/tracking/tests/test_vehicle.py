@@ -0,0 +1,121 @@
+import omni.kit.app
+import omni.usd
+from omni.kit.test import AsyncTestCaseFailOnLogError
+
+import math
+from pxr import Tf, Usd
+
+from ..scripts.model import ExtensionModel
+from ..scripts.vehicle import Axle, ControlCommitter, Vehicle
+
+# ======================================================================================================================
+
+
+class TestVehicle(AsyncTestCaseFailOnLogError):
+    async def setUp(self):
+        usd_context = omni.usd.get_context()
+        await usd_context.new_stage_async()
+
+        ext_manager = omni.kit.app.get_app().get_extension_manager()
+        self._ext_id = ext_manager.get_enabled_extension_id("ext.path.tracking")
+
+        self._ext_model = ExtensionModel(self._ext_id,
+                                         default_lookahead_distance=550.0,
+                                         max_lookahed_distance=1200.0,
+                                         min_lookahed_distance=300.0
+                                         )
+        self._ext_model.load_preset_scene()
+        vehicle_path = list(self._ext_model._vehicle_to_curve_attachments.keys())[0]
+        stage = usd_context.get_stage()
+        self._vehicle = Vehicle(stage.GetPrimAtPath(vehicle_path), math.pi / 3, rear_steering=False)
+
+    async def tearDown(self):
+        self._vehicle = None
+        self._ext_model.teardown()
+        self._ext_model = None
+
+    async def test_single_transform_evaluation_per_step(self):
+        self._vehicle.update_pose()
+        self._vehicle.forward()
+        self._vehicle.up()
+        self._vehicle.curr_position()
+        self._vehicle.is_close_to(self._vehicle.curr_position(), 100.0)
+        self._vehicle.axle_position(Axle.FRONT)
+        self._vehicle.axle_position(Axle.REAR)
+        self._vehicle.rotation_matrix()
+        self.assertEqual(self._vehicle.get_transform_evaluations(), 1)
+
+    async def test_pose_accessors_return_copies(self):
+        self._vehicle.update_pose()
+        position = self._vehicle.curr_position()
+        position[1] += 100.0
+        self.assertNotEqual(self._vehicle.curr_position()[1], position[1])
+
+    async def test_wheel_geometry_refresh(self):
+        wheel_prim = omni.usd.get_context().get_stage().GetPrimAtPath(self._vehicle.wheel_prim_paths()[0])
+        self._vehicle.update_pose()
+        axle_front = self._vehicle.axle_position(Axle.FRONT)
+        wheelbase = self._vehicle.get_wheelbase()
+        self.assertGreater(wheelbase, 0.0)
+
+        translate = wheel_prim.GetAttribute("xformOp:translate").Get()
+        wheel_prim.GetAttribute("xformOp:translate").Set(translate + type(translate)(0.0, 0.0, 20.0))
+        self._vehicle.update_pose()
+        self.assertEqual(self._vehicle.axle_position(Axle.FRONT), axle_front)
+
+        self._vehicle.on_wheel_prims_changed()
+        self._vehicle.update_pose()
+        self.assertNotEqual(self._vehicle.axle_position(Axle.FRONT), axle_front)
+        self.assertNotAlmostEqual(self._vehicle.get_wheelbase(), wheelbase)
+
+    async def test_wheel_geometry_not_reloaded_by_physics_writes(self):
+        self._ext_model.load_simulation(550.0)
+        vehicle = self._ext_model._scenarios[0].vehicle
+        stage = omni.usd.get_context().get_stage()
+        translate_attribute = stage.GetPrimAtPath(vehicle.wheel_prim_paths()[0]).GetAttribute("xformOp:translate")
+        translate = translate_attribute.Get()
+        refreshes = []
+        refresh = vehicle._wheel_geometry.refresh
+        vehicle._wheel_geometry.refresh = lambda wheel_prims: (refreshes.append(wheel_prims), refresh(wheel_prims))
+        listener = Tf.Notice.Register(
+            Usd.Notice.ObjectsChanged, lambda notice, sender: self._ext_model.on_usd_objects_changed(notice), stage
+        )
+        try:
+            dispatcher = self._ext_model._step_dispatcher
+            dispatcher.start_manual_stepping()
+            for i in range(10):
+                # Suspension travel, as written back by PhysX on every step.
+                translate_attribute.Set(translate + type(translate)(0.0, 0.1 * i, 0.0))
+                vehicle.update_pose()
+            self.assertEqual(len(refreshes), 0)
+            dispatcher.stop_manual_stepping()
+
+            # Edits while the simulation is stopped are picked up.
+            translate_attribute.Set(translate + type(translate)(0.0, 0.0, 20.0))
+            vehicle.update_pose()
+            self.assertEqual(len(refreshes), 1)
+        finally:
+            listener.Revoke()
+
+    async def test_control_write_suppression(self):
+        self._vehicle.accelerate(0.7)
+        self._vehicle.accelerate(0.7)
+        self._vehicle.brake(0.0)
+        self._vehicle.brake(0.00001)
+        self._vehicle.brake(0.5)
+        self.assertEqual(self._vehicle.get_control_write_stats(), (3, 2))
+
+        self._vehicle.reset_control_cache()
+        self._vehicle.accelerate(0.7)
+        self.assertEqual(self._vehicle.get_control_write_stats(), (4, 2))
+
+    async def test_control_committer_defers_writes(self):
+        committer = ControlCommitter()
+        self._vehicle.set_control_committer(committer)
+        self._vehicle.brake(0.25)
+        brake_attr = self._vehicle._prim.GetAttribute("physxVehicleController:brake")
+        self.assertNotAlmostEqual(brake_attr.Get(), 0.25)
+
+        committer.commit()
+        self.assertAlmostEqual(brake_attr.Get(), 0.25)
+        self.assertEqual(committer.get_last_commit_size(), 1)